@@ -0,0 +1,253 @@
+import re
+import shutil
+import tempfile
+import weakref
+from datetime import date, datetime
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from xqdata.resample import get_base_frequency, parse_frequency
+
+# 一个交易日内的行数：A股每日交易4小时(240分钟)，tick约每3秒一笔快照
+_ROWS_PER_SESSION = {"D": 1.0, "W": 1 / 5, "ME": 1 / 21, "QE": 1 / 63}
+_MINUTES_PER_SESSION = 240
+_TICKS_PER_SESSION = 4800
+
+# 每行除因子值以外的开销：datetime(8字节)、code(对象指针8字节)和MultiIndex的层级编码
+_INDEX_BYTES_PER_ROW = 32
+# 每个因子值按8字节估计(float64/int64)
+_VALUE_BYTES = 8
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+_SIZE_PATTERN = re.compile(r"^\s*([\d.]+)\s*([KMGT]?)i?B?\s*$", re.IGNORECASE)
+
+
+def parse_size(size: Union[int, float, str]) -> int:
+    """
+    解析内存大小
+
+    Args:
+        size: 字节数，或带单位的字符串，如"512MB"、"4G"、"1.5GiB"
+
+    Returns:
+        字节数
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    match = _SIZE_PATTERN.match(size)
+    if match is None:
+        raise ValueError(f"Cannot parse memory size '{size}'")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def rows_per_session(frequency: str) -> float:
+    """
+    每个证券每个交易日的行数，需要由更高频数据合成时按基础频率计算(查询时的内存峰值)
+
+    Args:
+        frequency: 数据频率
+
+    Returns:
+        行数，无法识别的频率按日频计算
+    """
+    if frequency == "tick":
+        return _TICKS_PER_SESSION
+    rows = []
+    for freq in (frequency, get_base_frequency(frequency)):
+        parsed = parse_frequency(freq) if freq is not None else None
+        if parsed is None:
+            continue
+        unit, n = parsed
+        if unit == "m":
+            rows.append(_MINUTES_PER_SESSION / n)
+        else:
+            rows.append(_ROWS_PER_SESSION[unit])
+    return max(rows, default=1.0)
+
+
+def estimate_bytes(
+    n_sessions: int, n_codes: int, n_factors: int, frequency: str = "D"
+) -> int:
+    """
+    估计面板格式查询结果占用的内存
+
+    Args:
+        n_sessions: 交易日数量
+        n_codes: 证券数量
+        n_factors: 因子数量
+        frequency: 数据频率
+
+    Returns:
+        字节数
+    """
+    rows = n_sessions * n_codes * rows_per_session(frequency)
+    return int(rows * (_INDEX_BYTES_PER_ROW + _VALUE_BYTES * n_factors))
+
+
+def plan_chunks(
+    sessions: pd.DatetimeIndex,
+    codes: List[str],
+    n_factors: int,
+    frequency: str,
+    budget: int,
+) -> List[Tuple[pd.Timestamp, pd.Timestamp, List[str]]]:
+    """
+    将查询切分为估计内存不超过budget的块：先按月切分日期(整个区间放不下一个证券时)，
+    再将证券分组
+
+    Args:
+        sessions: 查询区间内的交易日
+        codes: 证券代码
+        n_factors: 因子数量
+        frequency: 数据频率
+        budget: 每块的内存上限(字节)
+
+    Returns:
+        [(开始日期, 结束日期, 证券代码列表), ...]
+    """
+    if len(sessions) == 0:
+        return []
+    windows = [(sessions[0], sessions[-1], len(sessions))]
+    if estimate_bytes(len(sessions), 1, n_factors, frequency) > budget:
+        months = sessions.to_period("M")
+        windows = []
+        for month in months.unique():
+            days = sessions[months == month]
+            windows.append((days[0], days[-1], len(days)))
+
+    chunks = []
+    for start, end, n_sessions in windows:
+        per_code = max(estimate_bytes(n_sessions, 1, n_factors, frequency), 1)
+        size = max(budget // per_code, 1)
+        for i in range(0, len(codes), size):
+            chunks.append((start, end, list(codes[i : i + size])))
+    return chunks
+
+
+class SpilledResult:
+    """
+    溢出到临时Parquet数据集的查询结果，按需加载
+
+    超过内存预算的查询分块获取后写入临时目录，而不是拼接为一个DataFrame；
+    可以按证券、日期区间和列加载其中的一部分，或按月逐块遍历。
+    临时目录在close()、对象被回收或进程退出时删除。
+    """
+
+    def __init__(
+        self,
+        factors: List[str],
+        codes: List[str],
+        start_time: pd.Timestamp,
+        end_time: pd.Timestamp,
+        panel: bool = True,
+        postprocess: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    ):
+        """
+        Args:
+            factors: 因子名称
+            codes: 证券代码
+            start_time: 开始日期
+            end_time: 结束日期
+            panel: 加载时是否返回面板数据格式
+            postprocess: 加载后、转换格式前对数据的处理(如类型声明、整数索引)
+        """
+        from xqdata.storage import ParquetStore
+
+        self.factors = list(factors)
+        self.codes = list(codes)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.panel = panel
+        self.postprocess = postprocess
+        self.path = tempfile.mkdtemp(prefix="xqdata-spill-")
+        self.store = ParquetStore(self.path, partition="month")
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, True)
+        self._chunks = 0
+
+    def append(self, data: pd.DataFrame):
+        """写入一块数据"""
+        self.store.write(data, key=f"chunk{self._chunks:06d}")
+        self._chunks += 1
+
+    @property
+    def nbytes(self) -> int:
+        """溢出文件占用的磁盘空间"""
+        return sum(p.stat().st_size for p in self.store.root.rglob("*.parquet"))
+
+    def load(
+        self,
+        factors: Optional[Union[str, List[str]]] = None,
+        codes: Optional[Union[str, List[str]]] = None,
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+    ) -> pd.DataFrame:
+        """
+        加载全部或部分数据，条件会被下推到文件扫描
+
+        Args:
+            factors: 因子名称，默认为全部因子
+            codes: 证券代码，默认为全部证券
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            与get_factor格式相同的DataFrame
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        data = self.store.read(factors or self.factors, codes, start_time, end_time)
+        if data.empty:
+            return data
+        data = data[[f for f in (factors or self.factors) if f in data.columns]]
+        if self.postprocess is not None:
+            data = self.postprocess(data)
+        if not self.panel:
+            # 转换为长格式
+            data = data.stack().reset_index(level=-1)
+            data.columns = ["attribute", "value"]
+        return data
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        """按月逐块加载"""
+        for period in pd.period_range(self.start_time, self.end_time, freq="M"):
+            data = self.load(start_time=period.start_time, end_time=period.end_time)
+            if not data.empty:
+                yield data
+
+    def close(self):
+        """删除溢出文件"""
+        self._finalizer()
+
+    def __enter__(self) -> "SpilledResult":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"SpilledResult({len(self.factors)} factors x {len(self.codes)} codes, "
+            f"{self.start_time.date()}~{self.end_time.date()}, path={self.path})"
+        )
+
+
+def check_budget(estimate: int, budget: Optional[Union[int, str]]) -> None:
+    """
+    检查估计的结果大小是否超出预算
+
+    Args:
+        estimate: 估计的字节数
+        budget: 内存预算(字节数或"4GB"等)，None或0表示不限制
+
+    Raises:
+        MemoryError: 超出预算
+    """
+    if not budget:
+        return
+    budget = parse_size(budget)
+    if estimate > budget:
+        raise MemoryError(
+            f"Estimated result size {estimate / (1 << 20):.0f}MB exceeds "
+            f"max_memory {budget / (1 << 20):.0f}MB"
+        )
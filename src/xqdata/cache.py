@@ -0,0 +1,316 @@
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, FrozenSet, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from xqdata.dataapi import Coverage, DataApi
+
+
+def _freeze(data: pd.DataFrame) -> pd.DataFrame:
+    """返回数据不可写的DataFrame，调用方的原地修改会抛出ValueError"""
+    if not data.columns.is_unique:
+        return data.copy()
+    columns = {}
+    for column in data.columns:
+        values = data[column].to_numpy()
+        if isinstance(values, np.ndarray) and values.dtype == data[column].dtype:
+            values = values.copy()
+            values.setflags(write=False)
+            columns[column] = values
+        else:
+            columns[column] = data[column].copy()
+    return pd.DataFrame(columns, index=data.index, columns=data.columns, copy=False)
+
+
+def _settings_key(api: DataApi) -> str:
+    """数据API的类型及其当前的额外参数和选项，数据源或设置不同的查询不能共享缓存"""
+    extra_params = getattr(api, "_extra_params", None) or {}
+    options = getattr(api, "_options", None) or {}
+    return repr(
+        (
+            f"{type(api).__module__}.{type(api).__qualname__}",
+            sorted((k, sorted(dict(v).items())) for k, v in extra_params.items()),
+            sorted(dict(options).items()),
+        )
+    )
+
+
+class _Entry:
+    __slots__ = ("base", "factors", "codes", "start", "end", "data", "nbytes")
+
+    def __init__(self, base, factors, codes, start, end, data):
+        self.base = base
+        self.factors: FrozenSet[str] = factors
+        self.codes: FrozenSet[str] = codes
+        self.start: Optional[pd.Timestamp] = start
+        self.end: Optional[pd.Timestamp] = end
+        self.data: pd.DataFrame = data
+        self.nbytes = int(data.memory_usage(deep=True, index=True).sum())
+
+    def covers(self, base, factors, codes, start, end) -> bool:
+        return (
+            self.base == base
+            and factors <= self.factors
+            and codes <= self.codes
+            and (self.start is None or (start is not None and start >= self.start))
+            and (self.end is None or (end is not None and end <= self.end))
+        )
+
+
+class ResultCache:
+    """
+    按实际内存占用做LRU淘汰的查询结果缓存
+
+    缓存的结果是不可写的；请求的证券、因子更少或日期区间更窄时，
+    直接从已缓存的结果中截取，不再请求数据源。
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        """
+        Args:
+            max_bytes: 缓存结果占用内存的上限(字节)，默认1GB
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+
+    def get(self, base, factors, codes, start, end) -> Optional[pd.DataFrame]:
+        """
+        查找覆盖该查询的缓存结果
+
+        Returns:
+            截取后的结果(完全相同时为不可写的浅拷贝)，没有命中时返回None
+        """
+        with self._lock:
+            for key, entry in reversed(self._entries.items()):
+                if entry.covers(base, factors, codes, start, end):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    break
+            else:
+                self.misses += 1
+                return None
+        return self._subset(entry, factors, codes, start, end)
+
+    @staticmethod
+    def _subset(entry: _Entry, factors, codes, start, end) -> pd.DataFrame:
+        data = entry.data
+        if data.empty:
+            return data.copy()
+        mask = None
+        if codes != entry.codes:
+            mask = data.index.get_level_values("code").isin(codes)
+        if start != entry.start or end != entry.end:
+            dates = data.index.get_level_values("datetime")
+            in_range = np.ones(len(data), dtype=bool)
+            if start is not None:
+                in_range &= dates >= start
+            if end is not None:
+                # 与数据源一致，只有日期的结束时间即当天0点，不包含当天的日内数据
+                in_range &= dates <= end
+            mask = in_range if mask is None else mask & in_range
+        if factors != entry.factors:
+            data = data[[c for c in data.columns if c in factors]]
+        if mask is not None:
+            data = data[mask]
+        # 浅拷贝：调用方增删列不影响缓存，原地修改会因数据不可写而报错
+        return data.copy(deep=False)
+
+    def put(self, base, factors, codes, start, end, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        缓存查询结果，必要时按LRU淘汰旧结果；空结果通常来自查询失败，不缓存
+
+        Returns:
+            不可写的结果
+        """
+        frozen = _freeze(data)
+        entry = _Entry(base, factors, codes, start, end, frozen)
+        if data.empty or entry.nbytes > self.max_bytes:
+            return frozen.copy(deep=False)
+        with self._lock:
+            self._entries[id(entry)] = entry
+            self.nbytes += entry.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return frozen.copy(deep=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+class CachedDataApi(DataApi):
+    """
+    带结果缓存的数据API包装
+
+    缓存键为规范化后的查询(因子集合、证券集合、日期区间、频率)、被包装的数据API的类型、
+    认证的用户以及其当前的额外参数和选项。返回的DataFrame数据不可写，需要修改时请先copy()。
+    """
+
+    def __init__(self, api: DataApi, max_bytes: int = 1 << 30, cache=None):
+        """
+        Args:
+            api: 被包装的数据API
+            max_bytes: 缓存结果占用内存的上限(字节)，默认1GB
+            cache: 结果缓存，默认为进程内的ResultCache(max_bytes)；
+                传入xqdata.shm_cache.SharedResultCache时在同一台机器的进程间共享
+        """
+        self.api = api
+        self.cache = cache if cache is not None else ResultCache(max_bytes)
+        # 认证用户名的摘要，不同用户(权限可能不同)的结果不共享；不保存密码
+        self._identity: Optional[str] = None
+
+    def auth(self, *args: Any, **kwargs: Any) -> None:
+        if isinstance(self.cache, ResultCache):
+            self.cache.clear()
+        else:
+            # 共享缓存的键包含用户，不能清空其他进程仍在使用的结果，只释放本进程的引用
+            self.cache.close()
+        result = self.api.auth(*args, **kwargs)
+        username = kwargs.get("username", args[0] if args else None)
+        self._identity = (
+            None
+            if username is None
+            else hashlib.sha1(str(username).encode()).hexdigest()[:12]
+        )
+        return result
+
+    def _base_key(self, *query: Any) -> tuple:
+        return (*query, self._identity, _settings_key(self.api))
+
+    def supports_info(self, type: str) -> bool:
+        return self.api.supports_info(type)
+
+    def supports_factor(self, factor: str, frequency: str = "D") -> bool:
+        return self.api.supports_factor(factor, frequency)
+
+    def supports_dualkey_factor(self, factor: str, frequency: str = "D") -> bool:
+        return self.api.supports_dualkey_factor(factor, frequency)
+
+    @property
+    def catch_all(self) -> bool:
+        return self.api.catch_all
+
+    def factor_coverage(self, factor: str, frequency: str = "D") -> Optional[Coverage]:
+        return self.api.factor_coverage(factor, frequency)
+
+    def get_info(self, type: str, **kwargs: Any) -> pd.DataFrame:
+        return self.api.get_info(type, **kwargs)
+
+    @staticmethod
+    def _to_long(data: pd.DataFrame, panel: bool) -> pd.DataFrame:
+        if data.empty or panel:
+            return data
+        # 转换为长格式
+        data = data.stack().reset_index(level=-1)
+        data.columns = ["attribute", "value"]
+        return data
+
+    def get_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取因子数据，已缓存的结果覆盖本次查询时直接从缓存中截取
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含因子数据的DataFrame，数据不可写
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        if isinstance(codes, str):
+            codes = [codes]
+        query = (
+            self._base_key("get_factor", frequency),
+            frozenset(factors),
+            frozenset(codes),
+            self._parse_time_param(start_time),
+            self._parse_time_param(end_time),
+        )
+        data = self.cache.get(*query)
+        if data is None:
+            data = self.api.get_factor(
+                factors, codes, start_time, end_time, frequency=frequency, panel=True
+            )
+            data = self.cache.put(*query, data)
+        return self._to_long(data, panel)
+
+    def get_dualkey_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        objects: Union[str, List[str]] = None,
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取双键因子数据，副键相同时可以从已缓存的结果中截取
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 主键代码，可以是单个字符串或字符串列表，（如客户号）
+            objects: 副键（如产品代码）
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频("D")
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含双键因子数据的DataFrame，数据不可写
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        if isinstance(codes, str):
+            codes = [codes]
+        if isinstance(objects, str):
+            objects = [objects]
+        base = self._base_key(
+            "get_dualkey_factor",
+            frequency,
+            tuple(sorted(objects)) if objects else None,
+        )
+        query = (
+            base,
+            frozenset(factors),
+            frozenset(codes),
+            self._parse_time_param(start_time),
+            self._parse_time_param(end_time),
+        )
+        data = self.cache.get(*query)
+        if data is None:
+            data = self.api.get_dualkey_factor(
+                factors,
+                codes,
+                objects,
+                start_time,
+                end_time,
+                frequency=frequency,
+                panel=True,
+            )
+            data = self.cache.put(*query, data)
+        return self._to_long(data, panel)
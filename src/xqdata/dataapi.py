@@ -2,12 +2,24 @@
 from __future__ import annotations
 
 import datetime
+import warnings
 from abc import ABCMeta, abstractmethod
 from importlib import import_module
-from typing import Any, List, Optional, Union
+from typing import Any, FrozenSet, List, NamedTuple, Optional, Union
 
 import pandas as pd
 
+# get_bars默认返回的行情字段
+BAR_FIELDS = ["open", "high", "low", "close", "volume", "total_turnover"]
+
+
+class Coverage(NamedTuple):
+    """数据源明确覆盖的因子数据范围，None表示该维度不受限制"""
+
+    codes: Optional[FrozenSet[str]] = None
+    start: Optional[pd.Timestamp] = None
+    end: Optional[pd.Timestamp] = None
+
 
 class DataApi(metaclass=ABCMeta):
     """
@@ -94,6 +106,180 @@ class DataApi(metaclass=ABCMeta):
         """
         pass
 
+    def get_cross_section(
+        self,
+        factors: Union[str, List[str]],
+        date: Union[str, datetime.datetime, datetime.date],
+        universe: Optional[Union[str, List[str]]] = None,
+    ) -> pd.DataFrame:
+        """
+        获取单日全截面因子数据
+
+        默认实现基于get_factor查询单日数据后去掉datetime层级，
+        具体的数据API可以重写此方法以使用全市场接口和缓存加速。
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            date: 截面日期
+            universe: 证券代码，可以是单个字符串或字符串列表，
+                None表示date当日处于上市状态的全部股票(get_info("stock"))
+
+        Returns:
+            以code为索引、因子为列的DataFrame，无法确定证券范围时为空DataFrame
+        """
+        date = self._parse_time_param(date)
+        if universe is None:
+            universe = self._listed_stocks(date)
+            if not universe:
+                warnings.warn(
+                    f"No listed stocks on {date.date()}. Return empty DataFrame."
+                )
+                return pd.DataFrame()
+        data = self.get_factor(
+            factors, universe, start_time=date, end_time=date, panel=True
+        )
+        if data.empty:
+            return data
+        data = data[data.index.get_level_values("datetime") == date]
+        return data.droplevel("datetime")
+
+    def _listed_stocks(self, date: datetime.datetime) -> List[str]:
+        """
+        date当日处于上市状态(上市日期<=date<退市日期)的股票代码，
+        证券列表没有上市或退市日期时不按该日期过滤，退市日期为空表示没有退市
+        """
+        if not self.supports_info("stock"):
+            return []
+        info = self.get_info("stock")
+        if info.empty or "code" not in info:
+            return []
+        listed = pd.Series(True, index=info.index)
+        if "listed_date" in info:
+            listed &= pd.to_datetime(info["listed_date"]) <= date
+        if "de_listed_date" in info:
+            de_listed = pd.to_datetime(info["de_listed_date"])
+            listed &= de_listed.isna() | (de_listed > date)
+        return info.loc[listed, "code"].tolist()
+
+    def get_tradedays(
+        self,
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+    ) -> pd.DatetimeIndex:
+        """
+        获取交易日历
+
+        默认实现基于"tradedays"信息(含is_tradeday列)，数据源不提供时退回工作日。
+
+        Args:
+            start_time: 开始日期
+            end_time: 结束日期
+
+        Returns:
+            区间内的交易日
+        """
+        start = self._parse_time_param(start_time)
+        end = self._parse_time_param(end_time)
+        data = pd.DataFrame()
+        if self.supports_info("tradedays"):
+            data = self.get_info("tradedays", start_date=start, end_date=end)
+        if data.empty or "is_tradeday" not in data.columns:
+            if start is None or end is None:
+                raise ValueError(
+                    "start_time and end_time are required without a calendar"
+                )
+            return pd.bdate_range(start, end, name="datetime")
+        days = pd.DatetimeIndex(data.index[data["is_tradeday"].astype(bool)])
+        if start is not None:
+            days = days[days >= start]
+        if end is not None:
+            days = days[days <= end]
+        return days
+
+    def get_bars(
+        self,
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        frequency: str = "D",
+        fields: Optional[List[str]] = None,
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取K线行情
+
+        Args:
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频
+            fields: 行情字段，默认为BAR_FIELDS(开高低收、成交量、成交额)
+            panel: 是否返回面板数据格式
+
+        Returns:
+            以(datetime, code)为索引的行情DataFrame
+        """
+        return self.get_factor(
+            fields or BAR_FIELDS, codes, start_time, end_time, frequency, panel
+        )
+
+    def supports_factor(self, factor: str, frequency: str = "D") -> bool:
+        """
+        是否能提供该因子，供FederatedDataApi路由使用，默认认为都能提供
+
+        Args:
+            factor: 因子名称
+            frequency: 数据频率
+
+        Returns:
+            能提供时返回True
+        """
+        return True
+
+    def supports_dualkey_factor(self, factor: str, frequency: str = "D") -> bool:
+        """
+        是否能提供该双键因子，供FederatedDataApi路由使用，默认与supports_factor一致
+
+        Args:
+            factor: 因子名称
+            frequency: 数据频率
+
+        Returns:
+            能提供时返回True
+        """
+        return self.supports_factor(factor, frequency)
+
+    # 是否声称能提供任意因子(如Mock)；FederatedDataApi不会自动用这样的数据源补齐
+    # 其他数据源缺失的数据，除非为该因子显式指定
+    catch_all = False
+
+    def factor_coverage(self, factor: str, frequency: str = "D") -> Optional[Coverage]:
+        """
+        明确覆盖的证券和日期范围，供FederatedDataApi判断哪些部分需要交给后面的数据源
+
+        范围之内没有返回的数据视为确实缺失(停牌、未上市等)，不会被补齐。
+
+        Args:
+            factor: 因子名称
+            frequency: 数据频率
+
+        Returns:
+            覆盖范围，默认为None，表示覆盖请求的全部证券和日期
+        """
+        return None
+
+    def supports_info(self, type: str) -> bool:
+        """
+        是否能提供该类型的基础信息，供FederatedDataApi路由使用，默认认为都能提供
+
+        Args:
+            type: 信息类型
+
+        Returns:
+            能提供时返回True
+        """
+        return True
+
     # 可以考虑实现一些通用的辅助方法作为非抽象方法
     def _parse_time_param(
         self, time_param: Optional[Union[str, datetime.datetime, datetime.date]]
@@ -114,8 +300,8 @@ class DataApi(metaclass=ABCMeta):
         return pd.to_datetime(time_param)
 
 
-# TODO: 实现get_bars和get_tradedays等快捷方法
-# 当这些方法需要被所有实现类支持时，可以取消注释并添加到抽象接口中
+# 需要可选依赖的数据源 -> 安装依赖的extra名称，缺少依赖时报错而不是退回Mock
+OPTIONAL_EXTRAS = {"local": "local", "remote": "local"}
 
 
 def get_dataapi(api: str = "mock") -> DataApi:
@@ -123,14 +309,24 @@ def get_dataapi(api: str = "mock") -> DataApi:
     获取数据API实例的工厂函数
 
     Args:
-        api: API名称，默认为"mock"
+        api: API名称，默认为"mock"；用"+"连接多个名称(如"local+rq+mock")时
+            返回按顺序路由的FederatedDataApi
 
     Returns:
         DataApi实例
     """
+    if "+" in api:
+        from xqdata.federated import FederatedDataApi
+
+        return FederatedDataApi([get_dataapi(name) for name in api.split("+")])
     try:
         dataapi: DataApi = import_module(f"xqdata.{api}").instance
-    except ModuleNotFoundError:
+    except ModuleNotFoundError as e:
+        if api in OPTIONAL_EXTRAS and e.name != f"xqdata.{api}":
+            raise ImportError(
+                f"Data API '{api}' requires '{e.name}'. "
+                f"Install it with: pip install xqdata[{OPTIONAL_EXTRAS[api]}]"
+            ) from e
         dataapi: DataApi = import_module("xqdata.mock").instance
 
     return dataapi
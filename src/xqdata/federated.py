@@ -0,0 +1,316 @@
+import datetime
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from xqdata.dataapi import Coverage, DataApi
+
+
+class _Task(NamedTuple):
+    """交给数据源的子查询：一个因子在一组证券、一个时间区间上的数据"""
+
+    factor: str
+    codes: Optional[Tuple[str, ...]]
+    start: Optional[pd.Timestamp]
+    end: Optional[pd.Timestamp]
+    # 从第几个数据源开始查找
+    backend: int
+    # 是否是为前面的数据源补齐缺失部分的子查询
+    backfill: bool = False
+
+
+class FederatedDataApi(DataApi):
+    """
+    组合多个数据源的数据API
+
+    backends按成本从低到高排列(例如本地存储、RQData、Mock)。每个因子/信息类型
+    路由到第一个能提供它的数据源，各数据源的子查询并发执行，结果按共同的
+    (datetime, code[, object])索引拼接。某个数据源没有返回的因子，以及超出它明确覆盖
+    范围(factor_coverage)的证券和日期，依次交给后面的数据源补齐；覆盖范围之内缺失的值
+    (停牌、未上市等)不会被补齐。声称能提供任意因子的数据源(catch_all，如Mock)
+    不参与自动补齐，除非在backfill中为该因子显式指定。
+    """
+
+    def __init__(
+        self,
+        backends: List[DataApi],
+        max_workers: Optional[int] = None,
+        backfill: Optional[Dict[str, List[DataApi]]] = None,
+    ):
+        """
+        Args:
+            backends: 数据源列表，越靠前优先级越高
+            max_workers: 并发查询的最大线程数，默认为数据源数量
+            backfill: 因子名称 -> 允许为该因子补齐缺失部分的catch_all数据源
+        """
+        if not backends:
+            raise ValueError("FederatedDataApi requires at least one backend")
+        self.backends = list(backends)
+        self.max_workers = max_workers or len(self.backends)
+        self.backfill = {k: list(v) for k, v in (backfill or {}).items()}
+
+    def auth(self, *args: Any, **kwargs: Any) -> None:
+        """
+        将认证参数转发给所有数据源；各数据源认证方式不同时，应在组合前分别认证
+        """
+        for backend in self.backends:
+            backend.auth(*args, **kwargs)
+
+    def supports_info(self, type: str) -> bool:
+        return any(backend.supports_info(type) for backend in self.backends)
+
+    def supports_factor(self, factor: str, frequency: str = "D") -> bool:
+        return any(
+            backend.supports_factor(factor, frequency) for backend in self.backends
+        )
+
+    def supports_dualkey_factor(self, factor: str, frequency: str = "D") -> bool:
+        return any(
+            backend.supports_dualkey_factor(factor, frequency)
+            for backend in self.backends
+        )
+
+    def get_info(self, type: str, **kwargs: Any) -> pd.DataFrame:
+        """
+        按顺序从第一个能提供该类型且返回数据的数据源获取基础信息
+
+        Args:
+            type: 信息类型，字符串
+            **kwargs: 查询参数
+
+        Returns:
+            包含所需信息的DataFrame，如果获取失败则返回空DataFrame
+        """
+        for backend in self.backends:
+            if not backend.supports_info(type):
+                continue
+            data = backend.get_info(type, **kwargs)
+            if data is not None and not data.empty:
+                return data
+        warnings.warn(
+            f"No backend provides info type '{type}'. Return empty DataFrame."
+        )
+        return pd.DataFrame()
+
+    def _route(self, tasks: List[_Task], frequency: str, supports: str):
+        """将每个子查询分配给第一个尚未尝试过且能提供该因子的数据源，无法分配的被丢弃"""
+        routes = {}
+        for task in tasks:
+            for i in range(task.backend, len(self.backends)):
+                backend = self.backends[i]
+                if (
+                    task.backfill
+                    and backend.catch_all
+                    and not any(
+                        b is backend for b in self.backfill.get(task.factor, ())
+                    )
+                ):
+                    continue
+                if getattr(backend, supports)(task.factor, frequency):
+                    key = (i, task.codes, task.start, task.end, task.backfill)
+                    routes.setdefault(key, []).append(task.factor)
+                    break
+        return routes
+
+    @staticmethod
+    def _gaps(task: _Task, coverage: Optional[Coverage]) -> List[_Task]:
+        """
+        超出数据源明确覆盖范围的部分，作为新的子查询交给后面的数据源
+
+        包括覆盖范围之外的证券，以及覆盖的日期区间之前和之后的日期
+        (例如本地数据仓库尚未更新到最新)。
+        """
+        if coverage is None:
+            return []
+        gaps = []
+        following = task._replace(backend=task.backend + 1, backfill=True)
+        if coverage.codes is not None and task.codes is not None:
+            missing = tuple(c for c in task.codes if c not in coverage.codes)
+            if missing:
+                gaps.append(following._replace(codes=missing))
+        one_day = pd.Timedelta(days=1)
+        if coverage.start is not None and (
+            task.start is None or task.start < coverage.start
+        ):
+            end = coverage.start - one_day
+            if task.end is not None:
+                end = min(end, task.end)
+            gaps.append(following._replace(end=end))
+        if coverage.end is not None and (task.end is None or task.end > coverage.end):
+            # 覆盖到某一天时包含当天全部的日内数据
+            start = coverage.end.normalize() + one_day
+            if task.start is not None:
+                start = max(start, task.start)
+            if task.end is None or start <= task.end:
+                gaps.append(following._replace(start=start))
+        return gaps
+
+    def _fetch(
+        self,
+        factors: List[str],
+        codes: Optional[List[str]],
+        start_time,
+        end_time,
+        frequency: str,
+        query,
+        supports: str = "supports_factor",
+    ) -> pd.DataFrame:
+        """
+        并发执行各数据源的子查询，并将未返回的因子、证券和日期交给后面的数据源
+
+        Args:
+            factors: 因子名称列表
+            codes: 证券代码列表
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率
+            query: 参数为(数据源, 因子列表, 证券代码, 开始时间, 结束时间)、
+                返回面板格式DataFrame的函数
+            supports: 判断数据源能否提供因子的方法名
+
+        Returns:
+            按索引拼接后的面板格式DataFrame
+        """
+        start = None if start_time is None else pd.Timestamp(start_time)
+        end = None if end_time is None else pd.Timestamp(end_time)
+        codes = None if codes is None else tuple(codes)
+        tasks = [_Task(f, codes, start, end, 0) for f in dict.fromkeys(factors)]
+        pieces: Dict[str, List[pd.Series]] = {}
+
+        def run(item):
+            (i, task_codes, task_start, task_end, _), group = item
+            try:
+                return query(
+                    self.backends[i],
+                    group,
+                    None if task_codes is None else list(task_codes),
+                    task_start,
+                    task_end,
+                )
+            except Exception as e:
+                warnings.warn(f"Error fetching factors {group}: {str(e)}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while tasks:
+                routes = self._route(tasks, frequency, supports)
+                results = pool.map(run, routes.items())
+                tasks = []
+                for (key, group), data in zip(routes.items(), results):
+                    i, task_codes, task_start, task_end, backfill = key
+                    for factor in group:
+                        task = _Task(
+                            factor, task_codes, task_start, task_end, i, backfill
+                        )
+                        if data is None or data.empty or factor not in data.columns:
+                            # 数据源没有返回该因子，整个子查询交给后面的数据源
+                            tasks.append(task._replace(backend=i + 1, backfill=True))
+                            continue
+                        # 缺失值是数据源给出的结果，不再向后面的数据源请求
+                        pieces.setdefault(factor, []).append(data[factor])
+                        coverage = self.backends[i].factor_coverage(factor, frequency)
+                        tasks += self._gaps(task, coverage)
+
+        if not pieces:
+            return pd.DataFrame()
+        columns = {}
+        for factor in dict.fromkeys(factors):
+            if factor in pieces:
+                values = pd.concat(pieces[factor])
+                columns[factor] = values[~values.index.duplicated()]
+        return pd.concat(columns, axis=1).sort_index()
+
+    @staticmethod
+    def _to_long(data: pd.DataFrame, panel: bool) -> pd.DataFrame:
+        if data.empty or panel:
+            return data
+        # 转换为长格式
+        data = data.stack().reset_index(level=-1)
+        data.columns = ["attribute", "value"]
+        return data
+
+    def get_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取因子数据，各因子路由到最先能提供它的数据源
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含因子数据的DataFrame
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+
+        if isinstance(codes, str):
+            codes = [codes]
+
+        def query(backend, group, codes, start, end):
+            return backend.get_factor(
+                group, codes, start, end, frequency=frequency, panel=True
+            )
+
+        data = self._fetch(factors, codes, start_time, end_time, frequency, query)
+        return self._to_long(data, panel)
+
+    def get_dualkey_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        objects: Union[str, List[str]] = None,
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取双键因子数据，各因子路由到最先能提供它的数据源
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 主键代码，可以是单个字符串或字符串列表，（如客户号）
+            objects: 副键（如产品代码）
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频("D")
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含双键因子数据的DataFrame
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+
+        if isinstance(codes, str):
+            codes = [codes]
+
+        def query(backend, group, codes, start, end):
+            return backend.get_dualkey_factor(
+                group, codes, objects, start, end, frequency=frequency, panel=True
+            )
+
+        data = self._fetch(
+            factors,
+            codes,
+            start_time,
+            end_time,
+            frequency,
+            query,
+            supports="supports_dualkey_factor",
+        )
+        return self._to_long(data, panel)
@@ -0,0 +1,227 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 过滤条件的后缀运算符，例如 listed_date__lt="2020-01-01"
+FILTER_OPERATORS = ("eq", "ne", "in", "lt", "le", "gt", "ge")
+
+_RANGE_OPERATORS = {"lt", "le", "gt", "ge"}
+
+
+def parse_filters(**kwargs: Any) -> List[Tuple[str, str, Any]]:
+    """
+    将get_info的关键字参数解析为过滤条件
+
+    - column=标量: 相等
+    - column=列表/元组/集合: 属于其中之一
+    - column=slice(a, b): a <= 值 <= b，任一端为None表示不限
+    - column__op=值: op为eq、ne、in、lt、le、gt、ge之一
+
+    Args:
+        **kwargs: 过滤条件
+
+    Returns:
+        [(列名, 运算符, 值), ...]，slice会被拆成ge和le两个条件
+    """
+    filters = []
+    for key, value in kwargs.items():
+        column, sep, op = key.rpartition("__")
+        if not sep or op not in FILTER_OPERATORS:
+            column, op = key, None
+        if op is None:
+            if isinstance(value, slice):
+                if value.start is not None:
+                    filters.append((column, "ge", value.start))
+                if value.stop is not None:
+                    filters.append((column, "le", value.stop))
+                continue
+            op = "in" if isinstance(value, (list, tuple, set, frozenset)) else "eq"
+        if op == "in":
+            value = list(value)
+        filters.append((column, op, value))
+    return filters
+
+
+def _coerce(values: pd.Series, value: Any) -> Any:
+    """将过滤值转换为与列相同的类型，例如日期字符串转为Timestamp"""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        if isinstance(value, list):
+            return [pd.Timestamp(v) for v in value]
+        return pd.Timestamp(value)
+    return value
+
+
+def _mask(values: pd.Series, op: str, value: Any) -> np.ndarray:
+    """逐行比较得到布尔掩码，用于没有索引可用的条件"""
+    if op == "eq":
+        mask = values == value
+    elif op == "ne":
+        mask = values != value
+    elif op == "in":
+        mask = values.isin(value)
+    elif op == "lt":
+        mask = values < value
+    elif op == "le":
+        mask = values <= value
+    elif op == "gt":
+        mask = values > value
+    else:
+        mask = values >= value
+    return mask.to_numpy(dtype=bool)
+
+
+def filter_frame(data: pd.DataFrame, **kwargs: Any) -> pd.DataFrame:
+    """
+    按parse_filters的语义向量化地过滤DataFrame，适用于只查询一次的表
+
+    Args:
+        data: 待过滤的DataFrame
+        **kwargs: 过滤条件
+
+    Returns:
+        过滤后的DataFrame
+    """
+    mask = np.ones(len(data), dtype=bool)
+    for column, op, value in parse_filters(**kwargs):
+        if column not in data.columns:
+            raise KeyError(f"Unknown filter column '{column}'")
+        values = data[column]
+        mask &= _mask(values, op, _coerce(values, value))
+    return data[mask]
+
+
+def _cache_key(filters: List[Tuple[str, str, Any]]) -> Optional[tuple]:
+    key = []
+    for column, op, value in filters:
+        if isinstance(value, list):
+            value = tuple(value)
+        try:
+            hash(value)
+        except TypeError:
+            return None
+        key.append((column, op, value))
+    return tuple(sorted(key, key=repr))
+
+
+class IndexedTable:
+    """
+    带索引的基础信息表，重复查询时不再扫描整表
+
+    查询某列时按需建立索引：相等/属于条件使用哈希索引(值 -> 行号)，
+    范围条件使用排序索引(二分查找)；多个条件的结果按行号求交集。
+    相同条件的查询结果(行号)会被缓存。
+    """
+
+    def __init__(self, data: pd.DataFrame, cache_size: int = 256):
+        """
+        Args:
+            data: 基础信息表
+            cache_size: 缓存的查询结果数量
+        """
+        self.data = data
+        self._lock = threading.Lock()
+        self._hash: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._cache_size = cache_size
+
+    def _hash_index(self, column: str) -> Dict[Any, np.ndarray]:
+        index = self._hash.get(column)
+        if index is None:
+            index = self.data.groupby(column, sort=False, observed=True).indices
+            self._hash[column] = index
+        return index
+
+    def _sorted_index(self, column: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """数值和日期列的排序索引，其余类型返回None(退回逐行比较)"""
+        if column in self._sorted:
+            return self._sorted[column]
+        values = self.data[column]
+        dtype = values.dtype
+        if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_dtype(
+            dtype
+        ):
+            # 空值不满足任何比较，不放入索引
+            order = np.flatnonzero(values.notna().to_numpy())
+            array = values.to_numpy()[order]
+            sort = np.argsort(array, kind="stable")
+            index = (array[sort], order[sort])
+        else:
+            index = None
+        self._sorted[column] = index
+        return index
+
+    def _positions(self, column: str, op: str, value: Any) -> np.ndarray:
+        """单个条件命中的行号(有序)"""
+        if column not in self.data.columns:
+            raise KeyError(f"Unknown filter column '{column}'")
+        value = _coerce(self.data[column], value)
+        if op in ("eq", "in"):
+            index = self._hash_index(column)
+            keys = [value] if op == "eq" else value
+            parts = [index[k] for k in keys if k in index]
+            if not parts:
+                return np.empty(0, dtype=np.intp)
+            return np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+        if op in _RANGE_OPERATORS:
+            index = self._sorted_index(column)
+            if index is not None:
+                values, order = index
+                if isinstance(value, pd.Timestamp):
+                    value = value.to_datetime64()
+                side = "left" if op in ("lt", "ge") else "right"
+                split = np.searchsorted(values, value, side=side)
+                hits = order[:split] if op in ("lt", "le") else order[split:]
+                return np.sort(hits)
+        return np.flatnonzero(_mask(self.data[column], op, value))
+
+    def positions(self, **kwargs: Any) -> np.ndarray:
+        """
+        返回满足全部条件的行号
+
+        Args:
+            **kwargs: 过滤条件，语义同parse_filters
+
+        Returns:
+            有序的行号数组
+        """
+        filters = parse_filters(**kwargs)
+        key = _cache_key(filters)
+        if key is not None:
+            hit = self._cache.get(key)
+            if hit is not None:
+                return hit
+
+        with self._lock:
+            result = None
+            for column, op, value in filters:
+                hits = self._positions(column, op, value)
+                if result is not None:
+                    hits = np.intersect1d(result, hits, assume_unique=True)
+                result = hits
+                if not len(result):
+                    break
+            if result is None:
+                result = np.arange(len(self.data))
+            if key is not None:
+                self._cache[key] = result
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def query(self, **kwargs: Any) -> pd.DataFrame:
+        """
+        返回满足全部条件的行
+
+        Args:
+            **kwargs: 过滤条件，语义同parse_filters
+
+        Returns:
+            过滤后的DataFrame，保持原有的行顺序
+        """
+        if not kwargs:
+            return self.data.copy()
+        return self.data.iloc[self.positions(**kwargs)]
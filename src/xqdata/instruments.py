@@ -0,0 +1,165 @@
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# 整数索引中的层级名称
+TIMESTAMP_LEVEL = "timestamp"
+CODE_ID_LEVEL = "code_id"
+
+
+class InstrumentDictionary:
+    """
+    证券代码与int32 id的双向映射
+
+    id按加入的批次分配，每批内按代码排序；已分配的id不会改变，
+    因此用同一份全市场证券列表初始化的进程得到相同的id。未知的代码在首次使用时
+    追加分配。查找基于pandas Index的哈希表，映射表整体替换(写时复制)，可并发读取。
+    """
+
+    def __init__(self, codes: Iterable[str] = ()):
+        """
+        Args:
+            codes: 初始的证券代码
+        """
+        self._lock = threading.Lock()
+        self._codes = pd.Index([], dtype=object)
+        self.update(codes)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._codes
+
+    def update(self, codes: Iterable[str]):
+        """
+        为尚未分配id的证券分配id(按代码排序)，已有证券的id不变
+
+        Args:
+            codes: 证券代码
+        """
+        codes = pd.Index(list(codes), dtype=object).unique()
+        with self._lock:
+            new = codes[self._codes.get_indexer(codes) < 0]
+            if len(new) == 0:
+                return
+            if len(self._codes) + len(new) > np.iinfo(np.int32).max:
+                raise OverflowError("Too many instruments for int32 ids")
+            self._codes = self._codes.append(new.sort_values())
+
+    def ids(self, codes: Iterable[str], intern: bool = True) -> np.ndarray:
+        """
+        证券代码 -> id
+
+        Args:
+            codes: 证券代码
+            intern: 是否为未知的代码分配新的id，否则未知代码的id为-1
+
+        Returns:
+            int32数组
+        """
+        codes = pd.Index(codes, dtype=object)
+        ids = self._codes.get_indexer_for(codes)
+        if intern and (ids < 0).any():
+            self.update(codes[ids < 0])
+            ids = self._codes.get_indexer_for(codes)
+        return ids.astype(np.int32)
+
+    def codes(self, ids: Iterable[int]) -> np.ndarray:
+        """
+        id -> 证券代码
+
+        Args:
+            ids: id
+
+        Returns:
+            证券代码的object数组
+        """
+        ids = np.asarray(ids)
+        table = self._codes.to_numpy()
+        if len(ids) and (ids.min() < 0 or ids.max() >= len(table)):
+            raise KeyError("Unknown instrument id")
+        return table[ids]
+
+
+_default = InstrumentDictionary()
+
+
+def default_dictionary() -> InstrumentDictionary:
+    """进程内共享的证券字典，不同数据源的结果使用相同的id"""
+    return _default
+
+
+def _convert_index(index: pd.Index, convert) -> pd.Index:
+    if isinstance(index, pd.MultiIndex):
+        levels, names = [], []
+        for level, name in zip(index.levels, index.names):
+            level, name = convert(level, name)
+            levels.append(level)
+            names.append(name)
+        # 只转换各层级的取值表，不逐行处理
+        return pd.MultiIndex(
+            levels=levels, codes=index.codes, names=names, verify_integrity=False
+        )
+    level, name = convert(index, index.name)
+    return level.rename(name)
+
+
+def to_int_index(
+    data: pd.DataFrame, dictionary: Optional[InstrumentDictionary] = None
+) -> pd.DataFrame:
+    """
+    将(datetime, code)索引转换为(int64纳秒时间戳, int32证券id)索引
+
+    层级名称相应改为timestamp和code_id，其余层级不变；
+    大表之间的join和groupby因此成为整数运算。
+
+    Args:
+        data: 以datetime和/或code层级为索引的DataFrame
+        dictionary: 证券字典，默认为进程内共享的字典
+
+    Returns:
+        索引转换后的DataFrame(数据不复制)
+    """
+    dictionary = dictionary or default_dictionary()
+
+    def convert(level: pd.Index, name):
+        if name == "datetime":
+            return pd.Index(pd.DatetimeIndex(level).asi8), TIMESTAMP_LEVEL
+        if name == "code":
+            return pd.Index(dictionary.ids(level)), CODE_ID_LEVEL
+        return level, name
+
+    data = data.copy(deep=False)
+    data.index = _convert_index(data.index, convert)
+    return data
+
+
+def from_int_index(
+    data: pd.DataFrame, dictionary: Optional[InstrumentDictionary] = None
+) -> pd.DataFrame:
+    """
+    to_int_index的逆转换：(timestamp, code_id)索引转换回(datetime, code)
+
+    Args:
+        data: 以timestamp和/或code_id层级为索引的DataFrame
+        dictionary: 证券字典，默认为进程内共享的字典
+
+    Returns:
+        索引转换后的DataFrame(数据不复制)
+    """
+    dictionary = dictionary or default_dictionary()
+
+    def convert(level: pd.Index, name):
+        if name == TIMESTAMP_LEVEL:
+            values = np.asarray(level, dtype=np.int64).view("datetime64[ns]")
+            return pd.DatetimeIndex(values), "datetime"
+        if name == CODE_ID_LEVEL:
+            return pd.Index(dictionary.codes(level), dtype=object), "code"
+        return level, name
+
+    data = data.copy(deep=False)
+    data.index = _convert_index(data.index, convert)
+    return data
@@ -0,0 +1,4 @@
+from .api import LocalDataApi
+
+# 创建单例实例
+instance = LocalDataApi()
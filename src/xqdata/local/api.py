@@ -0,0 +1,340 @@
+import os
+import threading
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from xqdata.dataapi import Coverage, DataApi
+from xqdata.filters import parse_filters
+from xqdata.storage import ParquetStore
+
+# 过滤运算符 -> pyarrow表达式
+_ARROW_OPERATORS = {
+    "eq": lambda field, value: field == value,
+    "ne": lambda field, value: field != value,
+    "in": lambda field, value: field.isin(value),
+    "lt": lambda field, value: field < value,
+    "le": lambda field, value: field <= value,
+    "gt": lambda field, value: field > value,
+    "ge": lambda field, value: field >= value,
+}
+
+
+class LocalDataApi(DataApi):
+    """
+    基于本地Parquet数据仓库的数据API
+
+    目录结构：
+        root/info/<type>.parquet                     基础信息表
+        root/factor/<frequency>/<table>/             因子数据集(ParquetStore)
+        root/dualkey/<frequency>/<table>/            双键因子数据集(ParquetStore)
+
+    一个数据集中可以保存多个因子列，查询时按因子所在的数据集分组，各数据集并发读取；
+    日期区间、证券列表和列投影下推到文件扫描，行组由pyarrow并行读取。
+    输出格式与RQDataApi一致。
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            root: 数据仓库根目录，默认读取环境变量XQDATA_LOCAL_ROOT，
+                未设置时为~/.xqdata/warehouse
+        """
+        self._lock = threading.Lock()
+        self._set_root(root)
+
+    def _set_root(self, root: Optional[Union[str, Path]]):
+        if root is None:
+            root = os.environ.get("XQDATA_LOCAL_ROOT", "~/.xqdata/warehouse")
+        self.root = Path(root).expanduser()
+        # (类型, 频率) -> {因子名称: 数据集}，数据集增删后需要重新扫描
+        self._tables: Dict[tuple, Dict[str, ParquetStore]] = {}
+        # 数据集目录 -> 已有数据的覆盖范围，数据集写入后重新扫描
+        self._coverage: Dict[str, Coverage] = {}
+
+    def auth(self, path: Optional[Union[str, Path]] = None, **kwargs: Any) -> None:
+        """
+        指定数据仓库根目录，本地数据源不需要认证
+
+        Args:
+            path: 数据仓库根目录，默认沿用当前目录
+        """
+        if path is not None:
+            self._set_root(path)
+
+    def _info_path(self, type: str) -> Path:
+        return self.root / "info" / f"{type}.parquet"
+
+    def _factor_tables(self, kind: str, frequency: str) -> Dict[str, ParquetStore]:
+        """扫描数据集目录，返回 因子名称 -> 数据集 的映射(结果会被缓存)"""
+        key = (kind, frequency)
+        tables = self._tables.get(key)
+        if tables is not None:
+            return tables
+        with self._lock:
+            tables = {}
+            base = self.root / kind / frequency
+            if base.is_dir():
+                for table_dir in sorted(base.iterdir()):
+                    store = ParquetStore(table_dir)
+                    if not store.exists():
+                        continue
+                    for column in store.columns:
+                        # 同一因子出现在多个数据集中时以先扫描到的为准
+                        tables.setdefault(column, store)
+            self._tables[key] = tables
+        return tables
+
+    def refresh(self):
+        """清空数据集扫描缓存，在外部程序修改数据仓库后调用"""
+        with self._lock:
+            self._tables = {}
+            self._coverage = {}
+
+    def supports_info(self, type: str) -> bool:
+        return self._info_path(type).exists()
+
+    def supports_factor(self, factor: str, frequency: str = "D") -> bool:
+        return factor in self._factor_tables("factor", frequency)
+
+    def supports_dualkey_factor(self, factor: str, frequency: str = "D") -> bool:
+        return factor in self._factor_tables("dualkey", frequency)
+
+    def factor_coverage(self, factor: str, frequency: str = "D") -> Optional[Coverage]:
+        """
+        因子所在数据集中已有的证券和日期范围，首次使用时扫描索引列(结果会被缓存)
+
+        Args:
+            factor: 因子名称
+            frequency: 数据频率
+
+        Returns:
+            覆盖范围，没有该因子时返回None
+        """
+        store = self._factor_tables("factor", frequency).get(factor)
+        if store is None:
+            return None
+        key = str(store.root)
+        coverage = self._coverage.get(key)
+        if coverage is None:
+            table = store.dataset().to_table(columns=["datetime", "code"])
+            if table.num_rows == 0:
+                coverage = Coverage(codes=frozenset())
+            else:
+                dates = pc.min_max(table["datetime"]).as_py()
+                coverage = Coverage(
+                    frozenset(pc.unique(table["code"]).to_pylist()),
+                    pd.Timestamp(dates["min"]),
+                    pd.Timestamp(dates["max"]),
+                )
+            with self._lock:
+                self._coverage[key] = coverage
+        return coverage
+
+    def get_info(self, type: str, **kwargs: Any) -> pd.DataFrame:
+        """
+        获取基础信息数据
+
+        Args:
+            type: 信息类型，字符串
+            **kwargs: 列过滤条件，会被下推到文件扫描，语义见xqdata.filters.parse_filters
+
+        Returns:
+            包含所需信息的DataFrame，如果获取失败则返回空DataFrame
+        """
+        path = self._info_path(type)
+        if not path.exists():
+            warnings.warn(
+                f"No local data for info type '{type}'. Return empty DataFrame."
+            )
+            return pd.DataFrame()
+
+        try:
+            dataset = ds.dataset(path, format="parquet")
+            expr = ds.scalar(True)
+            for column, op, value in parse_filters(**kwargs):
+                field_type = dataset.schema.field(column).type
+                if pa.types.is_timestamp(field_type):
+                    # 日期字符串转为与列相同类型的时间戳
+                    if op == "in":
+                        value = [pa.scalar(pd.Timestamp(v), field_type) for v in value]
+                    else:
+                        value = pa.scalar(pd.Timestamp(value), field_type)
+                expr &= _ARROW_OPERATORS[op](ds.field(column), value)
+            table = dataset.to_table(filter=expr)
+        except (KeyError, pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            warnings.warn(f"Error fetching info type '{type}': {str(e)}")
+            return pd.DataFrame()
+        return table.to_pandas()
+
+    def _read(
+        self,
+        kind: str,
+        factors: List[str],
+        codes: List[str],
+        start_time,
+        end_time,
+        frequency: str,
+        filter: Optional[ds.Expression] = None,
+    ) -> pd.DataFrame:
+        """按数据集分组并发读取因子，并按索引拼接"""
+        tables = self._factor_tables(kind, frequency)
+        groups: Dict[ParquetStore, List[str]] = {}
+        for factor in factors:
+            store = tables.get(factor)
+            if store is None:
+                warnings.warn(f"No local data for factor '{factor}' ({frequency}).")
+                continue
+            groups.setdefault(store, []).append(factor)
+        if not groups:
+            return pd.DataFrame()
+
+        def fetch(item):
+            store, columns = item
+            try:
+                return store.read(
+                    columns=columns,
+                    codes=codes,
+                    start_time=start_time,
+                    end_time=end_time,
+                    filter=filter,
+                )
+            except Exception as e:
+                warnings.warn(f"Error fetching factors {columns}: {str(e)}")
+                return pd.DataFrame()
+
+        with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+            parts = [p for p in pool.map(fetch, groups.items()) if not p.empty]
+        if not parts:
+            return pd.DataFrame()
+        data = parts[0] if len(parts) == 1 else pd.concat(parts, axis=1).sort_index()
+        return data[[f for f in factors if f in data.columns]]
+
+    @staticmethod
+    def _format(data: pd.DataFrame, panel: bool) -> pd.DataFrame:
+        if data.empty or panel:
+            return data
+        # 转换为长格式
+        data = data.stack().reset_index(level=-1)
+        data.columns = ["attribute", "value"]
+        return data
+
+    def get_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取因子数据
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含因子数据的DataFrame
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        if isinstance(codes, str):
+            codes = [codes]
+        data = self._read("factor", factors, codes, start_time, end_time, frequency)
+        return self._format(data, panel)
+
+    def get_dualkey_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        objects: Union[str, List[str]] = None,
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取双键因子数据（例如持仓、基差等）
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 主键代码，可以是单个字符串或字符串列表，（如客户号）
+            objects: 副键（如产品代码），默认为全部
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频("D")
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含双键因子数据的DataFrame
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        if isinstance(codes, str):
+            codes = [codes]
+        if isinstance(objects, str):
+            objects = [objects]
+        filter = ds.field("object").isin(objects) if objects else None
+        data = self._read(
+            "dualkey", factors, codes, start_time, end_time, frequency, filter
+        )
+        return self._format(data, panel)
+
+    def write_info(self, type: str, data: pd.DataFrame):
+        """
+        原子地写入(覆盖)基础信息表
+
+        Args:
+            type: 信息类型
+            data: 基础信息DataFrame
+        """
+        path = self._info_path(type)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        pq.write_table(pa.Table.from_pandas(data, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+
+    def write_factor(
+        self,
+        data: pd.DataFrame,
+        table: str,
+        frequency: str = "D",
+        partition: str = "month",
+        key: Optional[str] = None,
+    ) -> ParquetStore:
+        """
+        将因子数据写入数据集，以(datetime, code, object)为索引的数据写入双键因子数据集
+
+        Args:
+            data: 以(datetime, code[, object])为索引的面板格式DataFrame
+            table: 数据集名称
+            frequency: 数据频率
+            partition: 新建数据集时的日期分区粒度
+            key: 分区内的文件名，指定时相同key的文件会被覆盖；默认与分区内已有的数据
+                合并，分多次写入同一分区(如按天追加到月分区)时不会丢失之前的数据
+
+        Returns:
+            写入的ParquetStore
+        """
+        kind = "dualkey" if "object" in data.index.names else "factor"
+        store = ParquetStore(self.root / kind / frequency / table, partition=partition)
+        store.write(data, key=key or "part", merge=key is None)
+        with self._lock:
+            self._tables.pop((kind, frequency), None)
+            self._coverage.pop(str(store.root), None)
+        return store
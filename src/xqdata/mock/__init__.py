@@ -1,12 +1,14 @@
 import random
 import warnings
 from datetime import datetime, timedelta
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 import numpy as np
 import pandas as pd
 
 from xqdata.dataapi import DataApi
+from xqdata.filters import filter_frame
+from xqdata.mock.synthetic import SYNTHETIC_FACTORS, SyntheticMarket
 
 
 class MockDataApi(DataApi):
@@ -14,11 +16,15 @@ class MockDataApi(DataApi):
     模拟数据API的实现
     """
 
+    # 任意因子都会生成模拟数据
+    catch_all = True
+
     def __init__(self):
         self._authenticated = True
         # 初始化模拟数据API连接等
         self._mock_info_schemas: Dict[str, Dict[str, str]] = {}
         self._mock_info_index: Dict[str, pd.Index] = {}
+        self.market: Optional[SyntheticMarket] = None
 
     def auth(self, *args, **kwargs) -> None:
         # 实现模拟数据API的认证逻辑
@@ -38,6 +44,22 @@ class MockDataApi(DataApi):
         if index is not None:
             self._mock_info_index[name] = index
 
+    def use_synthetic_market(
+        self, market: Optional[SyntheticMarket] = None, **kwargs
+    ) -> SyntheticMarket:
+        """
+        启用合成市场模式：日频的行情类因子、"stock"和"tradedays"信息由合成市场提供
+
+        Args:
+            market: 合成市场，默认按kwargs新建
+            **kwargs: 传给SyntheticMarket的参数(n_codes、start_time、end_time、seed等)
+
+        Returns:
+            使用的合成市场
+        """
+        self.market = market if market is not None else SyntheticMarket(**kwargs)
+        return self.market
+
     def _generate_mock_data(
         self, schema: Dict[str, str], index: pd.Index
     ) -> pd.DataFrame:
@@ -79,17 +101,32 @@ class MockDataApi(DataApi):
 
         return pd.DataFrame(data, index=index)
 
+    def supports_info(self, type: str) -> bool:
+        if self.market is not None and type in ("stock", "tradedays"):
+            return True
+        return type in self._mock_info_schemas
+
     def get_info(self, type: str, **kwargs) -> pd.DataFrame:
         """
         获取模拟的基础信息数据
 
         Args:
             type: 信息类型名称
-            **kwargs: 过滤条件，例如 listed_date>="2024-01-01"
+            **kwargs: 过滤条件，例如 listed_date__ge="2024-01-01"，
+                语义见xqdata.filters.parse_filters
 
         Returns:
-            符合要求的DataFrame
+            符合要求的DataFrame，过滤条件包含不存在的列时返回空DataFrame
         """
+        # 合成市场提供证券列表和交易日历，显式设置的schema优先
+        if self.market is not None and type not in self._mock_info_schemas:
+            if type == "stock":
+                return self._filter(type, self.market.instruments, **kwargs)
+            if type == "tradedays":
+                start = kwargs.pop("start_date", None)
+                end = kwargs.pop("end_date", None)
+                return self._filter(type, self.market.tradedays(start, end), **kwargs)
+
         # 检查是否设置了该类型的schema
         if type not in self._mock_info_schemas:
             # raise warning and return empty DataFrame
@@ -106,7 +143,18 @@ class MockDataApi(DataApi):
             index = pd.Index(np.arange(random.randint(30, 100)))
         df = self._generate_mock_data(schema, index)
 
-        return df
+        return self._filter(type, df, **kwargs)
+
+    @staticmethod
+    def _filter(type: str, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        """按过滤条件过滤，与RQDataApi一致，未知的过滤列警告并返回空DataFrame"""
+        try:
+            return filter_frame(data, **kwargs)
+        except KeyError as e:
+            warnings.warn(
+                f"Error fetching info type '{type}': {e}. Return empty DataFrame."
+            )
+            return pd.DataFrame()
 
     def get_factor(
         self,
@@ -138,6 +186,11 @@ class MockDataApi(DataApi):
         if isinstance(codes, str):
             codes = [codes]
 
+        if self.market is not None and frequency == "D":
+            return self._get_synthetic_factor(
+                factors, codes, start_time, end_time, panel
+            )
+
         # 设置默认时间范围
         if start_time is None:
             start_time = pd.Timestamp.now() - pd.Timedelta(days=365)
@@ -179,6 +232,33 @@ class MockDataApi(DataApi):
             df_result = df.set_index(["datetime", "code"])
             return df_result
 
+    def _get_synthetic_factor(
+        self, factors: List[str], codes: List[str], start_time, end_time, panel
+    ) -> pd.DataFrame:
+        """
+        从合成市场获取日频数据，合成市场不提供的因子按上市期间的交易日随机生成
+        """
+        synthetic = [f for f in factors if f in SYNTHETIC_FACTORS]
+        data = self.market.get_factor(
+            synthetic or ["close"], codes, start_time, end_time
+        )
+        if data.empty:
+            return data
+        if not synthetic:
+            data = data.drop(columns="close")
+        mean = random.uniform(-10, 10)
+        std = random.uniform(1, 5)
+        for factor in factors:
+            if factor not in SYNTHETIC_FACTORS:
+                data[factor] = np.random.normal(mean, std, size=len(data))
+        data = data[factors]
+        if panel:
+            return data
+        # 转换为长格式
+        data = data.stack().reset_index(level=-1)
+        data.columns = ["attribute", "value"]
+        return data
+
     def get_dualkey_factor(
         self,
         factors: Union[str, List[str]],
@@ -0,0 +1,380 @@
+import datetime
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# 合成行情可以提供的因子
+SYNTHETIC_FACTORS = [
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "total_turnover",
+    "prev_close",
+    "limit_up",
+    "limit_down",
+    "is_st",
+    "is_paused",
+    "industry",
+]
+
+INDUSTRIES = [
+    "银行",
+    "非银行金融",
+    "房地产",
+    "医药",
+    "食品饮料",
+    "电子",
+    "计算机",
+    "通信",
+    "机械",
+    "电力设备及新能源",
+    "汽车",
+    "基础化工",
+    "有色金属",
+    "钢铁",
+    "煤炭",
+    "石油石化",
+    "建筑",
+    "交通运输",
+    "传媒",
+    "商贸零售",
+]
+
+# 没有退市的证券的退市日期，与rq_all_instruments的约定一致
+NOT_DELISTED = pd.Timestamp("2100-01-01")
+
+
+def synthetic_calendar(
+    start_time: Union[str, datetime.datetime, datetime.date],
+    end_time: Union[str, datetime.datetime, datetime.date],
+) -> pd.DatetimeIndex:
+    """
+    合成的交易日历：工作日去掉元旦、春节(按2月上旬近似)、劳动节和国庆节假期
+
+    Args:
+        start_time: 开始日期
+        end_time: 结束日期
+
+    Returns:
+        区间内的交易日
+    """
+    days = pd.bdate_range(start_time, end_time, name="datetime")
+    month, day = days.month, days.day
+    holiday = (
+        ((month == 1) & (day == 1))
+        | ((month == 2) & (day <= 7))
+        | ((month == 5) & (day <= 3))
+        | ((month == 10) & (day <= 7))
+    )
+    return days[~holiday]
+
+
+def _spells(
+    starts_rng: np.random.Generator,
+    lengths_rng: np.random.Generator,
+    n: int,
+    rate: float,
+    mean_length: float,
+):
+    """以每日rate的概率开始、长度服从几何分布的区间，返回每天是否处于区间内"""
+    positions = np.arange(n)
+    starts = starts_rng.random(n) < rate
+    lengths = lengths_rng.geometric(1.0 / mean_length, size=n)
+    ends = np.where(starts, positions + lengths, 0)
+    return np.maximum.accumulate(ends) > positions
+
+
+class SyntheticMarket:
+    """
+    可复现的合成A股市场
+
+    包括交易日历、带上市和退市日期及行业的证券列表，以及每个证券的
+    几何随机游走日线行情(high/low与open/close一致、涨跌停限制、成交量)、
+    ST和停牌区间。每个证券的行情只由(seed, 证券序号)决定，按需逐块生成，
+    因此可以分块流式地读取 5000只证券 x 20年 的数据而不必整体放入内存，
+    同一证券在不同的分块方式和日期区间下得到相同的数据。
+    """
+
+    def __init__(
+        self,
+        n_codes: int = 5000,
+        start_time: Union[str, datetime.datetime, datetime.date] = "2005-01-01",
+        end_time: Union[str, datetime.datetime, datetime.date] = "2024-12-31",
+        seed: int = 0,
+        chunk_size: int = 200,
+    ):
+        """
+        Args:
+            n_codes: 证券数量
+            start_time: 行情的开始日期
+            end_time: 行情的结束日期
+            seed: 随机种子
+            chunk_size: iter_chunks每块默认包含的证券数量
+        """
+        self.n_codes = n_codes
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.calendar = synthetic_calendar(start_time, end_time)
+        # 全市场共同的收益率，所有证券按各自的beta暴露于它
+        rng = np.random.default_rng([seed, 0])
+        self._market = rng.normal(0.0002, 0.012, len(self.calendar))
+        self.instruments = self._make_instruments()
+        self._positions = pd.Series(
+            np.arange(n_codes), index=self.instruments["code"].to_numpy()
+        )
+        # 每个证券上市和退市在日历中的位置
+        self._first = self.calendar.searchsorted(self.instruments["listed_date"])
+        self._stop = self.calendar.searchsorted(self.instruments["de_listed_date"])
+
+    def _make_instruments(self) -> pd.DataFrame:
+        rng = np.random.default_rng([self.seed, 1])
+        n = self.n_codes
+        half = (n + 1) // 2
+        codes = [f"{600000 + i:06d}.XSHG" for i in range(half)] + [
+            f"{i + 1:06d}.XSHE" for i in range(n - half)
+        ]
+        first, last = self.calendar[0], self.calendar[-1]
+        # 约六成在行情开始前上市，其余在区间内陆续上市
+        before = rng.random(n) < 0.6
+        span = (last - first).days
+        offsets = rng.integers(0, max(span, 1), n)
+        listed = np.where(
+            before,
+            first - pd.to_timedelta(rng.integers(1, 15 * 365, n), unit="D"),
+            first + pd.to_timedelta(offsets, unit="D"),
+        )
+        listed = pd.DatetimeIndex(listed).normalize()
+        # 约一成在区间内退市，至少上市一年
+        delisted = rng.random(n) < 0.1
+        earliest = listed.where(listed > first, first) + pd.Timedelta(days=365)
+        remaining = np.maximum((last - earliest).days, 1)
+        de_listed = pd.DatetimeIndex(
+            earliest + pd.to_timedelta(rng.integers(0, remaining), unit="D")
+        ).normalize()
+        de_listed = de_listed.where(delisted & (earliest < last), NOT_DELISTED)
+        return pd.DataFrame(
+            {
+                "code": codes,
+                "symbol": [f"合成{i:04d}" for i in range(n)],
+                "exchange": [c[-4:] for c in codes],
+                "listed_date": listed,
+                "de_listed_date": de_listed,
+                "industry": np.asarray(INDUSTRIES, dtype=object)[
+                    rng.integers(0, len(INDUSTRIES), n)
+                ],
+            }
+        )
+
+    def tradedays(
+        self,
+        start_date: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_date: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+    ) -> pd.DataFrame:
+        """
+        与rq_get_trading_dates格式相同的交易日信息：按自然日索引、含is_tradeday列
+
+        Args:
+            start_date: 开始日期，默认为行情开始日期
+            end_date: 结束日期，默认为行情结束日期
+        """
+        start = pd.Timestamp(start_date) if start_date is not None else None
+        end = pd.Timestamp(end_date) if end_date is not None else None
+        days = self.calendar
+        if start is not None:
+            days = days[days >= start]
+        if end is not None:
+            days = days[days <= end]
+        if len(days) == 0:
+            return pd.DataFrame(columns=["is_tradeday"])
+        data = pd.DataFrame({"is_tradeday": 1.0}, index=days)
+        return data.resample("D").last().fillna(0)
+
+    def _simulate(self, position: int, stop: int) -> Dict[str, np.ndarray]:
+        """
+        生成一个证券从上市到第stop个交易日(不含)的行情
+
+        Returns:
+            因子名到数组的映射，另含"_start"为首个交易日在日历中的位置
+        """
+        start = int(self._first[position])
+        stop = min(stop, int(self._stop[position]))
+        n = max(stop - start, 0)
+
+        # 每个证券的每个变量各用一个独立的随机数流：数据与分块方式无关，
+        # 且生成到较早的stop时恰好是生成到较晚stop时的前缀
+        def stream(k: int) -> np.random.Generator:
+            return np.random.default_rng([self.seed, 2, position, k])
+
+        rng = stream(0)
+        beta = rng.uniform(0.6, 1.4)
+        vol = rng.uniform(0.01, 0.03)
+        issue_price = np.exp(rng.uniform(np.log(3), np.log(60)))
+        base_volume = np.exp(rng.uniform(np.log(2e5), np.log(2e7)))
+
+        st = _spells(stream(1), stream(2), n, 0.0003, 250)
+        paused = _spells(stream(3), stream(4), n, 0.002, 5)
+        limit = np.where(st, 0.05, 0.10)
+
+        log_ret = beta * self._market[start:stop] + stream(5).normal(0, vol, n)
+        ret = np.clip(np.expm1(log_ret), -limit, limit)
+        ret[paused] = 0.0
+        close = issue_price * np.cumprod(1 + ret)
+        prev_close = np.empty(n)
+        if n:
+            prev_close[0] = issue_price
+            prev_close[1:] = close[:-1]
+        limit_up = prev_close * (1 + limit)
+        limit_down = prev_close * (1 - limit)
+
+        gap = stream(6).normal(0, vol * 0.3, n)
+        open_ = np.clip(prev_close * np.exp(gap), limit_down, limit_up)
+        top = np.maximum(open_, close)
+        bottom = np.minimum(open_, close)
+        high = top * np.exp(np.abs(stream(7).normal(0, vol * 0.5, n)))
+        low = bottom * np.exp(-np.abs(stream(8).normal(0, vol * 0.5, n)))
+        high = np.maximum(np.minimum(high, limit_up), top)
+        low = np.minimum(np.maximum(low, limit_down), bottom)
+        for array in (open_, high, low):
+            array[paused] = prev_close[paused]
+        # 先在精确价格上保证大小关系，最后统一取整到分(取整是单调的，关系保持不变)
+        prices = [close, prev_close, limit_up, limit_down, open_, high, low]
+        close, prev_close, limit_up, limit_down, open_, high, low = (
+            np.round(p, 2) for p in prices
+        )
+
+        activity = 1 + 20 * np.abs(ret)
+        volume = np.round(base_volume * activity * stream(9).lognormal(0, 0.4, n), -2)
+        volume[paused] = 0
+        total_turnover = np.round(volume * (open_ + high + low + close) / 4, 2)
+
+        return {
+            "_start": start,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "total_turnover": total_turnover,
+            "prev_close": prev_close,
+            "limit_up": limit_up,
+            "limit_down": limit_down,
+            "is_st": st,
+            "is_paused": paused,
+            "industry": np.full(
+                n, self.instruments["industry"].iat[position], dtype=object
+            ),
+        }
+
+    def _frame(
+        self,
+        factors: List[str],
+        positions: np.ndarray,
+        start: int,
+        stop: int,
+    ) -> pd.DataFrame:
+        """生成一组证券在日历位置[start, stop)上的数据"""
+        codes = self.instruments["code"].to_numpy()
+        dates, code_values = [], []
+        columns: Dict[str, list] = {f: [] for f in factors}
+        for position in positions:
+            bars = self._simulate(int(position), stop)
+            first = bars["_start"]
+            skip = max(start - first, 0)
+            n = len(bars["close"]) - skip
+            if n <= 0:
+                continue
+            dates.append(self.calendar[first + skip : first + skip + n])
+            code_values.append(np.full(n, codes[position], dtype=object))
+            for factor in factors:
+                columns[factor].append(bars[factor][skip:])
+        if not dates:
+            return pd.DataFrame()
+        index = pd.MultiIndex.from_arrays(
+            [np.concatenate(dates), np.concatenate(code_values)],
+            names=["datetime", "code"],
+        )
+        data = pd.DataFrame(
+            {f: np.concatenate(v) for f, v in columns.items()}, index=index
+        )
+        return data.sort_index()
+
+    def _resolve(self, factors, codes, start_time, end_time):
+        if factors is None:
+            factors = list(SYNTHETIC_FACTORS)
+        elif isinstance(factors, str):
+            factors = [factors]
+        unknown = [f for f in factors if f not in SYNTHETIC_FACTORS]
+        if unknown:
+            raise ValueError(
+                f"Unknown synthetic factors {unknown}. Available: {SYNTHETIC_FACTORS}"
+            )
+        if codes is None:
+            positions = np.arange(self.n_codes)
+        else:
+            if isinstance(codes, str):
+                codes = [codes]
+            positions = self._positions.reindex(codes).dropna().to_numpy(dtype=int)
+        start = 0
+        stop = len(self.calendar)
+        if start_time is not None:
+            start = int(self.calendar.searchsorted(pd.Timestamp(start_time)))
+        if end_time is not None:
+            stop = int(self.calendar.searchsorted(pd.Timestamp(end_time), side="right"))
+        return factors, positions, start, stop
+
+    def get_factor(
+        self,
+        factors: Optional[Union[str, List[str]]] = None,
+        codes: Optional[Union[str, List[str]]] = None,
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+    ) -> pd.DataFrame:
+        """
+        获取合成的日线数据
+
+        Args:
+            factors: 因子名称，默认为全部SYNTHETIC_FACTORS
+            codes: 证券代码，默认为全部证券，未知的代码被忽略
+            start_time: 开始日期
+            end_time: 结束日期
+
+        Returns:
+            以(datetime, code)为索引的DataFrame，只包含上市期间的交易日
+        """
+        factors, positions, start, stop = self._resolve(
+            factors, codes, start_time, end_time
+        )
+        return self._frame(factors, positions, start, stop)
+
+    def iter_chunks(
+        self,
+        factors: Optional[Union[str, List[str]]] = None,
+        codes: Optional[Union[str, List[str]]] = None,
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        按证券分块逐块生成数据，内存中同时只有一块
+
+        Args:
+            factors: 因子名称，默认为全部SYNTHETIC_FACTORS
+            codes: 证券代码，默认为全部证券
+            start_time: 开始日期
+            end_time: 结束日期
+            chunk_size: 每块的证券数量，默认为构造时的chunk_size
+
+        Yields:
+            每块证券的DataFrame，格式同get_factor
+        """
+        factors, positions, start, stop = self._resolve(
+            factors, codes, start_time, end_time
+        )
+        chunk_size = chunk_size or self.chunk_size
+        for i in range(0, len(positions), chunk_size):
+            data = self._frame(factors, positions[i : i + chunk_size], start, stop)
+            if not data.empty:
+                yield data
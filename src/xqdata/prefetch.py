@@ -0,0 +1,282 @@
+import datetime
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from xqdata.dataapi import Coverage, DataApi
+
+Window = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+def split_windows(
+    start_time: Union[str, datetime.datetime, datetime.date],
+    end_time: Union[str, datetime.datetime, datetime.date],
+    period: str = "M",
+) -> List[Window]:
+    """
+    将日期区间按日历周期切分为连续的窗口
+
+    Args:
+        start_time: 开始日期
+        end_time: 结束日期
+        period: pandas周期，默认"M"(按月)
+
+    Returns:
+        [(窗口开始, 窗口结束), ...]，首尾窗口裁剪到给定区间
+    """
+    start, end = pd.Timestamp(start_time), pd.Timestamp(end_time)
+    windows = []
+    for p in pd.period_range(start, end, freq=period):
+        windows.append((max(p.start_time, start), min(p.end_time.normalize(), end)))
+    return windows
+
+
+def next_window(start: pd.Timestamp, end: pd.Timestamp) -> Window:
+    """
+    推测顺序访问时的下一个窗口：整月窗口按相同月数后移，其余按相同天数后移
+    """
+    next_start = end.normalize() + pd.Timedelta(days=1)
+    if start.is_month_start and end.is_month_end:
+        months = (end.year - start.year) * 12 + end.month - start.month + 1
+        return next_start, next_start + pd.DateOffset(months=months) - pd.Timedelta(
+            days=1
+        )
+    return next_start, next_start + (end - start)
+
+
+def _nbytes(future: Future) -> int:
+    """已完成的预取结果占用的内存，未完成或失败时为0"""
+    if not future.done() or future.exception() is not None:
+        return 0
+    return int(future.result().memory_usage(deep=True, index=True).sum())
+
+
+def iter_windows(
+    api: DataApi,
+    factors: Union[str, List[str]],
+    codes: Union[str, List[str]],
+    start_time: Union[str, datetime.datetime, datetime.date],
+    end_time: Union[str, datetime.datetime, datetime.date],
+    period: str = "M",
+    ahead: int = 1,
+    max_bytes: Optional[int] = None,
+    **kwargs: Any,
+) -> Iterator[Tuple[pd.Timestamp, pd.Timestamp, pd.DataFrame]]:
+    """
+    按窗口顺序获取因子数据，在调用方处理当前窗口时于后台线程预取后续窗口
+
+    Args:
+        api: 数据API
+        factors: 因子名称，可以是单个字符串或字符串列表
+        codes: 证券代码，可以是单个字符串或字符串列表
+        start_time: 开始日期
+        end_time: 结束日期
+        period: 窗口的日历周期，默认"M"(按月)
+        ahead: 最多预取的窗口数量
+        max_bytes: 已取回但尚未被消费的预取结果的内存上限，超过时暂停预取
+        **kwargs: 传给get_factor的其他参数(frequency等)
+
+    Yields:
+        (窗口开始, 窗口结束, 数据)
+    """
+    windows = split_windows(start_time, end_time, period)
+    pending = deque()
+    position = 0
+
+    with ThreadPoolExecutor(max_workers=max(ahead, 1)) as pool:
+
+        def fill():
+            nonlocal position
+            while position < len(windows) and len(pending) <= ahead:
+                if pending and max_bytes is not None:
+                    if sum(_nbytes(f) for _, _, f in pending) > max_bytes:
+                        break
+                start, end = windows[position]
+                future = pool.submit(
+                    api.get_factor, factors, codes, start, end, **kwargs
+                )
+                pending.append((start, end, future))
+                position += 1
+
+        try:
+            while pending or position < len(windows):
+                fill()
+                start, end, future = pending.popleft()
+                data = future.result()
+                # 先提交后续窗口，使其与调用方对当前窗口的处理重叠
+                fill()
+                yield start, end, data
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+
+class PrefetchingDataApi(DataApi):
+    """
+    带顺序预读的数据API包装
+
+    检测到get_factor以相同的因子、证券和频率按连续的日期窗口被调用时
+    (或assume_sequential为True时从第一次调用起)，在后台线程中预取之后ahead个窗口；
+    调用到已预取的窗口时直接返回结果，网络等待与调用方的计算重叠。
+    """
+
+    def __init__(
+        self,
+        api: DataApi,
+        ahead: int = 1,
+        max_bytes: Optional[int] = None,
+        assume_sequential: bool = False,
+    ):
+        """
+        Args:
+            api: 被包装的数据API
+            ahead: 最多预取的窗口数量
+            max_bytes: 已取回但尚未被使用的预取结果的内存上限，超过时暂停预取
+            assume_sequential: 是否不经检测、从第一次调用起就开始预取
+        """
+        self.api = api
+        self.ahead = ahead
+        self.max_bytes = max_bytes
+        self.assume_sequential = assume_sequential
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(ahead, 1))
+        self._pending: Dict[tuple, Future] = {}
+        self._last: Optional[Tuple[tuple, Window]] = None
+        self.hits = 0
+
+    def auth(self, *args: Any, **kwargs: Any) -> None:
+        return self.api.auth(*args, **kwargs)
+
+    def supports_info(self, type: str) -> bool:
+        return self.api.supports_info(type)
+
+    def supports_factor(self, factor: str, frequency: str = "D") -> bool:
+        return self.api.supports_factor(factor, frequency)
+
+    def supports_dualkey_factor(self, factor: str, frequency: str = "D") -> bool:
+        return self.api.supports_dualkey_factor(factor, frequency)
+
+    @property
+    def catch_all(self) -> bool:
+        return self.api.catch_all
+
+    def factor_coverage(self, factor: str, frequency: str = "D") -> Optional[Coverage]:
+        return self.api.factor_coverage(factor, frequency)
+
+    def get_info(self, type: str, **kwargs: Any) -> pd.DataFrame:
+        return self.api.get_info(type, **kwargs)
+
+    def get_dualkey_factor(self, *args: Any, **kwargs: Any) -> pd.DataFrame:
+        return self.api.get_dualkey_factor(*args, **kwargs)
+
+    def _is_sequential(self, key: tuple, window: Window) -> bool:
+        if self._last is None:
+            return self.assume_sequential
+        last_key, (last_start, last_end) = self._last
+        if last_key != key:
+            return self.assume_sequential
+        # 紧接上一个窗口(允许中间隔几天休市)
+        gap = window[0] - last_end.normalize()
+        return window[0] > last_start and gap <= pd.Timedelta(days=7)
+
+    def _schedule(self, key: tuple, window: Window):
+        """在后台提交之后ahead个窗口的查询，并丢弃不再可能用到的预取"""
+        factors, codes, frequency = key
+        windows = []
+        for _ in range(self.ahead):
+            window = next_window(*window)
+            windows.append(window)
+        with self._lock:
+            # 其他查询的预取，以及同一查询跳转或改变窗口大小后不再推测的窗口
+            for stale in [
+                k for k in self._pending if k[0] != key or k[1] not in windows
+            ]:
+                self._pending.pop(stale).cancel()
+            for window in windows:
+                if (key, window) in self._pending:
+                    continue
+                if self.max_bytes is not None:
+                    buffered = sum(_nbytes(f) for f in self._pending.values())
+                    if buffered > self.max_bytes:
+                        break
+                self._pending[(key, window)] = self._pool.submit(
+                    self.api.get_factor,
+                    list(factors),
+                    list(codes),
+                    window[0],
+                    window[1],
+                    frequency=frequency,
+                    panel=True,
+                )
+
+    def get_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取因子数据，窗口已被预取时直接返回预取结果
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含因子数据的DataFrame
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        if isinstance(codes, str):
+            codes = [codes]
+        if start_time is None or end_time is None:
+            return self.api.get_factor(
+                factors, codes, start_time, end_time, frequency, panel
+            )
+
+        key = (tuple(factors), tuple(codes), frequency)
+        window = (pd.Timestamp(start_time), pd.Timestamp(end_time))
+        with self._lock:
+            future = self._pending.pop((key, window), None)
+            sequential = self._is_sequential(key, window)
+            self._last = (key, window)
+
+        data = None
+        if future is not None:
+            try:
+                data = future.result()
+                self.hits += 1
+            except Exception:
+                # 预取失败时同步重试，由被包装的数据API报告错误
+                data = None
+        if sequential:
+            self._schedule(key, window)
+        if data is None:
+            data = self.api.get_factor(
+                factors, codes, start_time, end_time, frequency=frequency, panel=True
+            )
+
+        if data.empty or panel:
+            return data
+        # 转换为长格式
+        data = data.stack().reset_index(level=-1)
+        data.columns = ["attribute", "value"]
+        return data
+
+    def close(self):
+        """取消尚未开始的预取并关闭后台线程"""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+        self._pool.shutdown(wait=False)
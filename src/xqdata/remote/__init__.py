@@ -0,0 +1,4 @@
+from .api import RemoteDataApi
+
+# 创建单例实例
+instance = RemoteDataApi()
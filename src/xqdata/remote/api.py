@@ -0,0 +1,226 @@
+import datetime
+import json
+import warnings
+from typing import Any, List, Optional, Union
+
+import pandas as pd
+
+from xqdata.dataapi import DataApi
+
+from .protocol import (
+    JSON,
+    RESULT_TYPE_HEADER,
+    connect,
+    decode_result,
+    default_address,
+    encode_params,
+)
+
+
+class RemoteDataApi(DataApi):
+    """
+    本机共享数据服务(DataServer)的客户端
+
+    查询转发给服务端，由服务端持有的数据源连接和结果缓存提供数据，
+    多个进程查询相同的数据时只下载和缓存一次。
+    """
+
+    def __init__(self, address: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            address: 服务地址，"host:port"或Unix socket路径，默认为环境变量XQDATA_SERVER
+                或DEFAULT_ADDRESS
+            timeout: 请求超时(秒)，None表示不超时
+        """
+        self._address = address
+        self.timeout = timeout
+
+    @property
+    def address(self) -> str:
+        # 未指定时每次查询读取环境变量，导入后再设置XQDATA_SERVER也有效
+        return self._address or default_address()
+
+    def auth(self, *args: Any, **kwargs: Any) -> None:
+        # 数据源的认证由服务端完成
+        pass
+
+    def _call(self, method: str, **params: Any) -> Any:
+        """调用服务端的方法，服务端出错时抛出RuntimeError"""
+        connection = connect(self.address, self.timeout)
+        try:
+            connection.request(
+                "POST",
+                f"/{method}",
+                body=encode_params(params),
+                headers={"Content-Type": JSON},
+            )
+            response = connection.getresponse()
+            body = response.read()
+        finally:
+            connection.close()
+        if response.status != 200:
+            try:
+                message = json.loads(body)["error"]
+            except (ValueError, KeyError):
+                message = body.decode(errors="replace")
+            raise RuntimeError(f"Server error in {method}: {message}")
+        return decode_result(body, response.getheader(RESULT_TYPE_HEADER, "frame"))
+
+    def _fetch(self, method: str, **params: Any) -> pd.DataFrame:
+        """查询DataFrame，失败时警告并返回空DataFrame"""
+        try:
+            return self._call(method, **params)
+        except Exception as e:
+            warnings.warn(f"Error calling {method} on {self.address}: {e}")
+            return pd.DataFrame()
+
+    def _supports(self, method: str, **params: Any) -> bool:
+        """查询服务端是否支持，与数据查询一致，失败时警告并返回False"""
+        try:
+            return bool(self._call(method, **params))
+        except Exception as e:
+            warnings.warn(f"Error calling {method} on {self.address}: {e}")
+            return False
+
+    def supports_info(self, type: str) -> bool:
+        return self._supports("supports_info", type=type)
+
+    def supports_factor(self, factor: str, frequency: str = "D") -> bool:
+        return self._supports("supports_factor", factor=factor, frequency=frequency)
+
+    def supports_dualkey_factor(self, factor: str, frequency: str = "D") -> bool:
+        return self._supports(
+            "supports_dualkey_factor", factor=factor, frequency=frequency
+        )
+
+    def get_info(self, type: str, **kwargs: Any) -> pd.DataFrame:
+        """
+        获取基础信息数据
+
+        Args:
+            type: 信息类型
+            **kwargs: 查询参数，在服务端过滤
+
+        Returns:
+            包含所需信息的DataFrame，失败时返回空DataFrame
+        """
+        return self._fetch("get_info", type=type, **kwargs)
+
+    @staticmethod
+    def _to_long(data: pd.DataFrame, panel: bool) -> pd.DataFrame:
+        if data.empty or panel:
+            return data
+        # 转换为长格式
+        data = data.stack().reset_index(level=-1)
+        data.columns = ["attribute", "value"]
+        return data
+
+    def get_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取因子数据
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含因子数据的DataFrame，失败时返回空DataFrame
+        """
+        # 总是以面板格式传输，长格式的value列类型不一，在本地转换
+        data = self._fetch(
+            "get_factor",
+            factors=factors,
+            codes=codes,
+            start_time=start_time,
+            end_time=end_time,
+            frequency=frequency,
+        )
+        return self._to_long(data, panel)
+
+    def get_dualkey_factor(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        objects: Union[str, List[str]] = None,
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        frequency: str = "D",
+        panel: bool = True,
+    ) -> pd.DataFrame:
+        """
+        获取双键因子数据（例如持仓、基差等）
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 主键代码，可以是单个字符串或字符串列表，（如客户号）
+            objects: 副键（如产品代码）
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频("D")
+            panel: 是否返回面板数据格式
+
+        Returns:
+            包含双键因子数据的DataFrame，失败时返回空DataFrame
+        """
+        data = self._fetch(
+            "get_dualkey_factor",
+            factors=factors,
+            codes=codes,
+            objects=objects,
+            start_time=start_time,
+            end_time=end_time,
+            frequency=frequency,
+        )
+        return self._to_long(data, panel)
+
+    def get_cross_section(
+        self,
+        factors: Union[str, List[str]],
+        date: Union[str, datetime.datetime, datetime.date],
+        universe: Optional[Union[str, List[str]]] = None,
+    ) -> pd.DataFrame:
+        """
+        获取单日全截面因子数据
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            date: 截面日期
+            universe: 证券代码，可以是单个字符串或字符串列表
+
+        Returns:
+            以code为索引、因子为列的DataFrame，失败时返回空DataFrame
+        """
+        return self._fetch(
+            "get_cross_section", factors=factors, date=date, universe=universe
+        )
+
+    def get_tradedays(
+        self,
+        start_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+        end_time: Optional[Union[str, datetime.datetime, datetime.date]] = None,
+    ) -> pd.DatetimeIndex:
+        """
+        获取交易日历
+
+        Args:
+            start_time: 开始日期
+            end_time: 结束日期
+
+        Returns:
+            区间内的交易日
+        """
+        return pd.DatetimeIndex(
+            self._call("get_tradedays", start_time=start_time, end_time=end_time)
+        )
@@ -0,0 +1,110 @@
+import http.client
+import json
+import os
+import socket
+from typing import Any, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# 未指定时使用的服务地址，可用环境变量XQDATA_SERVER覆盖
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+# 服务端开放的数据API方法
+METHODS = (
+    "get_info",
+    "get_factor",
+    "get_dualkey_factor",
+    "get_cross_section",
+    "get_tradedays",
+    "supports_info",
+    "supports_factor",
+    "supports_dualkey_factor",
+)
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+JSON = "application/json"
+# 响应头，说明Arrow数据是DataFrame还是需要还原为索引(如交易日历)
+RESULT_TYPE_HEADER = "X-Xqdata-Result"
+
+
+def default_address() -> str:
+    return os.environ.get("XQDATA_SERVER", DEFAULT_ADDRESS)
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """
+    解析服务地址
+
+    Args:
+        address: "host:port"，或Unix socket的路径(包含"/")
+
+    Returns:
+        Unix socket路径，或(host, port)
+    """
+    if "/" in address:
+        return os.path.expanduser(address)
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """通过Unix socket发送请求的HTTPConnection"""
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def connect(address: str, timeout: Optional[float] = None):
+    """建立到服务地址的HTTP连接"""
+    target = parse_address(address)
+    if isinstance(target, str):
+        return UnixHTTPConnection(target, timeout=timeout)
+    return http.client.HTTPConnection(*target, timeout=timeout)
+
+
+def encode_params(params: dict) -> bytes:
+    """请求参数编码为JSON，日期等转换为字符串"""
+    return json.dumps(params, default=str).encode()
+
+
+def encode_result(result: Any) -> Tuple[bytes, str, str]:
+    """
+    编码方法的返回值
+
+    Returns:
+        (数据, Content-Type, 结果类型)，DataFrame和索引编码为Arrow IPC流，
+        其余(如supports_factor的布尔值)编码为JSON
+    """
+    if isinstance(result, pd.Index):
+        result_type = "index"
+        result = result.to_frame(index=False)
+    elif isinstance(result, pd.DataFrame):
+        result_type = "frame"
+    else:
+        return json.dumps(result).encode(), JSON, "json"
+
+    table = pa.Table.from_pandas(result, preserve_index=result_type == "frame")
+    sink = pa.BufferOutputStream()
+    with ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes(), ARROW_STREAM, result_type
+
+
+def decode_result(body: bytes, result_type: str) -> Any:
+    """encode_result的逆过程"""
+    if result_type == "json":
+        return json.loads(body)
+    # pandas元数据中保存了索引和列类型，读回时恢复
+    data = ipc.open_stream(body).read_all().to_pandas()
+    if result_type == "index":
+        return pd.Index(data.iloc[:, 0], name=data.columns[0])
+    return data
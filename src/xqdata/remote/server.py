@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import socketserver
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from xqdata.budget import parse_size
+from xqdata.cache import CachedDataApi
+from xqdata.dataapi import DataApi, get_dataapi
+
+from .protocol import (
+    JSON,
+    METHODS,
+    RESULT_TYPE_HEADER,
+    default_address,
+    encode_result,
+    parse_address,
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """POST /<方法名>，请求体为JSON编码的关键字参数"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        method = self.path.strip("/")
+        if method not in METHODS:
+            self._send_error(404, f"Unknown method '{method}'")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            result = getattr(self.server.api, method)(**params)
+            body, content_type, result_type = encode_result(result)
+        except Exception as e:
+            self._send_error(500, f"{type(e).__name__}: {e}", traceback.format_exc())
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header(RESULT_TYPE_HEADER, result_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, detail: str = ""):
+        body = json.dumps({"error": message, "traceback": detail}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", JSON)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 不逐个请求打印日志
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class DataServer:
+    """
+    本机共享的数据服务
+
+    一个进程持有数据源的连接和查询结果缓存，同一台机器上的研究进程通过RemoteDataApi
+    查询，数据只下载和缓存一次。服务监听localhost的TCP端口或Unix socket，
+    DataFrame以Arrow IPC流传输。
+    """
+
+    def __init__(
+        self,
+        api: Optional[DataApi] = None,
+        address: Optional[str] = None,
+        max_bytes: int = 1 << 30,
+    ):
+        """
+        Args:
+            api: 提供数据的数据API，默认为get_dataapi("rq")；会被包装为CachedDataApi
+            address: 监听地址，"host:port"或Unix socket路径，默认为环境变量XQDATA_SERVER
+                或DEFAULT_ADDRESS；端口为0时自动分配
+            max_bytes: 结果缓存占用内存的上限(字节)
+        """
+        api = api if api is not None else get_dataapi("rq")
+        self.api = (
+            api if isinstance(api, CachedDataApi) else CachedDataApi(api, max_bytes)
+        )
+        target = parse_address(address or default_address())
+        if isinstance(target, str):
+            if os.path.exists(target):
+                # 上次未正常退出时留下的socket文件
+                os.unlink(target)
+            self._server = _UnixHTTPServer(target, _Handler)
+        else:
+            self._server = ThreadingHTTPServer(target, _Handler)
+        self._server.api = self.api
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        """实际监听的地址，可直接传给RemoteDataApi"""
+        address = self._server.server_address
+        if isinstance(address, str):
+            return address
+        return f"{address[0]}:{address[1]}"
+
+    def serve_forever(self):
+        """在当前线程中处理请求，直到shutdown()"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def start(self) -> "DataServer":
+        """在后台线程中处理请求"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        """停止处理请求并释放监听的地址"""
+        self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.close()
+
+    def close(self):
+        self._server.server_close()
+        address = self._server.server_address
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)
+
+    def __enter__(self) -> "DataServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a xqdata backend on this host")
+    parser.add_argument("--api", default="rq", help="backend name for get_dataapi")
+    parser.add_argument("--address", default=None, help="host:port or Unix socket path")
+    parser.add_argument("--max-memory", default="1GB", help="result cache size")
+    parser.add_argument("--username", default=None)
+    parser.add_argument("--password", default=None)
+    args = parser.parse_args(argv)
+
+    api = get_dataapi(args.api)
+    if args.username or args.password:
+        api.auth(username=args.username, password=args.password)
+    else:
+        api.auth()
+    server = DataServer(api, args.address, parse_size(args.max_memory))
+    print(f"xqdata server listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
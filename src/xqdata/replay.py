@@ -0,0 +1,177 @@
+import datetime
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from xqdata.dataapi import BAR_FIELDS, DataApi
+
+
+class CrossSection:
+    """
+    单个交易日的全截面行情
+
+    所有数组都是BarReplay中二维数组的只读行视图(不复制)，长度与BarReplay.codes一致。
+    """
+
+    __slots__ = ("date", "fields", "listed", "suspended", "tradable")
+
+    def __init__(self, date, fields, listed, suspended, tradable):
+        self.date: pd.Timestamp = date
+        self.fields: Dict[str, np.ndarray] = fields
+        self.listed: np.ndarray = listed
+        self.suspended: np.ndarray = suspended
+        self.tradable: np.ndarray = tradable
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.fields[field]
+
+    def __repr__(self) -> str:
+        return f"CrossSection({self.date.date()}, fields={list(self.fields)})"
+
+
+class BarReplay:
+    """
+    回测用的逐日行情回放
+
+    一次性加载行情和因子，按固定的 交易日 x 证券 轴存为每个字段一个C连续的二维数组；
+    回放时每个交易日的截面都是数组的行视图，不再像df.xs(date)那样每天查找和分配。
+    附带的掩码：listed(处于上市期间)、suspended(上市期间停牌或无成交)、
+    tradable(listed且未停牌)。
+    """
+
+    def __init__(
+        self,
+        api: DataApi,
+        codes: Union[str, List[str]],
+        start_time: Union[str, datetime.datetime, datetime.date],
+        end_time: Union[str, datetime.datetime, datetime.date],
+        factors: Optional[List[str]] = None,
+        frequency: str = "D",
+        suspension_factor: Optional[str] = None,
+        listing: Optional[pd.DataFrame] = None,
+    ):
+        """
+        Args:
+            api: 数据API
+            codes: 证券代码，决定截面数组的证券轴顺序
+            start_time: 开始日期
+            end_time: 结束日期
+            factors: 行情之外需要一起加载的因子
+            frequency: 数据频率，默认为日频
+            suspension_factor: 停牌标记因子(如"is_paused")，默认由无成交推断
+            listing: 以code为索引、含listed_date和de_listed_date列的上市信息，
+                默认由每个证券首个和最后一个有数据的交易日推断
+        """
+        if isinstance(codes, str):
+            codes = [codes]
+        self.codes = pd.Index(codes, name="code")
+        requested = list(dict.fromkeys(BAR_FIELDS + list(factors or [])))
+        fields = list(requested)
+        if suspension_factor is not None and suspension_factor not in fields:
+            fields.append(suspension_factor)
+
+        data = api.get_bars(
+            list(self.codes), start_time, end_time, frequency, fields=fields
+        )
+        if frequency == "D":
+            dates = api.get_tradedays(start_time, end_time)
+        else:
+            dates = data.index.get_level_values("datetime").unique().sort_values()
+        self.dates = pd.DatetimeIndex(dates, name="datetime")
+
+        shape = (len(self.dates), len(self.codes))
+        self.arrays: Dict[str, np.ndarray] = {}
+        if not data.empty:
+            rows = self.dates.get_indexer(data.index.get_level_values("datetime"))
+            cols = self.codes.get_indexer(data.index.get_level_values("code"))
+            valid = (rows >= 0) & (cols >= 0)
+            rows, cols = rows[valid], cols[valid]
+        for field in fields:
+            array = np.full(shape, np.nan)
+            if not data.empty and field in data.columns:
+                column = data[field]
+                if is_bool_dtype(column.dtype) or is_numeric_dtype(column.dtype):
+                    # 可空的整数和布尔列(Int64/boolean)的缺失值转为NaN
+                    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+                    array[rows, cols] = values[valid]
+                else:
+                    values = column.to_numpy()[valid]
+                    array = np.empty(shape, dtype=object)
+                    array[rows, cols] = values
+            self.arrays[field] = array
+
+        self.listed = self._listing_mask(listing)
+        if suspension_factor is not None:
+            # 停牌标记同时是请求的行情或因子时保留在arrays中
+            if suspension_factor in requested:
+                flag = self.arrays[suspension_factor]
+            else:
+                flag = self.arrays.pop(suspension_factor)
+            # 标记可能是含None/pd.NA的object数组，缺失视为未停牌
+            suspended = (
+                pd.array(flag.ravel(), dtype="boolean")
+                .fillna(False)
+                .to_numpy(dtype=bool)
+                .reshape(flag.shape)
+            )
+        else:
+            volume = self.arrays["volume"]
+            suspended = np.isnan(self.arrays["close"]) | (np.nan_to_num(volume) == 0)
+        self.suspended = np.ascontiguousarray(self.listed & suspended)
+        self.tradable = np.ascontiguousarray(self.listed & ~self.suspended)
+        # 截面是共享的行视图，设为只读以免策略代码误改
+        for array in [
+            *self.arrays.values(),
+            self.listed,
+            self.suspended,
+            self.tradable,
+        ]:
+            array.setflags(write=False)
+
+    def _listing_mask(self, listing: Optional[pd.DataFrame]) -> np.ndarray:
+        dates = self.dates.to_numpy()[:, None]
+        if listing is not None:
+            listing = listing.reindex(self.codes)
+            listed = listing["listed_date"].to_numpy(dtype="datetime64[ns]")
+            de_listed = listing["de_listed_date"].to_numpy(dtype="datetime64[ns]")
+            return (dates >= listed[None, :]) & ~(dates >= de_listed[None, :])
+        # 首个到最后一个有收盘价的交易日之间视为上市期间
+        has_bar = ~np.isnan(self.arrays["close"])
+        first = np.where(has_bar.any(axis=0), has_bar.argmax(axis=0), len(self.dates))
+        last = len(self.dates) - 1 - has_bar[::-1].argmax(axis=0)
+        positions = np.arange(len(self.dates))[:, None]
+        return (positions >= first[None, :]) & (positions <= last[None, :])
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getitem__(self, i: int) -> CrossSection:
+        """第i个交易日的截面，所有数组都是行视图"""
+        return CrossSection(
+            self.dates[i],
+            {field: array[i] for field, array in self.arrays.items()},
+            self.listed[i],
+            self.suspended[i],
+            self.tradable[i],
+        )
+
+    def __iter__(self) -> Iterator[CrossSection]:
+        for i in range(len(self.dates)):
+            yield self[i]
+
+    def at(self, date: Union[str, datetime.datetime, datetime.date]) -> CrossSection:
+        """
+        指定日期(或之前最近一个交易日)的截面
+
+        Args:
+            date: 日期
+
+        Returns:
+            截面
+        """
+        i = self.dates.searchsorted(pd.Timestamp(date), side="right") - 1
+        if i < 0:
+            raise KeyError(f"No session on or before {date}")
+        return self[i]
@@ -0,0 +1,171 @@
+import re
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 各行情字段在合成低频K线时的聚合方式，未列出的字段取最后一个值
+BAR_AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "total_turnover": "sum",
+    "num_trades": "sum",
+    "prev_close": "first",
+    "prev_settlement": "first",
+}
+
+# 合成低频K线所使用的日历周期
+PERIOD_FREQUENCIES = {"W": "W", "ME": "M", "QE": "Q"}
+
+# 同一证券相邻交易分钟相隔超过该分钟数时视为休市(午休、期货小节休息、夜盘与日盘之间)
+BREAK_MINUTES = 10
+
+_MINUTE_PATTERN = re.compile(r"^(\d*)(m|min)$")
+_HOUR_PATTERN = re.compile(r"^(\d*)h$")
+
+
+def parse_frequency(frequency: str) -> Optional[Tuple[str, int]]:
+    """
+    解析数据频率
+
+    大写的"M"表示月，小写的"m"/"min"表示分钟，与pandas和rqdata的习惯一致。
+
+    Args:
+        frequency: 数据频率，例如"D"、"W"、"ME"、"QE"、"min"、"5m"、"15min"、"1h"
+
+    Returns:
+        (单位, 倍数)，单位为"D"、"W"、"ME"、"QE"或"m"；无法识别时返回None
+    """
+    if frequency in ("D", "d", "1d", "B"):
+        return "D", 1
+    if frequency in ("W", "w", "1w"):
+        return "W", 1
+    if frequency in ("ME", "M", "1M"):
+        return "ME", 1
+    if frequency in ("QE", "Q", "1Q"):
+        return "QE", 1
+    match = _MINUTE_PATTERN.match(frequency)
+    if match:
+        return "m", int(match.group(1) or 1)
+    match = _HOUR_PATTERN.match(frequency)
+    if match:
+        return "m", 60 * int(match.group(1) or 1)
+    return None
+
+
+def get_base_frequency(frequency: str) -> Optional[str]:
+    """
+    返回合成该频率所需获取的基础频率，不需要本地合成时返回None
+
+    Args:
+        frequency: 目标数据频率
+
+    Returns:
+        "D"(由日线合成周/月/季线)、"min"(由1分钟线合成多分钟线)或None
+    """
+    parsed = parse_frequency(frequency)
+    if parsed is None:
+        return None
+    unit, n = parsed
+    if unit in PERIOD_FREQUENCIES:
+        return "D"
+    if unit == "m" and n > 1:
+        return "min"
+    return None
+
+
+def _aggregations(columns) -> Dict[str, str]:
+    """根据字段名(去掉_post/_pre复权后缀)确定聚合方式"""
+    result = {}
+    for column in columns:
+        base = re.sub(r"_(post|pre)$", "", column)
+        result[column] = BAR_AGGREGATIONS.get(base, "last")
+    return result
+
+
+def _minute_bins(data: pd.DataFrame, n: int) -> Tuple[pd.Series, pd.Series]:
+    """
+    按交易时钟为每根1分钟线分配所属的多分钟K线
+
+    每个证券在所有交易日出现过的分钟组成其交易时钟，夜盘(18点以后)排在日盘之前；
+    时钟被休市分为若干连续交易段，每段从开始时间起按经过的分钟数每n分钟划分一根K线，
+    因此K线不跨越休市，个别交易日缺失分钟也不会使之后的K线错位。
+
+    Args:
+        data: 包含datetime和code列的DataFrame
+        n: 每根K线包含的分钟数
+
+    Returns:
+        (K线序号, K线结束时间)，与data的行对齐；K线序号在每个证券、交易日内唯一
+    """
+    time_of_day = data["datetime"] - data["datetime"].dt.normalize()
+    minute = (time_of_day // pd.Timedelta(minutes=1)).astype("int64")
+    minute = (minute - 18 * 60) % (24 * 60)
+
+    clock = (
+        pd.DataFrame({"code": data["code"].to_numpy(), "minute": minute.to_numpy()})
+        .drop_duplicates()
+        .sort_values(["code", "minute"], kind="stable")
+    )
+    new_segment = (clock["code"] != clock["code"].shift()) | (
+        clock["minute"].diff() > BREAK_MINUTES
+    )
+    clock["start"] = clock["minute"].where(new_segment).ffill().astype("int64")
+    clock["end"] = clock.groupby(["code", "start"])["minute"].transform("max")
+    clock = clock.set_index(["code", "minute"]).reindex(
+        pd.MultiIndex.from_arrays([data["code"], minute])
+    )
+
+    start = clock["start"].to_numpy()
+    bar_no = (minute - start) // n
+    # 每根K线以其在交易时钟上的结束时间为标签，交易段的最后一根截止于段结束
+    end = np.minimum(start + (bar_no + 1) * n - 1, clock["end"].to_numpy())
+    label = data["datetime"] + pd.to_timedelta(end - minute, unit="min")
+    return start * (24 * 60) + bar_no, label
+
+
+def resample_bars(data: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """
+    将日线或1分钟线向量化地合成为更低频率的K线
+
+    周/月/季线按交易日所在的日历周期分组，以周期内最后一个交易日为标签；
+    多分钟线在每个交易日(有trading_date列时按其划分，兼容期货夜盘)内按交易时钟对齐：
+    每个连续交易段(以午休、小节休息等休市分隔)从开始时间起每n分钟合成一根，
+    不跨越休市和交易日，缺失的分钟不影响分组，以K线在交易时钟上的结束时间为标签。
+
+    Args:
+        data: 以(datetime, code)为索引的行情DataFrame
+        frequency: 目标频率，例如"W"、"ME"、"QE"、"5m"、"15m"、"60m"
+
+    Returns:
+        以(datetime, code)为索引的合成后的DataFrame
+    """
+    if data.empty:
+        return data
+    unit, n = parse_frequency(frequency)
+    columns = data.columns
+    data = data.reset_index().sort_values(["code", "datetime"], kind="stable")
+
+    if unit in PERIOD_FREQUENCIES:
+        period = data["datetime"].dt.to_period(PERIOD_FREQUENCIES[unit])
+        # 以周期内全市场最后一个交易日作为标签，与交易日历对齐
+        label = data.groupby(period)["datetime"].transform("max")
+        keys = [data["code"], period]
+    else:
+        if "trading_date" in data.columns:
+            session = pd.to_datetime(data["trading_date"])
+        else:
+            session = data["datetime"].dt.normalize()
+        bar_no, label = _minute_bins(data, n)
+        keys = [data["code"], session, bar_no]
+
+    data["datetime"] = label
+    result = data.groupby(keys, sort=False).agg(
+        {"datetime": "last", **_aggregations(columns)}
+    )
+    result["code"] = result.index.get_level_values(0)
+    result = result.set_index(["datetime", "code"]).sort_index()
+    return result[columns]
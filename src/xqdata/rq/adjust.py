@@ -0,0 +1,203 @@
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import rqdatac as rq
+
+from .utils import get_cache_dir, load_store, save_store
+
+# 复权时需要乘以复权因子的价格字段，其余字段(成交量、成交额等)保持不复权
+PRICE_FIELDS = {
+    "open",
+    "high",
+    "low",
+    "close",
+    "last",
+    "prev_close",
+    "limit_up",
+    "limit_down",
+    "settlement",
+    "prev_settlement",
+    *(f"{side}{level}" for side in "ab" for level in range(1, 6)),
+}
+
+_ADJUST_PATTERN = re.compile(r"^(.+)_(post|pre)$")
+
+
+def split_adjusted_factors(factors: List[str]):
+    """
+    将因子拆分为基础字段和复权字段
+
+    Args:
+        factors: 行情因子列表，例如["close", "close_post", "open_pre"]
+
+    Returns:
+        (需要获取的不复权基础字段列表, [(复权因子, 基础字段, 复权方式), ...])
+    """
+    base_fields, adjusted = [], []
+    for factor in factors:
+        match = _ADJUST_PATTERN.match(factor)
+        if match:
+            adjusted.append((factor, match.group(1), match.group(2)))
+            base_fields.append(match.group(1))
+        else:
+            base_fields.append(factor)
+    return list(dict.fromkeys(base_fields)), adjusted
+
+
+class ExFactorStore:
+    """
+    除权因子的本地缓存
+
+    保存每个证券完整的除权除息历史(ex_date, ex_cum_factor)，持久化到本地缓存目录；
+    每个证券每天最多刷新一次，刷新时只获取上次刷新之后的新除权记录。
+    """
+
+    # 持久化数据的格式版本，格式变化时递增
+    VERSION = 1
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        fetch_func: Optional[Callable[..., pd.DataFrame]] = None,
+    ):
+        """
+        Args:
+            path: 持久化文件路径，默认为缓存目录下的ex_factors.pkl
+            fetch_func: 获取除权因子的函数，参数为(codes, start_date, end_date)，
+                返回与rq.get_ex_factor格式相同的DataFrame，默认请求RQData
+        """
+        self.path = Path(path) if path else get_cache_dir() / "ex_factors.pkl"
+        self.fetch_func = fetch_func or (
+            lambda codes, start_date, end_date: rq.get_ex_factor(
+                codes, start_date=start_date, end_date=end_date
+            )
+        )
+        self._lock = threading.Lock()
+        self._table = pd.DataFrame(
+            {
+                "code": pd.Series(dtype=object),
+                "ex_date": pd.Series(dtype="datetime64[ns]"),
+                "ex_cum_factor": pd.Series(dtype=np.float64),
+            }
+        )
+        # 证券代码 -> 上次刷新的日期
+        self._refreshed = {}
+        saved = load_store(self.path, self.VERSION)
+        if saved is not None:
+            self._table, self._refreshed = saved
+
+    def save(self):
+        """原子地将数据写入持久化文件"""
+        save_store(self.path, self.VERSION, (self._table, self._refreshed))
+
+    def update(self, codes: List[str]):
+        """
+        刷新证券的除权因子，当天已刷新过的证券不会重复请求
+
+        Args:
+            codes: 证券代码列表
+        """
+        today = pd.Timestamp.today().normalize()
+        tasks = {}
+        for code in codes:
+            refreshed = self._refreshed.get(code)
+            if refreshed is None or refreshed < today:
+                tasks.setdefault(refreshed, []).append(code)
+        if not tasks:
+            return
+
+        with self._lock:
+            frames = [self._table]
+            for since, task_codes in tasks.items():
+                data = self.fetch_func(task_codes, since, today)
+                if data is not None and not data.empty:
+                    data = data.reset_index().rename(columns={"order_book_id": "code"})
+                    frames.append(data[["code", "ex_date", "ex_cum_factor"]])
+                self._refreshed.update(dict.fromkeys(task_codes, today))
+            table = pd.concat(frames, axis=0, ignore_index=True)
+            table["ex_date"] = pd.to_datetime(table["ex_date"])
+            self._table = (
+                table.drop_duplicates(["code", "ex_date"], keep="last")
+                .sort_values(["ex_date", "code"])
+                .reset_index(drop=True)
+            )
+            self.save()
+
+    def cum_factors(self, codes: pd.Index, dates: pd.DatetimeIndex) -> np.ndarray:
+        """
+        向量化地获取每个(日期, 证券)对应的累计复权因子(as-of最近一次除权)
+
+        Args:
+            codes: 每行的证券代码
+            dates: 每行的日期
+
+        Returns:
+            与输入等长的累计复权因子数组，没有除权记录时为1
+        """
+        left = pd.DataFrame(
+            {
+                "ex_date": pd.DatetimeIndex(dates).normalize(),
+                "code": np.asarray(codes, dtype=object),
+                "pos": np.arange(len(codes)),
+            }
+        ).sort_values("ex_date", kind="stable")
+        merged = pd.merge_asof(left, self._table, on="ex_date", by="code")
+        factors = np.ones(len(codes), dtype=np.float64)
+        factors[merged["pos"].to_numpy()] = merged["ex_cum_factor"].fillna(1.0)
+        return factors
+
+    def latest_factors(self, codes: pd.Index) -> np.ndarray:
+        """
+        获取每个证券最新的累计复权因子，用于前复权
+
+        Args:
+            codes: 每行的证券代码
+
+        Returns:
+            与输入等长的累计复权因子数组，没有除权记录时为1
+        """
+        latest = self._table.groupby("code")["ex_cum_factor"].last()
+        return pd.Index(codes).map(latest).to_numpy(dtype=np.float64, na_value=1.0)
+
+
+def adjust_prices(
+    data: pd.DataFrame, adjusted: list, store: "ExFactorStore"
+) -> pd.DataFrame:
+    """
+    由不复权行情计算后复权/前复权字段
+
+    后复权价格 = 不复权价格 * 当日累计复权因子；
+    前复权价格 = 不复权价格 * 当日累计复权因子 / 最新累计复权因子。
+
+    Args:
+        data: 以(datetime, code)为索引的不复权行情
+        adjusted: split_adjusted_factors返回的[(复权因子, 基础字段, 复权方式), ...]
+        store: 除权因子缓存，需已包含data中的证券
+
+    Returns:
+        只包含复权字段的DataFrame，索引与data一致
+    """
+    codes = data.index.get_level_values("code")
+    post = store.cum_factors(codes, data.index.get_level_values("datetime"))
+    ratios = {"post": post}
+    if any(adjust_type == "pre" for _, _, adjust_type in adjusted):
+        ratios["pre"] = post / store.latest_factors(codes)
+
+    result = {}
+    for factor, field, adjust_type in adjusted:
+        values = data[field].to_numpy()
+        if field in PRICE_FIELDS:
+            values = values * ratios[adjust_type]
+        result[factor] = values
+    return pd.DataFrame(result, index=data.index)
+
+
+@lru_cache(maxsize=None)
+def get_ex_factor_store() -> ExFactorStore:
+    """获取进程内共享的除权因子缓存"""
+    return ExFactorStore()
@@ -1,13 +1,70 @@
+import copy
+import inspect
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
 from typing import Any, Callable, Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 import rqdatac as rq
 
 from xqdata.dataapi import DataApi
+from xqdata.budget import (
+    SpilledResult,
+    check_budget,
+    estimate_bytes,
+    parse_size,
+    plan_chunks,
+)
+from xqdata.filters import IndexedTable
+from xqdata.instruments import InstrumentDictionary, to_int_index
+from xqdata.schema import apply_schema, join_frames, schema_dtypes
 
-from .config import FACTOR_CONFIG, FACTOR_EXTRA_PARAMS, INFO_CONFIG
+from .config import (
+    DEFAULT_OPTIONS,
+    FACTOR_CONFIG,
+    FACTOR_EXTRA_PARAMS,
+    FACTOR_PATTERNS,
+    FACTOR_SCHEMA,
+    INFO_CONFIG,
+)
+from .func_factor import rq_get_price
+from .func_info import (
+    clear_instrument_cache,
+    rq_all_instruments,
+    rq_instrument_dictionary,
+    rq_listed_codes,
+)
+from .latest import LatestCache, rq_get_latest
+from .parallel import get_factor_in_processes, set_worker_credentials
+from .planner import expand_to_request, plan_listing_windows, trim_to_listing
+from .routing import RoutingTable
+
+
+@lru_cache(maxsize=None)
+def _func_params(func: Callable) -> Optional[frozenset]:
+    """查询函数接受的参数名，接受**kwargs时返回None表示全部参数都传给函数"""
+    parameters = inspect.signature(func).parameters
+    if any(p.kind is p.VAR_KEYWORD for p in parameters.values()):
+        return None
+    return frozenset(parameters)
+
+
+# 写入文件(out=)或溢出(get_factor_spilled)时每块查询结果的内存上限，
+# 设置了max_memory时以它为准
+OUT_CHUNK_BYTES = 256 << 20
+
+
+def _check_options(names):
+    for name in names:
+        if name not in DEFAULT_OPTIONS:
+            raise ValueError(
+                f"Unknown option '{name}'. Available: {list(DEFAULT_OPTIONS)}"
+            )
 
 
 class RQDataApi(DataApi):
@@ -16,11 +73,29 @@ class RQDataApi(DataApi):
         self.info_config = INFO_CONFIG.copy()
         # 配置管理不同因子的查询
         self.factor_config = FACTOR_CONFIG.copy()
+        # 按模式匹配的因子族
+        self.factor_patterns = FACTOR_PATTERNS.copy()
+        # 因子的声明类型
+        self.factor_schema = FACTOR_SCHEMA.copy()
+        # (信息类型, 参数) -> (带索引的基础信息表, 请求的日期)；
+        # 会话与原实例共享同一个字典，只原地修改而不重新赋值
+        self._info_tables = {}
+        # 编译后的路由表，配置变化时置空并在下次使用时重新编译
+        self._routing = None
         # 存储额外参数的字典
         self._extra_params = {}
+        # 全局选项，可被get_factor等方法的同名参数覆盖
+        self._options = DEFAULT_OPTIONS.copy()
+        # 会话的设置不可修改，见session()
+        self._frozen = False
+        # 最新行情快照的缓存，会话之间共享
+        self._latest = LatestCache()
 
     def auth(self, username=None, password=None):
-        return rq.init(username=username, password=password)
+        result = rq.init(username=username, password=password)
+        # 认证成功后只把认证信息交给进程池的子进程，不保存在实例和会话中
+        set_worker_credentials({"username": username, "password": password})
+        return result
 
     def get_info(self, type: str, **kwargs) -> pd.DataFrame:
         """
@@ -28,7 +103,9 @@ class RQDataApi(DataApi):
 
         Args:
             type: 信息类型，字符串
-            **kwargs: 查询参数
+            **kwargs: 查询函数接受的参数(如date)直接传给函数，其余为返回列的过滤条件，
+                例如exchange="XSHE"、listed_date__lt="2020-01-01"，
+                语义见xqdata.filters.parse_filters
 
         Returns:
             包含所需信息的DataFrame，如果获取失败则返回空DataFrame
@@ -43,21 +120,119 @@ class RQDataApi(DataApi):
 
         # 获取配置
         config = self.info_config[type]
+        func = config["func"]
 
-        # 合并参数
+        # 查询函数接受的参数传给函数，其余参数作为返回列的过滤条件
+        accepted = _func_params(func)
         params = config["params"].copy()
-        params.update(kwargs)
+        params.update(
+            {k: v for k, v in kwargs.items() if accepted is None or k in accepted}
+        )
+        filters = {
+            k: v
+            for k, v in kwargs.items()
+            if accepted is not None and k not in accepted
+        }
 
         # 调用对应的RQData接口
         try:
-            result = config["func"](**params)
-
-            return result
-        except Exception:
-            # 如果出现异常，返回空DataFrame
-            warnings.warn(f"Error fetching info type '{type}'. Return empty DataFrame.")
+            return self._info_table(type, func, params).query(**filters)
+        except Exception as e:
+            # 如果出现异常(包括未知的过滤列)，返回空DataFrame
+            warnings.warn(
+                f"Error fetching info type '{type}': {e}. Return empty DataFrame."
+            )
             return pd.DataFrame()
 
+    def _info_table(
+        self, type: str, func: Callable, params: Dict[str, Any]
+    ) -> IndexedTable:
+        """
+        获取带索引的基础信息表，相同参数的查询每天只请求一次
+
+        基础信息(上市证券、行业分类等)每个交易日都可能变化，
+        前一天请求的表在当天第一次查询时重新请求。
+        """
+        try:
+            key = (type, tuple(sorted(params.items())))
+            hash(key)
+        except TypeError:
+            return IndexedTable(func(**params))
+        today = pd.Timestamp.today().normalize()
+        entry = self._info_tables.get(key)
+        if entry is None or entry[1] < today:
+            entry = (IndexedTable(func(**params)), today)
+            self._info_tables[key] = entry
+        return entry[0]
+
+    def get_tradedays(
+        self,
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+    ) -> pd.DatetimeIndex:
+        """
+        获取交易日历
+
+        完整的交易日历作为一张基础信息表缓存(每天请求一次)，各区间的查询从中截取，
+        不为每个区间分别请求和缓存。
+
+        Args:
+            start_time: 开始日期
+            end_time: 结束日期
+
+        Returns:
+            区间内的交易日
+        """
+        if "tradedays" not in self.info_config:
+            return super().get_tradedays(start_time, end_time)
+        config = self.info_config["tradedays"]
+        try:
+            table = self._info_table("tradedays", config["func"], config["params"])
+            data = table.data
+        except Exception as e:
+            warnings.warn(f"Error fetching trading calendar: {e}")
+            data = pd.DataFrame()
+        start = self._parse_time_param(start_time)
+        end = self._parse_time_param(end_time)
+        if data.empty or "is_tradeday" not in data.columns:
+            if start is None or end is None:
+                raise ValueError(
+                    "start_time and end_time are required without a calendar"
+                )
+            return pd.bdate_range(start, end, name="datetime")
+        days = pd.DatetimeIndex(data.index[data["is_tradeday"].astype(bool)])
+        return days[days.slice_indexer(start, end)]
+
+    def instrument_dictionary(self, market: str = "cn") -> InstrumentDictionary:
+        """
+        获取int_index使用的进程内共享的证券字典
+
+        字典在第一次使用时用全市场证券列表初始化，id与查询顺序无关，
+        用同一份证券列表初始化的进程得到相同的id。
+
+        Args:
+            market: 市场，默认为"cn"
+
+        Returns:
+            已初始化的证券字典
+        """
+        return rq_instrument_dictionary(market)
+
+    def refresh_info(self):
+        """
+        清空缓存的基础信息表和全市场证券列表快照，下次查询时重新请求
+
+        基础信息缓存由实例和从它派生的全部会话共享，在任一处调用都对所有会话生效。
+        """
+        self._info_tables.clear()
+        clear_instrument_cache()
+
+    def supports_info(self, type: str) -> bool:
+        return type in self.info_config
+
+    def supports_factor(self, factor: str, frequency: str = "D") -> bool:
+        return self.routing.resolve(factor) is not None
+
     def register_info_type(
         self,
         type_name: str,
@@ -72,10 +247,98 @@ class RQDataApi(DataApi):
             func: 调用的函数(RQData接口或包装后的函数)
             params: 传递给函数的参数
         """
-        self.info_config[type_name] = {
-            "func": func,
-            "params": params,
+        self._check_mutable()
+        # 写时复制：替换整个字典，并发的查询始终看到完整的旧配置或新配置
+        self.info_config = {
+            **self.info_config,
+            type_name: {"func": func, "params": params},
         }
+        self.refresh_info()
+        self.invalidate_routing()
+
+    def register_factor(self, factor: str, func: Callable, pattern: bool = False):
+        """
+        注册因子的查询函数
+
+        Args:
+            factor: 因子名称；pattern为True时为匹配因子名称的正则表达式
+            func: 查询函数，签名与func_factor中的函数一致
+            pattern: 是否按正则表达式注册一族因子
+        """
+        self._check_mutable()
+        if pattern:
+            self.factor_patterns = {**self.factor_patterns, factor: func}
+        else:
+            self.factor_config = {**self.factor_config, factor: func}
+        self.invalidate_routing()
+
+    def set_factor_schema(
+        self,
+        factor: str,
+        dtype: Optional[str],
+        nullable: bool = True,
+        categories: Optional[List[Any]] = None,
+        fill_value: Any = None,
+    ):
+        """
+        声明因子的返回类型，启用apply_schema选项(set_option("apply_schema", True))时生效
+
+        Args:
+            factor: 因子名称
+            dtype: numpy类型名(如"int64"、"bool"、"float32")或"category"，
+                None表示取消声明、按数据源返回的类型
+            nullable: 是否允许缺失值，可空的整数和布尔因子以Int64/boolean等可空类型返回
+            categories: category因子的固定取值表
+            fill_value: 不可空因子缺失值的填充值，不提供时有缺失值会抛出ValueError
+        """
+        self._check_mutable()
+        schema = dict(self.factor_schema)
+        if dtype is None:
+            schema.pop(factor, None)
+        else:
+            spec = {"dtype": dtype, "nullable": nullable}
+            if categories is not None:
+                spec["categories"] = list(categories)
+            if fill_value is not None:
+                spec["fill_value"] = fill_value
+            schema[factor] = spec
+        self.factor_schema = schema
+
+    def factor_dtypes(self, factors: Union[str, List[str]]) -> Dict[str, Any]:
+        """
+        已声明因子在启用apply_schema选项时get_factor结果中的列类型，可用于预先分配下游的缓冲区
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+
+        Returns:
+            因子名称 -> pandas类型，未声明的因子不包含在内
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        return schema_dtypes(factors, self.factor_schema)
+
+    def invalidate_routing(self):
+        """
+        使编译后的路由表失效，下次使用时重新编译
+
+        register_factor和替换factor_config/factor_patterns字典时不需要手动调用；
+        原地修改这两个字典后需要调用。
+        """
+        self._routing = None
+
+    @property
+    def routing(self) -> RoutingTable:
+        """编译后的因子路由表，配置字典被替换时重新编译"""
+        routing = self._routing
+        if routing is None or not routing.is_compiled_from(
+            self.factor_config, self.factor_patterns
+        ):
+            routing = RoutingTable(
+                self.factor_config, self.factor_patterns, FACTOR_EXTRA_PARAMS
+            )
+            self._routing = routing
+        return routing
 
     def set_extra_param(self, func_name: str, param_name: str, param_value: Any):
         """
@@ -86,9 +349,119 @@ class RQDataApi(DataApi):
             param_name: 参数名称
             param_value: 参数值
         """
-        if func_name not in self._extra_params:
-            self._extra_params[func_name] = {}
-        self._extra_params[func_name][param_name] = param_value
+        self._check_mutable()
+        params = {**self._extra_params.get(func_name, {}), param_name: param_value}
+        self._extra_params = {**self._extra_params, func_name: params}
+
+    def set_option(self, name: str, value: Any):
+        """
+        设置全局选项
+
+        Args:
+            name: 选项名称，必须是DEFAULT_OPTIONS中的选项
+            value: 选项值
+        """
+        self._check_mutable()
+        _check_options([name])
+        self._options = {**self._options, name: value}
+
+    def _check_mutable(self):
+        if self._frozen:
+            raise RuntimeError(
+                "Session settings are immutable. Use session() to derive a new one."
+            )
+
+    def session(
+        self,
+        extra_params: Optional[Dict[str, Dict[str, Any]]] = None,
+        **options: Any,
+    ) -> "RQDataApi":
+        """
+        创建设置不可变的会话
+
+        会话与当前实例共享数据连接、路由表和基础信息缓存，但拥有自己的额外参数和选项，
+        创建后不能再修改(set_extra_param等会抛出RuntimeError)，可以被多个线程同时使用；
+        同一进程中的不同策略应各自使用会话，而不是修改共享的单例。
+
+        Args:
+            extra_params: 查询函数名 -> {参数名: 参数值}，在当前实例的额外参数基础上覆盖
+            **options: 选项，必须是DEFAULT_OPTIONS中的选项
+
+        Returns:
+            新的会话，它也可以再派生会话
+        """
+        _check_options(options)
+        merged = dict(self._extra_params)
+        for func_name, params in (extra_params or {}).items():
+            merged[func_name] = MappingProxyType(
+                {**merged.get(func_name, {}), **params}
+            )
+        session = copy.copy(self)
+        session._extra_params = MappingProxyType(merged)
+        session._options = MappingProxyType({**self._options, **options})
+        session._frozen = True
+        return session
+
+    def _get_option(self, name: str, value: Any = None) -> Any:
+        """返回调用时传入的选项值，未传入(None)时返回全局选项"""
+        return self._options[name] if value is None else value
+
+    def _group_factors(self, factors: List[str]) -> Dict[Callable, List[str]]:
+        """
+        按照配置对因子进行分组，返回查询函数到因子列表的映射
+
+        Args:
+            factors: 因子名称列表
+
+        Returns:
+            查询函数 -> 因子列表 的字典，未配置且没有default的因子会被忽略
+        """
+        return self.routing.plan(factors)
+
+    def _get_extra_kwargs(self, func: Callable) -> Dict[str, Any]:
+        """
+        获取函数已设置且被允许的额外参数
+
+        Args:
+            func: 查询函数
+
+        Returns:
+            额外参数字典
+        """
+        params = self._extra_params.get(func.__name__)
+        if not params:
+            return {}
+        # 只添加允许的参数
+        allowed_params = self.routing.allowed_params(func)
+        return {
+            param_name: param_value
+            for param_name, param_value in params.items()
+            if param_name in allowed_params
+        }
+
+    def _schema(self) -> Dict[str, Dict[str, Any]]:
+        """生效的类型声明，没有启用apply_schema选项时为空"""
+        return self.factor_schema if self._get_option("apply_schema") else {}
+
+    def _join_results(self, results: List[pd.DataFrame]) -> pd.DataFrame:
+        """合并各组查询结果；数据不符合类型声明时给出警告并保留数据源返回的类型"""
+        schema = self._schema()
+        try:
+            return join_frames(results, schema)
+        except (TypeError, ValueError) as e:
+            warnings.warn(f"Factor schema not applied: {str(e)}")
+            return join_frames(results, {})
+
+    def _apply_schema(self, data: pd.DataFrame) -> pd.DataFrame:
+        """按类型声明转换结果；数据不符合声明时给出警告并原样返回"""
+        schema = self._schema()
+        if not schema:
+            return data
+        try:
+            return apply_schema(data, schema)
+        except (TypeError, ValueError) as e:
+            warnings.warn(f"Factor schema not applied: {str(e)}")
+            return data
 
     def get_factor(
         self,
@@ -98,7 +471,14 @@ class RQDataApi(DataApi):
         end_time: Optional[Union[str, datetime, date]] = None,
         frequency: str = "D",
         panel: bool = True,
-    ) -> pd.DataFrame:
+        prune_listing: Optional[bool] = None,
+        reexpand: Optional[bool] = None,
+        processes: Optional[int] = None,
+        int_index: Optional[bool] = None,
+        max_memory: Optional[Union[int, str]] = None,
+        out: Optional[Union[str, Path]] = None,
+        out_format: Optional[str] = None,
+    ) -> Union[pd.DataFrame, Path, None]:
         """
         获取因子数据
 
@@ -109,84 +489,96 @@ class RQDataApi(DataApi):
             end_time: 结束时间
             frequency: 数据频率，默认为日频
             panel: 是否返回面板数据格式
+            prune_listing: 是否按上市/退市日期裁剪每个证券的查询区间，
+                None表示使用set_option设置的全局值
+            reexpand: 裁剪后是否将结果重新展开为 时间 x 全部请求证券 的形状，
+                None表示使用set_option设置的全局值
+            processes: 按证券分片并行查询的进程数，子进程的结果通过共享内存交回，
+                None表示使用set_option设置的全局值
+            int_index: 是否以(timestamp, code_id)即(int64纳秒时间戳, int32证券id)为索引，
+                id来自进程内共享的证券字典，可用xqdata.instruments.from_int_index转换回来；
+                None表示使用set_option设置的全局值
+            max_memory: 结果的内存预算(字节数或"4GB"等)，查询前按交易日历、证券数量和
+                因子数量估计结果大小，超出时在查询前抛出MemoryError(需要溢出到临时文件时
+                使用get_factor_spilled)，0表示不限制，None表示使用set_option设置的全局值
+            out: 输出路径。给出时按证券(必要时再按月)分块查询，每块到达后立即写入文件并释放，
+                全部写完后原子地替换out；文件中总是面板格式，索引作为列写入
+            out_format: "parquet"、"ipc"(Arrow IPC)或"dataset"(Parquet数据集目录)，
+                默认根据out的后缀推断(.parquet/.arrow/.feather，没有后缀为数据集目录)
 
         Returns:
-            包含因子数据的DataFrame
+            包含因子数据的DataFrame；给出out时返回输出路径，没有数据时不创建文件并返回None
+
+        Raises:
+            MemoryError: 估计的结果大小超出max_memory
+            RuntimeError: 多进程查询时某个分片失败(不返回缺少分片的结果)
         """
         # 确保factors和codes都是列表
         if isinstance(factors, str):
             factors = [factors]
         if isinstance(codes, str):
             codes = [codes]
+        prune_listing = self._get_option("prune_listing", prune_listing)
+        int_index = self._get_option("int_index", int_index)
 
-        # 初始化结果DataFrame
-        data = pd.DataFrame()
+        max_memory = self._get_option("max_memory", max_memory)
+        if out is not None:
+            processes = self._get_option("processes", processes)
 
-        # 按照配置对因子进行分组，具有相同配置的因子合并查询以节约查询次数
-        # 创建一个字典来存储每个查询函数对应的因子列表
-        func_factor_map = {}
-
-        # 遍历所有请求的因子
-        for factor in factors:
-            # 查找因子对应的配置
-            if factor in self.factor_config:
-                func = self.factor_config[factor]
-                # 将因子添加到对应的查询函数列表中
-                if func not in func_factor_map:
-                    func_factor_map[func] = []
-                func_factor_map[func].append(factor)
-            else:
-                # 如果因子没有配置，使用默认配置
-                func = self.factor_config.get("default", None)
-                if func:
-                    if func not in func_factor_map:
-                        func_factor_map[func] = []
-                    func_factor_map[func].append(factor)
+            def fetch(chunk, start, end):
+                # 文件中保存证券代码，读取时不依赖进程内的证券字典；
+                # 查询出错时抛出异常，不写出缺少数据的文件
+                return self._query_factors(
+                    factors,
+                    chunk,
+                    start,
+                    end,
+                    frequency,
+                    prune_listing,
+                    reexpand,
+                    processes,
+                    raise_errors=True,
+                )
 
-        # 对每组因子执行查询并将结果合并
-        for func, factor_group in func_factor_map.items():
-            try:
-                # 准备调用参数
-                kwargs = {
-                    "factors": factor_group,
-                    "codes": codes,
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "frequency": frequency,
-                }
+            return self._write_chunks(
+                out,
+                out_format,
+                factors,
+                codes,
+                start_time,
+                end_time,
+                frequency,
+                len(factors),
+                max_memory,
+                fetch,
+            )
 
-                # 如果该函数有额外参数配置，则添加这些参数
-                func_name = func.__name__
-                if func_name in FACTOR_EXTRA_PARAMS:
-                    # 获取允许的额外参数列表
-                    allowed_params = FACTOR_EXTRA_PARAMS[func_name]
-                    # 添加已设置的额外参数
-                    if func_name in self._extra_params:
-                        for param_name, param_value in self._extra_params[
-                            func_name
-                        ].items():
-                            # 只添加允许的参数
-                            if param_name in allowed_params:
-                                kwargs[param_name] = param_value
-                # 调用对应的查询函数
-                result = func(**kwargs)
-                # 如果返回了数据，则合并到主DataFrame中
-                if result is not None and not result.empty:
-                    if data.empty:
-                        data = result
-                    else:
-                        # 合并数据，基于索引进行合并
-                        data = data.merge(
-                            result, left_index=True, right_index=True, how="outer"
-                        )
-            except Exception as e:
-                # 如果某个查询出错，记录警告但继续处理其他因子
-                warnings.warn(f"Error fetching factors {factor_group}: {str(e)}")
+        if max_memory and start_time is not None and end_time is not None:
+            sessions = self._sessions(start_time, end_time)
+            estimate = estimate_bytes(
+                len(sessions), len(codes), len(factors), frequency
+            )
+            check_budget(estimate, max_memory)
+
+        processes = self._get_option("processes", processes)
+        data = self._query_factors(
+            factors,
+            codes,
+            start_time,
+            end_time,
+            frequency,
+            prune_listing,
+            reexpand,
+            processes,
+        )
 
         # 如果没有数据，返回空的DataFrame
         if data.empty:
             return data
 
+        if int_index:
+            data = to_int_index(data, rq_instrument_dictionary())
+
         # 根据panel参数决定返回的数据格式
         if not panel:
             # 转换为长格式
@@ -194,6 +586,297 @@ class RQDataApi(DataApi):
             data.columns = ["attribute", "value"]
         return data
 
+    def _query_factors(
+        self,
+        factors: List[str],
+        codes: List[str],
+        start_time,
+        end_time,
+        frequency: str,
+        prune_listing: bool,
+        reexpand: Optional[bool],
+        processes: int,
+        raise_errors: bool = False,
+    ) -> pd.DataFrame:
+        """
+        查询因子数据并返回面板格式的结果，get_factor的查询部分
+
+        Args:
+            raise_errors: 某组因子查询出错时是否抛出异常；默认只给出警告并继续查询
+                其他因子，结果中缺少出错的因子
+
+        Returns:
+            以(datetime, code)为索引的DataFrame
+        """
+        if processes > 1 and len(codes) > 1:
+            data = get_factor_in_processes(
+                self,
+                processes,
+                factors,
+                codes,
+                start_time=start_time,
+                end_time=end_time,
+                frequency=frequency,
+                prune_listing=prune_listing,
+                reexpand=reexpand,
+                raise_errors=raise_errors,
+            )
+            return self._apply_schema(data)
+
+        # 各组查询的结果，最后按索引一次性合并
+        results = []
+
+        # 按照配置对因子进行分组，具有相同配置的因子合并查询以节约查询次数
+        func_factor_map = self._group_factors(factors)
+
+        # 规划查询批次：裁剪时按上市区间将证券分批，否则只有一个批次
+        if prune_listing:
+            plan = plan_listing_windows(codes, start_time, end_time)
+        else:
+            plan = [(start_time, end_time, codes)]
+
+        # 对每组因子执行查询并将结果合并
+        for func, factor_group in func_factor_map.items():
+            try:
+                parts = []
+                for win_start, win_end, win_codes in plan:
+                    # 准备调用参数
+                    kwargs = {
+                        "factors": factor_group,
+                        "codes": win_codes,
+                        "start_time": win_start,
+                        "end_time": win_end,
+                        "frequency": frequency,
+                    }
+
+                    # 如果该函数有额外参数配置，则添加这些参数
+                    kwargs.update(self._get_extra_kwargs(func))
+                    # 调用对应的查询函数
+                    result = func(**kwargs)
+                    if result is not None and not result.empty:
+                        parts.append(result)
+                if not parts:
+                    continue
+                results.append(
+                    parts[0] if len(parts) == 1 else pd.concat(parts, axis=0)
+                )
+            except Exception as e:
+                if raise_errors:
+                    raise
+                # 如果某个查询出错，记录警告但继续处理其他因子
+                warnings.warn(f"Error fetching factors {factor_group}: {str(e)}")
+
+        # 按索引外连接各组结果，列类型按声明确定
+        data = self._join_results(results)
+
+        if prune_listing:
+            # 剔除对齐区间带来的上市前/退市后的行
+            data = trim_to_listing(data)
+            if self._get_option("reexpand", reexpand):
+                data = self._apply_schema(expand_to_request(data, codes))
+        return data
+
+    def _write_chunks(
+        self,
+        out: Union[str, Path],
+        out_format: Optional[str],
+        factors: List[str],
+        codes: List[str],
+        start_time,
+        end_time,
+        frequency: str,
+        n_columns: int,
+        max_memory: Optional[Union[int, str]],
+        fetch: Callable,
+    ) -> Optional[Path]:
+        """
+        分块查询并逐块写入out，内存占用只与块的大小有关
+
+        fetch查询出错时抛出异常，此时放弃写入，已存在的out不受影响。
+        """
+        from xqdata.writer import FrameWriter
+
+        budget = parse_size(max_memory) if max_memory else OUT_CHUNK_BYTES
+        if start_time is not None and end_time is not None:
+            sessions = self._sessions(start_time, end_time)
+            chunks = plan_chunks(sessions, codes, n_columns, frequency, budget)
+        else:
+            # 没有日期区间时无法估计，按固定数量的证券分块
+            chunks = [
+                (start_time, end_time, codes[i : i + 100])
+                for i in range(0, len(codes), 100)
+            ]
+
+        writer = FrameWriter(
+            out,
+            out_format,
+            columns=factors,
+            dtypes=schema_dtypes(factors, self._schema()),
+        )
+        try:
+            for start, end, chunk in chunks:
+                writer.write(fetch(chunk, start, end))
+        except BaseException:
+            writer.abort()
+            raise
+        path = writer.close()
+        if path is None:
+            warnings.warn(f"No data for factors {factors}. Nothing written to {out}.")
+        return path
+
+    def _sessions(self, start_time, end_time) -> pd.DatetimeIndex:
+        """估计内存使用的交易日，交易日历不可用时按工作日估计"""
+        try:
+            return self.get_tradedays(start_time, end_time)
+        except Exception:
+            return pd.bdate_range(start_time, end_time)
+
+    def get_factor_spilled(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        start_time: Union[str, datetime, date],
+        end_time: Union[str, datetime, date],
+        frequency: str = "D",
+        panel: bool = True,
+        max_memory: Optional[Union[int, str]] = None,
+        prune_listing: Optional[bool] = None,
+        reexpand: Optional[bool] = None,
+        processes: Optional[int] = None,
+        int_index: Optional[bool] = None,
+    ) -> SpilledResult:
+        """
+        按内存预算分块获取因子数据，每块写入临时Parquet文件后即释放，返回按需加载的结果
+
+        适用于结果超出内存的大查询(如大范围的分钟线)，可以按证券、日期区间和列加载
+        其中的一部分，或按月逐块遍历；需要pyarrow(xqdata[local])。
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+            frequency: 数据频率，默认为日频
+            panel: 加载时是否返回面板数据格式
+            max_memory: 每块查询的内存预算(字节数或"4GB"等)，None表示使用set_option设置的
+                全局值，都没有设置时为OUT_CHUNK_BYTES
+            prune_listing: 同get_factor
+            reexpand: 同get_factor
+            processes: 同get_factor
+            int_index: 同get_factor
+
+        Returns:
+            溢出到临时文件的SpilledResult，使用完毕后应close()
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        if isinstance(codes, str):
+            codes = [codes]
+        int_index = self._get_option("int_index", int_index)
+        max_memory = self._get_option("max_memory", max_memory)
+        budget = parse_size(max_memory) if max_memory else OUT_CHUNK_BYTES
+        sessions = self._sessions(start_time, end_time)
+        if len(sessions):
+            first, last = sessions[0], sessions[-1]
+        else:
+            first = self._parse_time_param(start_time)
+            last = self._parse_time_param(end_time)
+
+        def postprocess(data: pd.DataFrame) -> pd.DataFrame:
+            data = self._apply_schema(data)
+            if int_index:
+                data = to_int_index(data, rq_instrument_dictionary())
+            return data
+
+        result = SpilledResult(
+            factors,
+            codes,
+            first,
+            last,
+            panel=panel,
+            postprocess=postprocess,
+        )
+        try:
+            # 合并各组结果时的峰值约为结果的两倍，每块只用一半的预算
+            for start, end, chunk in plan_chunks(
+                sessions, codes, len(factors), frequency, budget // 2
+            ):
+                data = self.get_factor(
+                    factors,
+                    chunk,
+                    start,
+                    end,
+                    frequency=frequency,
+                    panel=True,
+                    int_index=False,
+                    max_memory=0,
+                    prune_listing=prune_listing,
+                    reexpand=reexpand,
+                    processes=processes,
+                )
+                if not data.empty:
+                    result.append(data)
+        except BaseException:
+            result.close()
+            raise
+        return result
+
+    def stream_price(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        start_time: Union[str, datetime, date],
+        end_time: Union[str, datetime, date],
+        root: str,
+        frequency: str = "min",
+        batch_size: int = 100,
+    ):
+        """
+        流式获取高频行情并写入按日分区的Parquet数据集，详见rq_stream_price
+
+        Args:
+            factors: 行情字段，可以是单个字符串或字符串列表
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始日期
+            end_time: 结束日期
+            root: 数据集根目录
+            frequency: 数据频率，默认为分钟("min")
+            batch_size: 每次请求的证券数量
+
+        Returns:
+            写入的ParquetStore
+        """
+        # pyarrow为可选依赖，只在使用时导入
+        from .stream import rq_stream_price
+
+        return rq_stream_price(
+            factors,
+            codes,
+            start_time,
+            end_time,
+            root,
+            frequency=frequency,
+            batch_size=batch_size,
+            **self._get_extra_kwargs(rq_get_price),
+        )
+
+    def get_latest(
+        self, fields: Union[str, List[str]], codes: Union[str, List[str]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        获取最新行情快照，用于盘中低延迟轮询，详见rq_get_latest
+
+        不经过get_factor的查询、合并和索引构造，直接从快照取值写入按字段缓存的数组。
+
+        Args:
+            fields: 快照字段，如"last"、"a1"、"b1"、"volume"
+            codes: 证券代码，可以是单个字符串或字符串列表
+
+        Returns:
+            字段 -> 与codes对齐的float64数组，另有"datetime"为快照时间
+        """
+        return rq_get_latest(self._latest, fields, codes)
+
     def get_dualkey_factor(
         self,
         factors: Union[str, List[str]],
@@ -203,7 +886,9 @@ class RQDataApi(DataApi):
         end_time: Optional[Union[str, datetime, date]] = None,
         frequency: str = "D",
         panel: bool = True,
-    ) -> pd.DataFrame:
+        out: Optional[Union[str, Path]] = None,
+        out_format: Optional[str] = None,
+    ) -> Union[pd.DataFrame, Path, None]:
         """
         获取双键因子数据（例如持仓、基差等）
 
@@ -215,9 +900,11 @@ class RQDataApi(DataApi):
             end_time: 结束时间
             frequency: 数据频率，默认为日频("D")
             panel: 是否返回面板数据格式
+            out: 输出路径，给出时按主键分块查询并逐块写入文件，见get_factor
+            out_format: "parquet"、"ipc"或"dataset"，默认根据out的后缀推断
 
         Returns:
-            包含双键因子数据的DataFrame
+            包含双键因子数据的DataFrame；给出out时返回输出路径，没有数据时返回None
         """
         # 确保参数都是列表
         if isinstance(factors, str):
@@ -229,29 +916,32 @@ class RQDataApi(DataApi):
         elif objects is None:
             objects = []
 
-        # 初始化结果DataFrame
-        data = pd.DataFrame()
+        if out is not None:
+
+            def fetch(chunk, start, end):
+                return self.get_dualkey_factor(
+                    factors, chunk, objects, start, end, frequency=frequency
+                )
+
+            return self._write_chunks(
+                out,
+                out_format,
+                factors,
+                codes,
+                start_time,
+                end_time,
+                frequency,
+                # 每个主键的行数随副键数量增长
+                len(factors) * max(len(objects), 1),
+                0,
+                fetch,
+            )
+
+        # 各组查询的结果，最后按索引一次性合并
+        results = []
 
         # 按照配置对因子进行分组，具有相同配置的因子合并查询以节约查询次数
-        # 创建一个字典来存储每个查询函数对应的因子列表
-        func_factor_map = {}
-
-        # 遍历所有请求的因子
-        for factor in factors:
-            # 查找因子对应的配置
-            if factor in self.factor_config:
-                func = self.factor_config[factor]
-                # 将因子添加到对应的查询函数列表中
-                if func not in func_factor_map:
-                    func_factor_map[func] = []
-                func_factor_map[func].append(factor)
-            else:
-                # 如果因子没有配置，使用默认配置
-                func = self.factor_config.get("default", None)
-                if func:
-                    if func not in func_factor_map:
-                        func_factor_map[func] = []
-                    func_factor_map[func].append(factor)
+        func_factor_map = self._group_factors(factors)
 
         # 对每组因子执行查询并将结果合并
         for func, factor_group in func_factor_map.items():
@@ -267,44 +957,25 @@ class RQDataApi(DataApi):
                 }
 
                 # 如果该函数有额外参数配置，则添加这些参数
-                func_name = func.__name__
-                if func_name in FACTOR_EXTRA_PARAMS:
-                    # 获取允许的额外参数列表
-                    allowed_params = FACTOR_EXTRA_PARAMS[func_name]
-                    # 添加已设置的额外参数
-                    if func_name in self._extra_params:
-                        for param_name, param_value in self._extra_params[
-                            func_name
-                        ].items():
-                            # 只添加允许的参数
-                            if param_name in allowed_params:
-                                kwargs[param_name] = param_value
+                kwargs.update(self._get_extra_kwargs(func))
 
                 # 特殊处理：对于双键因子，我们需要确保传入objects参数
                 # 检查函数是否接受objects参数
-                import inspect
-
-                sig = inspect.signature(func)
-                if "objects" not in sig.parameters:
+                if not self.routing.accepts_objects(func):
                     # 如果函数不接受objects参数，则从kwargs中移除
                     kwargs.pop("objects", None)
 
                 # 调用对应的查询函数
                 result = func(**kwargs)
 
-                # 如果返回了数据，则合并到主DataFrame中
-                if result is not None and not result.empty:
-                    if data.empty:
-                        data = result
-                    else:
-                        # 合并数据，基于索引进行合并
-                        data = data.merge(
-                            result, left_index=True, right_index=True, how="outer"
-                        )
+                results.append(result)
             except Exception as e:
                 # 如果某个查询出错，记录警告但继续处理其他因子
                 warnings.warn(f"Error fetching factors {factor_group}: {str(e)}")
 
+        # 按索引外连接各组结果，列类型按声明确定
+        data = self._join_results(results)
+
         # 如果没有数据，返回空的DataFrame
         if data.empty:
             return data
@@ -316,3 +987,97 @@ class RQDataApi(DataApi):
             data.columns = ["attribute", "value"]
 
         return data
+
+    def _resolve_universe(
+        self, universe: Optional[Union[str, List[str]]], date: pd.Timestamp
+    ) -> List[str]:
+        """
+        将universe解析为证券代码列表
+
+        Args:
+            universe: None(全部A股)、info类型(如"stock"/"etf")、指数代码、
+                单个证券代码或证券代码列表
+            date: 截面日期
+
+        Returns:
+            证券代码列表
+        """
+        if universe is None:
+            universe = "stock"
+        if not isinstance(universe, str):
+            return list(universe)
+
+        # info类型：使用缓存的全市场快照筛选当日上市的证券
+        config = self.info_config.get(universe)
+        if config is not None and config["func"] is rq_all_instruments:
+            return rq_listed_codes(
+                config["params"]["type"],
+                date,
+                market=config["params"].get("market", "cn"),
+            )
+
+        # 指数代码：取当日成分股
+        components = rq.index_components(universe, date=date)
+        if components:
+            return list(components)
+        return [universe]
+
+    def get_cross_section(
+        self,
+        factors: Union[str, List[str]],
+        date: Union[str, datetime, date],
+        universe: Optional[Union[str, List[str]]] = None,
+    ) -> pd.DataFrame:
+        """
+        获取单日全截面因子数据，适用于调仓等对延迟敏感的场景
+
+        每个查询函数只对全部证券调用一次，各组查询并发执行，
+        结果直接按code对齐拼接，不做逐日或逐只的循环与merge。
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            date: 截面日期
+            universe: None(全部A股，默认)、info类型(如"stock"/"etf")、
+                指数代码(如"000300.XSHG")或证券代码列表
+
+        Returns:
+            以code为索引、因子为列的DataFrame
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        date = pd.Timestamp(date)
+        codes = self._resolve_universe(universe, date)
+        if not codes:
+            return pd.DataFrame()
+
+        def fetch(func, factor_group):
+            kwargs = {
+                "factors": factor_group,
+                "codes": codes,
+                "start_time": date,
+                "end_time": date,
+                "frequency": "D",
+            }
+            kwargs.update(self._get_extra_kwargs(func))
+            try:
+                result = func(**kwargs)
+            except Exception as e:
+                warnings.warn(f"Error fetching factors {factor_group}: {str(e)}")
+                return None
+            if result is None or result.empty:
+                return None
+            # 只保留截面日期的数据并去掉datetime层级
+            result = result[result.index.get_level_values("datetime") == date]
+            return result.droplevel("datetime")
+
+        func_factor_map = self._group_factors(factors)
+        with ThreadPoolExecutor(max_workers=max(len(func_factor_map), 1)) as pool:
+            results = list(pool.map(lambda item: fetch(*item), func_factor_map.items()))
+        results = [r for r in results if r is not None]
+        if not results:
+            return pd.DataFrame()
+
+        data = pd.concat(results, axis=1)
+        data = data.loc[:, ~data.columns.duplicated()]
+        data = data.reindex(index=pd.Index(codes, name="code"), columns=factors)
+        return self._apply_schema(data)
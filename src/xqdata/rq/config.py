@@ -56,31 +56,6 @@ FACTOR_CONFIG = {
     "is_st": rq_is_st_stock,
     # 停牌
     "is_paused": rq_is_suspended,
-    # 行业
-    "citics_2019_l1": rq_get_instrument_industry,
-    "citics_2019_l1_name": rq_get_instrument_industry,
-    "citics_2019_l2": rq_get_instrument_industry,
-    "citics_2019_l2_name": rq_get_instrument_industry,
-    "citics_2019_l3": rq_get_instrument_industry,
-    "citics_2019_l3_name": rq_get_instrument_industry,
-    "citics_l1": rq_get_instrument_industry,
-    "citics_l1_name": rq_get_instrument_industry,
-    "citics_l2": rq_get_instrument_industry,
-    "citics_l2_name": rq_get_instrument_industry,
-    "citics_l3": rq_get_instrument_industry,
-    "citics_l3_name": rq_get_instrument_industry,
-    "sws_l1": rq_get_instrument_industry,
-    "sws_l1_name": rq_get_instrument_industry,
-    "sws_l2": rq_get_instrument_industry,
-    "sws_l2_name": rq_get_instrument_industry,
-    "sws_l3": rq_get_instrument_industry,
-    "sws_l3_name": rq_get_instrument_industry,
-    "hsi_l1": rq_get_instrument_industry,
-    "hsi_l1_name": rq_get_instrument_industry,
-    "hsi_l2": rq_get_instrument_industry,
-    "hsi_l2_name": rq_get_instrument_industry,
-    "hsi_l3": rq_get_instrument_industry,
-    "hsi_l3_name": rq_get_instrument_industry,
     # 行情因子
     "open": rq_get_price,
     "high": rq_get_price,
@@ -153,9 +128,61 @@ FACTOR_CONFIG = {
     "constituent_weight": rq_index_weights_ex,
 }
 
+# 按模式匹配的因子族，精确配置优先
+FACTOR_PATTERNS = {
+    # 行业: citics_l1, citics_2019_l2_name, sws_l3, hsi_l1_name 等
+    r"^(citics|citics_2019|sws|hsi)_l[1-3](_name)?$": rq_get_instrument_industry,
+}
+
+
+# 因子的声明类型，启用apply_schema选项时get_factor等按声明确定结果的列类型，
+# 使其不随分组合并和缺失值变化。
+# dtype为numpy类型名或"category"；nullable默认为True，可空的整数和布尔因子
+# 以Int64/boolean等可空类型返回；category可以给出固定的categories取值表；
+# 不可空的因子可以给出fill_value填充缺失值，否则有缺失值时抛出ValueError
+FACTOR_SCHEMA = {
+    "open": {"dtype": "float64"},
+    "high": {"dtype": "float64"},
+    "low": {"dtype": "float64"},
+    "close": {"dtype": "float64"},
+    "last": {"dtype": "float64"},
+    "prev_close": {"dtype": "float64"},
+    "limit_up": {"dtype": "float64"},
+    "limit_down": {"dtype": "float64"},
+    "total_turnover": {"dtype": "float64"},
+    "settlement": {"dtype": "float64"},
+    "prev_settlement": {"dtype": "float64"},
+    "volume": {"dtype": "int64"},
+    "num_trades": {"dtype": "int64"},
+    "open_interest": {"dtype": "int64"},
+    **{
+        f"{side}{level}_v": {"dtype": "int64"} for side in "ab" for level in range(1, 6)
+    },
+    "is_st": {"dtype": "bool"},
+    "is_paused": {"dtype": "bool"},
+}
+
 
 FACTOR_EXTRA_PARAMS = {
-    "rq_get_price": ["skip_suspended", "market"],
+    "rq_get_price": ["skip_suspended", "market", "local_adjust"],
     "rq_get_factor_exposure": ["industry_mapping", "model", "market"],
     "rq_get_shares": ["market"],
 }
+
+
+# 全局选项默认值，可通过RQDataApi.set_option修改
+DEFAULT_OPTIONS = {
+    # 按上市/退市日期裁剪每个证券的查询区间
+    "prune_listing": False,
+    # 裁剪后将结果重新展开为 时间 x 全部请求证券 的形状
+    "reexpand": False,
+    # 大批量查询时按证券分片并行的进程数，0或1表示在当前进程中查询
+    "processes": 0,
+    # 以(int64时间戳, int32证券id)为索引返回结果，见xqdata.instruments
+    "int_index": False,
+    # 按FACTOR_SCHEMA(及set_factor_schema)的声明转换结果的列类型；默认保留数据源返回的
+    # numpy类型，启用后可空的整数和布尔因子以Int64/boolean等可空类型返回
+    "apply_schema": False,
+    # 结果的内存预算(字节数或"4GB"等)，None或0表示不限制
+    "max_memory": None,
+}
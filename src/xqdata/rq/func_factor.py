@@ -5,8 +5,16 @@ from typing import List, Optional, Union
 import pandas as pd
 import rqdatac as rq
 
+from xqdata.resample import get_base_frequency, resample_bars
+
+from .adjust import adjust_prices, get_ex_factor_store, split_adjusted_factors
+from .index_weights import fetch_index_weights, get_index_weight_store
+from .intervals import get_flag_store
 from .utils import rename_columns
 
+# Pattern to match industry factors: (citics|citics_2019|sws|hsi)_l(level)
+INDUSTRY_PATTERN = re.compile(r"^(citics_2019|citics|sws|hsi)_l(\d)")
+
 
 def rq_get_price(
     factors: Union[str, List[str]],
@@ -14,6 +22,8 @@ def rq_get_price(
     start_time: Optional[Union[str, datetime, date]] = None,
     end_time: Optional[Union[str, datetime, date]] = None,
     frequency: str = "D",
+    filter_range: bool = True,
+    local_adjust: bool = True,
     **kwargs,
 ) -> pd.DataFrame:
     # Ensure factors is a list
@@ -22,6 +32,44 @@ def rq_get_price(
     if isinstance(codes, str):
         codes = [codes]
 
+    # Weekly/monthly/quarterly and multi-minute bars are built locally
+    # from a single daily or 1-minute fetch
+    base_frequency = get_base_frequency(frequency)
+    if base_frequency is not None:
+        data = rq_get_price(
+            factors,
+            codes,
+            start_time,
+            end_time,
+            frequency=base_frequency,
+            filter_range=filter_range,
+            local_adjust=local_adjust,
+            **kwargs,
+        )
+        return resample_bars(data, frequency)
+
+    # Fetch unadjusted bars once and derive the _post/_pre fields locally
+    # from cached ex-factors instead of one request per adjust type
+    base_fields, adjusted = split_adjusted_factors(factors)
+    if local_adjust and adjusted and frequency != "tick":
+        data = _get_price_internal(
+            codes,
+            start_time,
+            end_time,
+            frequency=frequency,
+            fields=base_fields,
+            adjust_type="none",
+            filter_range=filter_range,
+            **kwargs,
+        )
+        if data.empty:
+            return data
+        data = data.set_index(["datetime", "code"])
+        store = get_ex_factor_store()
+        store.update(codes)
+        data = pd.concat([data, adjust_prices(data, adjusted, store)], axis=1)
+        return data[list(dict.fromkeys(factors))]
+
     # Initialize result dataframe
     data = pd.DataFrame()
 
@@ -39,6 +87,7 @@ def rq_get_price(
             frequency=frequency,
             fields=price_factors,
             adjust_type="none",
+            filter_range=filter_range,
             **kwargs,
         )
         if not price_data.empty:
@@ -63,6 +112,7 @@ def rq_get_price(
                 frequency=frequency,
                 fields=fields,
                 adjust_type=adjust_type,
+                filter_range=filter_range,
                 **kwargs,
             )
 
@@ -100,6 +150,7 @@ def _get_price_internal(
     frequency: str,
     fields: List[str],
     adjust_type: str,
+    filter_range: bool = True,
     **kwargs,
 ) -> pd.DataFrame:
     """Internal helper function to get price data from RQData"""
@@ -137,7 +188,7 @@ def _get_price_internal(
     rename_columns(data)
 
     # Filter by actual date range
-    if start_time and end_time:
+    if filter_range and start_time and end_time:
         data = data[(data.datetime >= start_time) & (data.datetime <= end_time)]
 
     return data
@@ -195,6 +246,11 @@ def rq_is_suspended(
     # args map
     if isinstance(codes, str):
         codes = [codes]
+    # 指定了完整区间时使用区间存储：增量获取并展开为逐日格式
+    if start_time is not None and end_time is not None and not kwargs:
+        store = get_flag_store("is_paused")
+        store.update(codes, start_time, end_time)
+        return store.to_frame(codes, start_time, end_time)
     # get_data
     data: pd.DataFrame = rq.is_suspended(
         order_book_ids=codes, start_date=start_time, end_date=end_time, **kwargs
@@ -217,6 +273,11 @@ def rq_is_st_stock(
     # args map
     if isinstance(codes, str):
         codes = [codes]
+    # 指定了完整区间时使用区间存储：增量获取并展开为逐日格式
+    if start_time is not None and end_time is not None and not kwargs:
+        store = get_flag_store("is_st")
+        store.update(codes, start_time, end_time)
+        return store.to_frame(codes, start_time, end_time)
     data: pd.DataFrame = rq.is_st_stock(
         codes,
         start_time,
@@ -244,21 +305,16 @@ def rq_get_instrument_industry(
     if isinstance(factors, str):
         factors = [factors]
 
-    # Pattern to match industry factors: (citics|gildata|citics_2019)_l(level)
-    pattern = r"^(citics|citics_2019|sws|hsi)_l(\d)"
-
-    # Extract industry and level from factors
-    query_industry = [
-        (re.findall(pattern, f)[0][0], int(re.findall(pattern, f)[0][1]))
-        for f in factors
-        if len(re.findall(pattern, f)) > 0
-    ]
+    # Extract industry and level from factors, e.g. citics_2019_l2_name
+    query_industry = set()
+    for f in factors:
+        match = INDUSTRY_PATTERN.match(f)
+        if match:
+            query_industry.add((match.group(1), int(match.group(2))))
 
     # If no valid industry factors found, return empty DataFrame
     if len(query_industry) == 0:
         return pd.DataFrame()
-
-    query_industry = set(query_industry)  # Remove duplicates
     # Collect data for each industry and level combination
     temp_df = []
     for industry, level in query_industry:
@@ -371,15 +427,26 @@ def rq_index_weights_ex(
     if isinstance(codes, str):
         codes = [codes]
 
+    # 指定了完整区间时使用本地权重存储：只获取未缓存的区间，各指数并发获取
+    if start_time is not None and end_time is not None and not kwargs:
+        store = get_index_weight_store()
+        store.update(codes, start_time, end_time)
+        return store.to_frame(codes, start_time, end_time)
+
     # get_data
-    def get_single_data(code):
-        data: pd.DataFrame = rq.index_weights_ex(
-            order_book_id=code, start_date=start_time, end_date=end_time, **kwargs
-        ).reset_index()
+    def get_single_data(code, data):
         data["code"] = code
         return data
 
-    data: pd.DataFrame = pd.concat([get_single_data(code) for code in codes], axis=0)
+    data: pd.DataFrame = pd.concat(
+        [
+            get_single_data(code, data)
+            for code, data in fetch_index_weights(
+                codes, start_time, end_time, **kwargs
+            ).items()
+        ],
+        axis=0,
+    )
     data.rename(
         columns={
             "order_book_id": "object",
@@ -1,6 +1,11 @@
+from functools import lru_cache
+from typing import Optional
+
 import pandas as pd
 import rqdatac as rq
 
+from xqdata.instruments import InstrumentDictionary, default_dictionary
+
 from .utils import rename_columns
 
 
@@ -37,3 +42,81 @@ def rq_all_instruments(
     data["listed_date"] = pd.to_datetime(data["listed_date"])
     data["de_listed_date"] = pd.to_datetime(data["de_listed_date"])
     return data
+
+
+@lru_cache(maxsize=None)
+def _instrument_table(type: Optional[str], market: str = "cn") -> pd.DataFrame:
+    """缓存的全市场证券列表快照，同一进程内每个(type, market)只请求一次"""
+    return rq_all_instruments(type, market=market)
+
+
+def rq_listed_codes(type: str, date, market: str = "cn") -> list:
+    """
+    基于缓存的全市场快照，返回date当日处于上市状态的证券代码
+
+    上市状态为listed_date <= date < de_listed_date，退市日当天不再交易，
+    与planner.trim_to_listing一致。
+
+    Args:
+        type: 证券类型，同rq_all_instruments
+        date: 查询日期
+        market: 市场，默认为"cn"
+
+    Returns:
+        证券代码列表
+    """
+    data = _instrument_table(type, market)
+    date = pd.Timestamp(date)
+    listed = (data["listed_date"] <= date) & (data["de_listed_date"] > date)
+    return data.loc[listed, "code"].tolist()
+
+
+def rq_listing_dates(codes: list, market: str = "cn") -> pd.DataFrame:
+    """
+    基于缓存的全市场快照，获取证券的上市日期和退市日期
+
+    Args:
+        codes: 证券代码列表
+        market: 市场，默认为"cn"
+
+    Returns:
+        以code为索引、包含listed_date和de_listed_date两列的DataFrame，
+        找不到的证券对应NaT
+    """
+    return _listing_table(market).reindex(codes)
+
+
+@lru_cache(maxsize=None)
+def _listing_table(market: str = "cn") -> pd.DataFrame:
+    """缓存的 code -> (listed_date, de_listed_date) 查找表，覆盖全部证券类型"""
+    data = _instrument_table(None, market)
+    data = data.drop_duplicates("code", keep="last").set_index("code")
+    return data[["listed_date", "de_listed_date"]]
+
+
+@lru_cache(maxsize=None)
+def rq_instrument_dictionary(market: str = "cn") -> InstrumentDictionary:
+    """
+    用全市场(全部证券类型)的证券列表初始化进程内共享的证券字典，每个市场只初始化一次
+
+    Args:
+        market: 市场，默认为"cn"
+
+    Returns:
+        进程内共享的证券字典
+    """
+    dictionary = default_dictionary()
+    dictionary.update(_instrument_table(None, market)["code"])
+    return dictionary
+
+
+def clear_instrument_cache():
+    """
+    清空缓存的全市场证券列表快照，下次使用时重新请求
+
+    长时间运行的进程中有新股上市或退市时调用(RQDataApi.refresh_info会调用它)；
+    证券字典中已分配的id不变，新证券在下次初始化时追加。
+    """
+    _instrument_table.cache_clear()
+    _listing_table.cache_clear()
+    rq_instrument_dictionary.cache_clear()
@@ -0,0 +1,332 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import rqdatac as rq
+
+from .utils import covered_end, get_cache_dir, load_store, save_store
+
+
+def fetch_index_weights(
+    codes: List[str],
+    start_time: Optional[Union[str, datetime, date]] = None,
+    end_time: Optional[Union[str, datetime, date]] = None,
+    max_workers: int = 8,
+    **kwargs,
+) -> Dict[str, pd.DataFrame]:
+    """
+    并发获取多个指数的成分权重
+
+    Args:
+        codes: 指数代码列表
+        start_time: 开始时间
+        end_time: 结束时间
+        max_workers: 最大并发数
+        **kwargs: 传递给rq.index_weights_ex的其他参数
+
+    Returns:
+        指数代码 -> 包含date/order_book_id/weight三列的DataFrame
+    """
+
+    def get_single_data(code):
+        data = rq.index_weights_ex(
+            order_book_id=code, start_date=start_time, end_date=end_time, **kwargs
+        )
+        if data is None or data.empty:
+            return code, pd.DataFrame(columns=["date", "order_book_id", "weight"])
+        return code, data.reset_index()
+
+    with ThreadPoolExecutor(max_workers=max(min(max_workers, len(codes)), 1)) as pool:
+        return dict(pool.map(get_single_data, codes))
+
+
+def _compress(data: pd.DataFrame) -> dict:
+    """
+    将逐日重复的权重数据压缩为只包含权重变化日的权重向量
+
+    Args:
+        data: 包含date/order_book_id/weight三列的DataFrame
+
+    Returns:
+        {"sessions": 交易日数组, "dates": 变化日数组, "codes": [代码数组], "weights": [权重数组]}
+    """
+    entry = {"sessions": [], "dates": [], "codes": [], "weights": []}
+    if data.empty:
+        return entry
+    data = data.sort_values(["date", "order_book_id"])
+    for session, group in data.groupby("date", sort=True):
+        codes = group["order_book_id"].to_numpy(dtype=object)
+        weights = group["weight"].to_numpy(dtype=np.float64)
+        entry["sessions"].append(pd.Timestamp(session))
+        if entry["codes"] and _same_vector(
+            entry["codes"][-1], entry["weights"][-1], codes, weights
+        ):
+            continue
+        entry["dates"].append(pd.Timestamp(session))
+        entry["codes"].append(codes)
+        entry["weights"].append(weights)
+    return entry
+
+
+def _same_vector(codes_a, weights_a, codes_b, weights_b) -> bool:
+    return (
+        len(codes_a) == len(codes_b)
+        and (codes_a == codes_b).all()
+        and np.array_equal(weights_a, weights_b, equal_nan=True)
+    )
+
+
+class IndexWeightStore:
+    """
+    指数成分权重的本地存储
+
+    每个指数只保存权重发生变化的日期(调仓日)的权重向量以及覆盖的交易日，
+    支持任意日期的as-of权重查询和区间成分股矩阵查询，数据持久化到本地缓存目录，
+    已覆盖的区间可以离线查询，新区间按需增量获取。
+    """
+
+    # 持久化数据的格式版本，格式变化时递增
+    VERSION = 1
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        max_workers: int = 8,
+        fetch_func: Optional[
+            Callable[[str, pd.Timestamp, pd.Timestamp], pd.DataFrame]
+        ] = None,
+    ):
+        """
+        Args:
+            path: 持久化文件路径，默认为缓存目录下的index_weights.pkl
+            max_workers: 获取数据时的最大并发数
+            fetch_func: 获取单个指数权重的函数，参数为(code, start, end)，
+                返回包含date/order_book_id/weight三列的DataFrame，默认请求RQData
+        """
+        self.path = Path(path) if path else get_cache_dir() / "index_weights.pkl"
+        self.max_workers = max_workers
+        self.fetch_func = fetch_func or (
+            lambda code, start, end: fetch_index_weights([code], start, end)[code]
+        )
+        self._lock = threading.Lock()
+        self._data: Dict[str, dict] = load_store(self.path, self.VERSION) or {}
+
+    def save(self):
+        """原子地将数据写入持久化文件"""
+        save_store(self.path, self.VERSION, self._data)
+
+    def update(
+        self,
+        codes: Union[str, List[str]],
+        start_time: Union[str, datetime, date],
+        end_time: Union[str, datetime, date],
+    ):
+        """
+        确保指数在[start_time, end_time]内的权重已缓存，只获取未覆盖的区间
+
+        Args:
+            codes: 指数代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+        """
+        if isinstance(codes, str):
+            codes = [codes]
+        start, end = pd.Timestamp(start_time), pd.Timestamp(end_time)
+        one_day = pd.Timedelta(days=1)
+
+        # 计算每个指数缺失的区间
+        tasks = []
+        for code in codes:
+            entry = self._data.get(code)
+            if entry is None:
+                tasks.append((code, start, end))
+                continue
+            if start < entry["start"]:
+                tasks.append((code, start, entry["start"] - one_day))
+            if end > entry["end"]:
+                tasks.append((code, entry["end"] + one_day, end))
+        if not tasks:
+            return
+
+        def fetch(task):
+            code, task_start, task_end = task
+            return task, self.fetch_func(code, task_start, task_end)
+
+        with ThreadPoolExecutor(
+            max_workers=max(min(self.max_workers, len(tasks)), 1)
+        ) as pool:
+            results = list(pool.map(fetch, tasks))
+
+        with self._lock:
+            for (code, task_start, task_end), data in results:
+                last = pd.to_datetime(data["date"]).max() if len(data) else None
+                # 最近的日期只覆盖到已发布的数据，之后的调仓在下次更新时获取
+                task_end = covered_end(task_start, task_end, last)
+                self._merge(code, _compress(data), task_start, task_end)
+            self.save()
+
+    def _merge(self, code: str, new: dict, start: pd.Timestamp, end: pd.Timestamp):
+        """将新获取区间的压缩数据合并到已有数据中"""
+        old = self._data.get(code) or {
+            "start": start,
+            "end": end,
+            **_compress(pd.DataFrame()),
+        }
+        sessions = sorted(set(old["sessions"]) | set(new["sessions"]))
+        changes = sorted(
+            list(zip(old["dates"], old["codes"], old["weights"]))
+            + list(zip(new["dates"], new["codes"], new["weights"])),
+            key=lambda item: item[0],
+        )
+        entry = {
+            "start": min(old["start"], start),
+            "end": max(old["end"], end),
+            "sessions": sessions,
+            "dates": [],
+            "codes": [],
+            "weights": [],
+        }
+        for change_date, codes, weights in changes:
+            if entry["codes"] and _same_vector(
+                entry["codes"][-1], entry["weights"][-1], codes, weights
+            ):
+                continue
+            entry["dates"].append(change_date)
+            entry["codes"].append(codes)
+            entry["weights"].append(weights)
+        self._data[code] = entry
+
+    def _positions(self, code: str, dates) -> np.ndarray:
+        """as-of查找每个日期对应的权重向量位置，-1表示该日期之前没有数据"""
+        change_dates = pd.DatetimeIndex(self._data[code]["dates"])
+        return change_dates.searchsorted(pd.DatetimeIndex(dates), side="right") - 1
+
+    def _sessions(self, code: str, start_time=None, end_time=None) -> pd.DatetimeIndex:
+        sessions = pd.DatetimeIndex(self._data[code]["sessions"])
+        if start_time is not None:
+            sessions = sessions[sessions >= pd.Timestamp(start_time)]
+        if end_time is not None:
+            sessions = sessions[sessions <= pd.Timestamp(end_time)]
+        return sessions
+
+    def weights(self, code: str, date: Union[str, datetime, date]) -> pd.Series:
+        """
+        获取指数在任意日期的成分权重(as-of最近一次调仓)
+
+        Args:
+            code: 指数代码
+            date: 查询日期
+
+        Returns:
+            以成分股代码为索引的权重Series，没有数据时为空Series
+        """
+        if code not in self._data:
+            return pd.Series(dtype=np.float64, name="constituent_weight")
+        pos = self._positions(code, [pd.Timestamp(date)])[0]
+        if pos < 0:
+            return pd.Series(dtype=np.float64, name="constituent_weight")
+        entry = self._data[code]
+        return pd.Series(
+            entry["weights"][pos],
+            index=pd.Index(entry["codes"][pos], name="object"),
+            name="constituent_weight",
+        )
+
+    def membership(
+        self,
+        code: str,
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+    ) -> pd.DataFrame:
+        """
+        获取指数在区间内每个交易日的成分股矩阵
+
+        Args:
+            code: 指数代码
+            start_time: 开始时间，默认为已缓存的最早日期
+            end_time: 结束时间，默认为已缓存的最晚日期
+
+        Returns:
+            交易日 x 成分股 的布尔DataFrame
+        """
+        if code not in self._data:
+            return pd.DataFrame(dtype=bool)
+        entry = self._data[code]
+        sessions = self._sessions(code, start_time, end_time)
+        positions = self._positions(code, sessions)
+        used = np.unique(positions[positions >= 0])
+        columns = pd.Index(
+            np.unique(np.concatenate([entry["codes"][p] for p in used]))
+            if len(used)
+            else [],
+            name="object",
+        )
+        # 每个权重向量一行，再按as-of位置取行
+        bitmap = np.zeros((len(entry["codes"]) + 1, len(columns)), dtype=bool)
+        for p in used:
+            bitmap[p, columns.get_indexer(entry["codes"][p])] = True
+        return pd.DataFrame(
+            bitmap[positions], index=sessions.rename("datetime"), columns=columns
+        )
+
+    def to_frame(
+        self,
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+    ) -> pd.DataFrame:
+        """
+        将缓存的权重展开为与rq_index_weights_ex相同的逐日格式
+
+        Args:
+            codes: 指数代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            以(datetime, code, object)为索引、包含constituent_weight列的DataFrame
+        """
+        if isinstance(codes, str):
+            codes = [codes]
+        frames = []
+        for code in codes:
+            if code not in self._data:
+                continue
+            entry = self._data[code]
+            sessions = self._sessions(code, start_time, end_time)
+            positions = self._positions(code, sessions)
+            valid = positions >= 0
+            sessions, positions = sessions[valid], positions[valid]
+            lengths = np.array([len(entry["codes"][p]) for p in positions], dtype=int)
+            if lengths.sum() == 0:
+                continue
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "datetime": np.repeat(sessions.values, lengths),
+                        "code": code,
+                        "object": np.concatenate(
+                            [entry["codes"][p] for p in positions]
+                        ),
+                        "constituent_weight": np.concatenate(
+                            [entry["weights"][p] for p in positions]
+                        ),
+                    }
+                )
+            )
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=0, ignore_index=True).set_index(
+            ["datetime", "code", "object"]
+        )
+
+
+@lru_cache(maxsize=None)
+def get_index_weight_store() -> IndexWeightStore:
+    """获取进程内共享的指数权重存储"""
+    return IndexWeightStore()
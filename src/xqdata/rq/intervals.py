@@ -0,0 +1,321 @@
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import rqdatac as rq
+
+from .utils import covered_end, get_cache_dir, load_store, save_store
+
+
+def panel_to_intervals(
+    panel: pd.DataFrame,
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    将 交易日 x 证券 的布尔面板转换为每个证券的区间表示
+
+    Args:
+        panel: 以交易日为索引、证券代码为列的布尔DataFrame，NaN视为False
+
+    Returns:
+        证券代码 -> (区间开始日期数组, 区间结束日期数组)，区间两端均为闭区间
+    """
+    dates = pd.DatetimeIndex(panel.index).values
+    values = panel.fillna(False).to_numpy(dtype=bool).astype(np.int8)
+    padded = np.zeros((values.shape[0] + 2, values.shape[1]), dtype=np.int8)
+    padded[1:-1] = values
+    diff = np.diff(padded, axis=0)
+    # 按列取出区间的开始行和结束行，行号均已排序
+    start_cols, start_rows = np.nonzero(diff.T == 1)
+    end_cols, end_rows = np.nonzero(diff.T == -1)
+    result = {}
+    bounds = np.searchsorted(start_cols, np.arange(values.shape[1] + 1))
+    for col, code in enumerate(panel.columns):
+        lo, hi = bounds[col], bounds[col + 1]
+        result[code] = (dates[start_rows[lo:hi]], dates[end_rows[lo:hi] - 1])
+    return result
+
+
+class IntervalFlagStore:
+    """
+    ST、停牌等布尔标记的区间存储
+
+    每个证券只保存标记为True的连续区间(按开始日期排序的开始/结束日期数组)，
+    而不是逐日的布尔面板；支持向量化的as-of查询和区间查询，数据持久化到本地缓存目录，
+    并按证券增量获取未覆盖的日期区间，需要时再展开回逐日面板格式。
+    """
+
+    # 持久化数据的格式版本，格式变化时递增
+    VERSION = 1
+
+    def __init__(
+        self,
+        name: str,
+        fetch_func: Callable[[List[str], pd.Timestamp, pd.Timestamp], pd.DataFrame],
+        path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Args:
+            name: 标记名称，例如"is_st"，同时作为展开后的列名
+            fetch_func: 获取数据的函数，参数为(codes, start, end)，
+                返回以交易日为索引、证券代码为列的布尔DataFrame
+            path: 持久化文件路径，默认为缓存目录下的{name}_intervals.pkl
+        """
+        self.name = name
+        self.fetch_func = fetch_func
+        self.path = Path(path) if path else get_cache_dir() / f"{name}_intervals.pkl"
+        self._lock = threading.Lock()
+        # 证券代码 -> (开始日期数组, 结束日期数组)
+        self._intervals: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # 证券代码 -> (已覆盖的开始时间, 已覆盖的结束时间)
+        self._coverage: Dict[str, Tuple[pd.Timestamp, pd.Timestamp]] = {}
+        # 已知的交易日
+        self._sessions = pd.DatetimeIndex([])
+        saved = load_store(self.path, self.VERSION)
+        if saved is not None:
+            self._intervals, self._coverage, self._sessions = saved
+
+    def save(self):
+        """原子地将数据写入持久化文件"""
+        save_store(
+            self.path, self.VERSION, (self._intervals, self._coverage, self._sessions)
+        )
+
+    def update(
+        self,
+        codes: Union[str, List[str]],
+        start_time: Union[str, datetime, date],
+        end_time: Union[str, datetime, date],
+    ):
+        """
+        确保证券在[start_time, end_time]内的标记已缓存，只获取未覆盖的区间
+
+        Args:
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+        """
+        if isinstance(codes, str):
+            codes = [codes]
+        start, end = pd.Timestamp(start_time), pd.Timestamp(end_time)
+        one_day = pd.Timedelta(days=1)
+
+        # 计算每个证券缺失的区间，缺失区间相同的证券合并为一次查询
+        tasks = {}
+        for code in codes:
+            coverage = self._coverage.get(code)
+            if coverage is None:
+                tasks.setdefault((start, end), []).append(code)
+                continue
+            if start < coverage[0]:
+                tasks.setdefault((start, coverage[0] - one_day), []).append(code)
+            if end > coverage[1]:
+                tasks.setdefault((coverage[1] + one_day, end), []).append(code)
+        if not tasks:
+            return
+
+        with self._lock:
+            for (task_start, task_end), task_codes in tasks.items():
+                panel = self.fetch_func(task_codes, task_start, task_end)
+                if panel is None:
+                    panel = pd.DataFrame()
+                panel = panel.reindex(columns=task_codes)
+                self._sessions = self._sessions.union(pd.DatetimeIndex(panel.index))
+                # 最近的日期只覆盖到已发布的交易日，之后的日期在下次更新时获取
+                last = pd.DatetimeIndex(panel.index).max() if len(panel) else None
+                covered = covered_end(task_start, task_end, last)
+                for code, (starts, ends) in panel_to_intervals(panel).items():
+                    self._merge(code, starts, ends, task_start, covered)
+            self.save()
+
+    def _merge(self, code, starts, ends, start: pd.Timestamp, end: pd.Timestamp):
+        """合并新获取区间的标记区间，首尾相邻(中间没有交易日)的区间会被连接"""
+        old_starts, old_ends = self._intervals.get(
+            code, (np.array([], dtype=starts.dtype), np.array([], dtype=ends.dtype))
+        )
+        all_starts = np.concatenate([old_starts, starts])
+        all_ends = np.concatenate([old_ends, ends])
+        order = np.argsort(all_starts, kind="stable")
+        all_starts, all_ends = all_starts[order], all_ends[order]
+
+        merged_starts, merged_ends = [], []
+        sessions = self._sessions.values
+        for s, e in zip(all_starts, all_ends):
+            if merged_ends:
+                # 上一个区间结束后的下一个交易日
+                next_pos = np.searchsorted(sessions, merged_ends[-1], side="right")
+                next_session = sessions[next_pos] if next_pos < len(sessions) else None
+                if next_session is not None and s <= next_session:
+                    merged_ends[-1] = max(merged_ends[-1], e)
+                    continue
+            merged_starts.append(s)
+            merged_ends.append(e)
+        self._intervals[code] = (
+            np.array(merged_starts, dtype="datetime64[ns]"),
+            np.array(merged_ends, dtype="datetime64[ns]"),
+        )
+
+        coverage = self._coverage.get(code, (start, end))
+        self._coverage[code] = (min(coverage[0], start), max(coverage[1], end))
+
+    def _flatten(self, codes: List[str]):
+        """将指定证券的区间拼接为扁平数组：(区间所属证券序号, 开始日期, 结束日期)"""
+        code_ids, starts, ends = [], [], []
+        for i, code in enumerate(codes):
+            code_starts, code_ends = self._intervals.get(code, ([], []))
+            code_ids.append(np.full(len(code_starts), i, dtype=np.int64))
+            starts.append(np.asarray(code_starts, dtype="datetime64[ns]"))
+            ends.append(np.asarray(code_ends, dtype="datetime64[ns]"))
+        if not code_ids:
+            empty = np.array([], dtype="datetime64[ns]")
+            return np.array([], dtype=np.int64), empty, empty
+        return np.concatenate(code_ids), np.concatenate(starts), np.concatenate(ends)
+
+    def asof(
+        self, codes: Union[str, List[str]], date: Union[str, datetime, date]
+    ) -> pd.Series:
+        """
+        查询证券在某一日期是否处于标记状态
+
+        Args:
+            codes: 证券代码，可以是单个字符串或字符串列表
+            date: 查询日期
+
+        Returns:
+            以证券代码为索引的布尔Series
+        """
+        if isinstance(codes, str):
+            codes = [codes]
+        code_ids, starts, ends = self._flatten(codes)
+        date = np.datetime64(pd.Timestamp(date), "ns")
+        hit = (starts <= date) & (ends >= date)
+        flags = np.bincount(code_ids[hit], minlength=len(codes)) > 0
+        return pd.Series(flags, index=pd.Index(codes, name="code"), name=self.name)
+
+    def any_between(
+        self,
+        codes: Union[str, List[str]],
+        start_time: Union[str, datetime, date],
+        end_time: Union[str, datetime, date],
+    ) -> pd.Series:
+        """
+        查询证券在[start_time, end_time]内是否有任意一天处于标记状态
+
+        Args:
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            以证券代码为索引的布尔Series
+        """
+        if isinstance(codes, str):
+            codes = [codes]
+        code_ids, starts, ends = self._flatten(codes)
+        start = np.datetime64(pd.Timestamp(start_time), "ns")
+        end = np.datetime64(pd.Timestamp(end_time), "ns")
+        hit = (starts <= end) & (ends >= start)
+        flags = np.bincount(code_ids[hit], minlength=len(codes)) > 0
+        return pd.Series(flags, index=pd.Index(codes, name="code"), name=self.name)
+
+    def spells(self, code: str) -> pd.DataFrame:
+        """
+        获取单个证券的全部标记区间
+
+        Args:
+            code: 证券代码
+
+        Returns:
+            包含start/end两列的DataFrame
+        """
+        starts, ends = self._intervals.get(code, ([], []))
+        return pd.DataFrame(
+            {
+                "start": pd.DatetimeIndex(starts),
+                "end": pd.DatetimeIndex(ends),
+            }
+        )
+
+    def to_panel(
+        self,
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+    ) -> pd.DataFrame:
+        """
+        将区间展开为 交易日 x 证券 的布尔面板
+
+        Args:
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            以交易日为索引、证券代码为列的布尔DataFrame
+        """
+        if isinstance(codes, str):
+            codes = [codes]
+        sessions = self._sessions
+        if start_time is not None:
+            sessions = sessions[sessions >= pd.Timestamp(start_time)]
+        if end_time is not None:
+            sessions = sessions[sessions <= pd.Timestamp(end_time)]
+
+        # 差分数组：区间开始行+1，结束后一行-1，按行累加即为是否处于标记状态
+        code_ids, starts, ends = self._flatten(codes)
+        start_rows = sessions.searchsorted(starts, side="left")
+        end_rows = sessions.searchsorted(ends, side="right")
+        diff = np.zeros((len(sessions) + 1, len(codes)), dtype=np.int32)
+        np.add.at(diff, (start_rows, code_ids), 1)
+        np.add.at(diff, (end_rows, code_ids), -1)
+        flags = np.cumsum(diff[:-1], axis=0) > 0
+        return pd.DataFrame(
+            flags,
+            index=sessions.rename("datetime"),
+            columns=pd.Index(codes, name="code"),
+        )
+
+    def to_frame(
+        self,
+        codes: Union[str, List[str]],
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+    ) -> pd.DataFrame:
+        """
+        展开为与rq_is_st_stock/rq_is_suspended相同的长格式
+
+        Args:
+            codes: 证券代码，可以是单个字符串或字符串列表
+            start_time: 开始时间
+            end_time: 结束时间
+
+        Returns:
+            以(datetime, code)为索引、包含name列的DataFrame
+        """
+        panel = self.to_panel(codes, start_time, end_time)
+        data = panel.stack()
+        data.name = self.name
+        return data.to_frame()
+
+
+def _fetch_is_st(codes, start, end) -> pd.DataFrame:
+    return rq.is_st_stock(codes, start, end)
+
+
+def _fetch_is_suspended(codes, start, end) -> pd.DataFrame:
+    return rq.is_suspended(order_book_ids=codes, start_date=start, end_date=end)
+
+
+@lru_cache(maxsize=None)
+def get_flag_store(name: str) -> IntervalFlagStore:
+    """
+    获取进程内共享的标记区间存储
+
+    Args:
+        name: "is_st"或"is_paused"
+    """
+    fetch_funcs = {"is_st": _fetch_is_st, "is_paused": _fetch_is_suspended}
+    return IntervalFlagStore(name, fetch_funcs[name])
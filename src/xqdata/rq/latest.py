@@ -0,0 +1,217 @@
+import threading
+from operator import attrgetter
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import rqdatac as rq
+
+# 快照字段 -> 从TickObject取值的函数，盘口字段按档位从列表中取
+_SNAPSHOT_GETTERS: Dict[str, Callable] = {
+    name: attrgetter(name)
+    for name in (
+        "open",
+        "high",
+        "low",
+        "last",
+        "prev_close",
+        "limit_up",
+        "limit_down",
+        "volume",
+        "num_trades",
+        "open_interest",
+        "settlement",
+        "prev_settlement",
+        "iopv",
+        "total_turnover",
+    )
+}
+for _level in range(5):
+    for _prefix, _attr in (("a", "asks"), ("b", "bids")):
+        _SNAPSHOT_GETTERS[f"{_prefix}{_level + 1}"] = (
+            lambda tick, attr=_attr, i=_level: getattr(tick, attr)[i]
+        )
+    for _prefix, _attr in (("a", "ask_vols"), ("b", "bid_vols")):
+        _SNAPSHOT_GETTERS[f"{_prefix}{_level + 1}_v"] = (
+            lambda tick, attr=_attr, i=_level: getattr(tick, attr)[i]
+        )
+
+LATEST_FIELDS = tuple(_SNAPSHOT_GETTERS)
+
+# 没有行情的证券(停牌、代码无效等)的时间戳
+_NAT = np.iinfo(np.int64).min
+# 缓存的代码列表数量上限，轮询的代码列表总在变化时避免无限增长
+_MAX_INDEXERS = 256
+
+
+def _timestamp(tick) -> int:
+    value = tick.datetime
+    if value is None or value.year <= 1:
+        return _NAT
+    return np.datetime64(value, "ns").astype(np.int64)
+
+
+def _as_float(value) -> float:
+    return np.nan if value is None else value
+
+
+class LatestCache:
+    """
+    最新行情快照的缓存
+
+    每个字段一个float64数组及其更新时间，按证券在缓存中的位置存放，证券第一次出现时追加。
+    每次轮询只从快照中取请求的字段，并且只覆盖比该字段缓存的值更新的证券，
+    没有新行情的证券保留上一次的值；读取时按缓存好的位置数组直接取出，
+    整个过程不构造任何DataFrame。
+    """
+
+    def __init__(self, snapshot: Optional[Callable] = None, capacity: int = 1024):
+        """
+        Args:
+            snapshot: 获取快照的函数，接受证券代码列表，返回TickObject列表，
+                默认为rqdatac.current_snapshot
+            capacity: 初始容量(证券数量)，不够时加倍
+        """
+        self.snapshot = snapshot or rq.current_snapshot
+        self._lock = threading.Lock()
+        self._capacity = capacity
+        self._size = 0
+        self._positions: Dict[str, int] = {}
+        # 证券代码元组 -> 位置数组，相同的代码列表重复轮询时不再逐个查找
+        self._indexers: Dict[Tuple[str, ...], np.ndarray] = {}
+        # 每个证券最新快照的时间
+        self._timestamps = np.full(capacity, _NAT, dtype=np.int64)
+        # 字段 -> (取值, 取值对应的快照时间)
+        self._fields: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _indexer(self, codes: Tuple[str, ...]) -> np.ndarray:
+        indexer = self._indexers.get(codes)
+        if indexer is not None:
+            return indexer
+        for code in codes:
+            if code not in self._positions:
+                self._positions[code] = self._size
+                self._size += 1
+        if self._size > self._capacity:
+            self._grow(max(self._size, self._capacity * 2))
+        indexer = np.fromiter(
+            (self._positions[code] for code in codes), dtype=np.intp, count=len(codes)
+        )
+        if len(self._indexers) >= _MAX_INDEXERS:
+            self._indexers.clear()
+        self._indexers[codes] = indexer
+        return indexer
+
+    def _grow(self, capacity: int):
+        extra = capacity - self._capacity
+        self._timestamps = np.concatenate(
+            [self._timestamps, np.full(extra, _NAT, dtype=np.int64)]
+        )
+        for field, (values, stamps) in self._fields.items():
+            self._fields[field] = (
+                np.concatenate([values, np.full(extra, np.nan)]),
+                np.concatenate([stamps, np.full(extra, _NAT, dtype=np.int64)]),
+            )
+        self._capacity = capacity
+
+    def _column(self, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        column = self._fields.get(field)
+        if column is None:
+            column = self._fields[field] = (
+                np.full(self._capacity, np.nan),
+                np.full(self._capacity, _NAT, dtype=np.int64),
+            )
+        return column
+
+    def update(self, fields: List[str], codes: Tuple[str, ...]) -> np.ndarray:
+        """
+        轮询一次快照并更新缓存
+
+        Args:
+            fields: 快照字段
+            codes: 证券代码
+
+        Returns:
+            证券在缓存中的位置
+        """
+        ticks = self.snapshot(list(codes))
+        if ticks is None:
+            ticks = []
+        elif not isinstance(ticks, list):
+            # 只有一个证券时rqdatac返回单个TickObject
+            ticks = [ticks]
+        # rqdatac剔除无效和重复的代码，快照按代码对应回请求的证券，没有快照的证券不更新
+        requested = set(codes)
+        by_code = {
+            tick.order_book_id: tick
+            for tick in ticks
+            if tick.order_book_id in requested
+        }
+        ticks = list(by_code.values())
+        timestamps = np.fromiter(
+            (_timestamp(tick) for tick in ticks), dtype=np.int64, count=len(ticks)
+        )
+        with self._lock:
+            indexer = self._indexer(codes)
+            matched = np.fromiter(
+                (self._positions[code] for code in by_code),
+                dtype=np.intp,
+                count=len(by_code),
+            )
+            for field in fields:
+                values, stamps = self._column(field)
+                # 只取比缓存的值更新的证券，第一次请求的字段即所有有行情的证券
+                mask = timestamps > stamps[matched]
+                if not mask.any():
+                    continue
+                getter = _SNAPSHOT_GETTERS[field]
+                selected = [tick for tick, m in zip(ticks, mask) if m]
+                positions = matched[mask]
+                values[positions] = np.fromiter(
+                    (_as_float(getter(tick)) for tick in selected),
+                    dtype=np.float64,
+                    count=len(selected),
+                )
+                stamps[positions] = timestamps[mask]
+            np.maximum.at(self._timestamps, matched, timestamps)
+        return indexer
+
+    def get(self, fields: List[str], indexer: np.ndarray) -> Dict[str, np.ndarray]:
+        """按位置取出缓存的值，返回的数组是副本"""
+        with self._lock:
+            result = {
+                "datetime": self._timestamps[indexer].view("datetime64[ns]"),
+            }
+            for field in fields:
+                result[field] = self._fields[field][0][indexer]
+        return result
+
+
+def rq_get_latest(
+    cache: LatestCache,
+    fields: Union[str, List[str]],
+    codes: Union[str, List[str]],
+) -> Dict[str, np.ndarray]:
+    """
+    获取最新行情快照
+
+    Args:
+        cache: 快照缓存
+        fields: 快照字段，见LATEST_FIELDS
+        codes: 证券代码
+
+    Returns:
+        字段 -> 与codes对齐的numpy数组，另有"datetime"为快照时间(datetime64[ns])；
+        数值统一为float64，没有行情的证券为nan/NaT
+    """
+    if isinstance(fields, str):
+        fields = [fields]
+    if isinstance(codes, str):
+        codes = [codes]
+    unknown = [f for f in fields if f not in _SNAPSHOT_GETTERS]
+    if unknown:
+        raise ValueError(
+            f"Unknown snapshot fields {unknown}. Available: {list(LATEST_FIELDS)}"
+        )
+    codes = tuple(codes)
+    indexer = cache.update(fields, codes)
+    return cache.get(fields, indexer)
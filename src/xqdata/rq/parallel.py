@@ -0,0 +1,198 @@
+import atexit
+import multiprocessing
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import rqdatac as rq
+
+from xqdata.shm import pack_frame, unlink_segment, unpack_frames
+
+
+# 进程内复用的进程池，进程数或认证信息变化时重建
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+# 子进程的认证信息，只在创建进程池时传给子进程，不随查询传递
+_credentials: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(credentials: Optional[Dict[str, Any]]):
+    """
+    子进程初始化：使用父进程的认证信息建立自己的RQData连接
+
+    spawn的子进程是全新的解释器，没有认证信息时按环境变量中的配置初始化
+    """
+    if credentials is not None:
+        rq.init(**credentials)
+        return
+    try:
+        rq.init()
+    except ValueError:
+        # 环境变量中没有配置，与没有初始化的父进程一样，在查询时由rqdatac报错
+        pass
+
+
+def set_worker_credentials(credentials: Optional[Dict[str, Any]]):
+    """
+    设置子进程建立RQData连接使用的认证信息，已创建的进程池被关闭
+
+    Args:
+        credentials: rq.init的参数，None表示子进程使用环境变量中的配置
+    """
+    global _credentials
+    with _pool_lock:
+        _credentials = credentials
+        _shutdown_pool()
+
+
+def _shutdown_pool():
+    global _pool, _pool_size
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool, _pool_size = None, 0
+
+
+def shutdown_pool():
+    """关闭复用的进程池，下次多进程查询时重新创建"""
+    with _pool_lock:
+        _shutdown_pool()
+
+
+atexit.register(shutdown_pool)
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    """获取进程数为processes的进程池，子进程在多次查询之间复用"""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            _shutdown_pool()
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(_credentials,),
+            )
+            _pool_size = processes
+        return _pool
+
+
+def _run_shard(
+    state: Dict[str, Any], kwargs: Dict[str, Any]
+) -> Tuple[Optional[dict], List[str]]:
+    """
+    在子进程中查询一个分片，结果写入共享内存后只返回元数据
+
+    Returns:
+        (共享内存的元数据，没有数据时为None; 查询中给出的警告)
+    """
+    from .api import RQDataApi
+
+    api = RQDataApi()
+    api.info_config = state["info_config"]
+    api.factor_config = state["factor_config"]
+    api.factor_patterns = state["factor_patterns"]
+    api._extra_params = state["extra_params"]
+    # 内存预算和整数索引由父进程处理(证券id只在父进程的字典中有效)
+    api._options = {
+        **state["options"],
+        "processes": 0,
+        "int_index": False,
+        "max_memory": None,
+    }
+    # 共享内存只支持numpy类型的列，类型声明由父进程在拼接后统一应用
+    api.factor_schema = {}
+    # 子进程的警告不会显示在父进程中，交回父进程重新给出
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        data = api._query_factors(processes=0, **kwargs)
+    messages = [str(w.message) for w in caught]
+    if data.empty:
+        return None, messages
+    return pack_frame(data), messages
+
+
+def _discard(future):
+    """放弃一个分片的结果，释放其共享内存"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    meta, _ = future.result()
+    if meta is not None:
+        unlink_segment(meta["name"])
+
+
+def get_factor_in_processes(
+    api,
+    processes: int,
+    factors: List[str],
+    codes: List[str],
+    **kwargs: Any,
+) -> pd.DataFrame:
+    """
+    将证券分片后在进程池中并行执行get_factor
+
+    每个子进程独立完成查询和全部后处理(reset_index、rename_columns、合并等)，
+    结果以列式共享内存交回，父进程只做一次拼接。进程池在多次查询之间复用，
+    子进程只在启动时建立一次RQData连接。
+
+    Args:
+        api: 发起查询的RQDataApi(或其会话)，其配置和设置会被传给子进程
+        processes: 进程数
+        factors: 因子名称列表
+        codes: 证券代码列表
+        **kwargs: 传给RQDataApi._query_factors的其他参数
+
+    Returns:
+        面板格式的DataFrame
+    """
+    state = {
+        "info_config": dict(api.info_config),
+        "factor_config": dict(api.factor_config),
+        "factor_patterns": dict(api.factor_patterns),
+        "extra_params": {k: dict(v) for k, v in api._extra_params.items()},
+        "options": dict(api._options),
+    }
+    # 分片数多于进程数，使各进程负载更均衡
+    shards = [
+        list(shard)
+        for shard in np.array_split(np.asarray(codes, dtype=object), processes * 2)
+        if len(shard)
+    ]
+
+    pool = _get_pool(processes)
+    futures = [
+        pool.submit(_run_shard, state, {"factors": factors, "codes": shard, **kwargs})
+        for shard in shards
+    ]
+    metas = []
+    messages = []
+    try:
+        for future in futures:
+            meta, caught = future.result()
+            messages.extend(caught)
+            if meta is not None:
+                metas.append(meta)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            # 子进程异常退出后进程池不可再用，下次查询时重建
+            shutdown_pool()
+        # 取消未开始的分片，已完成和正在查询的分片的结果不再使用
+        for future in futures:
+            if not future.cancel():
+                future.add_done_callback(_discard)
+        # 不返回缺少分片的结果
+        raise RuntimeError(
+            f"Error fetching factors {factors} in worker: {str(e)}"
+        ) from e
+    for message in dict.fromkeys(messages):
+        warnings.warn(message)
+
+    parts = unpack_frames(metas)
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, axis=0).sort_index()
@@ -0,0 +1,100 @@
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .func_info import rq_listing_dates
+
+
+def plan_listing_windows(
+    codes: List[str],
+    start_time: Optional[Union[str, datetime, date]],
+    end_time: Optional[Union[str, datetime, date]],
+    market: str = "cn",
+    period: str = "M",
+) -> List[Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp], List[str]]]:
+    """
+    按照上市/退市日期裁剪每个证券的查询区间，并将区间相同的证券合并为一次查询
+
+    裁剪后的区间会向外对齐到period的边界(默认按月)，以限制查询批次的数量；
+    在[start_time, end_time]内完全没有上市(listed_date <= 日期 < de_listed_date)的证券
+    会被剔除，没有上市信息的证券保持原区间。
+
+    Args:
+        codes: 证券代码列表
+        start_time: 开始时间，None表示不裁剪开始时间
+        end_time: 结束时间，None表示不裁剪结束时间
+        market: 市场，默认为"cn"
+        period: 区间对齐的pandas周期，默认"M"(月)
+
+    Returns:
+        [(开始时间, 结束时间, 证券代码列表), ...]
+    """
+    start = pd.Timestamp(start_time) if start_time is not None else None
+    end = pd.Timestamp(end_time) if end_time is not None else None
+    listing = rq_listing_dates(codes, market=market)
+
+    plan = {}
+    for code, listed, de_listed in zip(
+        listing.index, listing["listed_date"], listing["de_listed_date"]
+    ):
+        # 区间内未上市的证券直接剔除
+        if end is not None and pd.notna(listed) and listed > end:
+            continue
+        if start is not None and pd.notna(de_listed) and de_listed <= start:
+            continue
+
+        win_start, win_end = start, end
+        if start is not None and pd.notna(listed) and listed > start:
+            win_start = max(listed.to_period(period).start_time, start)
+        if end is not None and pd.notna(de_listed) and de_listed < end:
+            win_end = min(de_listed.to_period(period).end_time.normalize(), end)
+        plan.setdefault((win_start, win_end), []).append(code)
+
+    return [(s, e, group) for (s, e), group in plan.items()]
+
+
+def trim_to_listing(data: pd.DataFrame, market: str = "cn") -> pd.DataFrame:
+    """
+    剔除证券上市日之前和退市日(含)之后的行
+
+    与rq_listed_codes一致，证券在listed_date <= 日期 < de_listed_date时处于上市状态，
+    退市日当天不再交易。
+
+    Args:
+        data: 以(datetime, code)为索引的DataFrame
+        market: 市场，默认为"cn"
+
+    Returns:
+        剔除后的DataFrame
+    """
+    if data.empty:
+        return data
+    code_values = data.index.get_level_values("code")
+    listing = rq_listing_dates(code_values.unique().tolist(), market=market)
+    dt = data.index.get_level_values("datetime")
+    listed = code_values.map(listing["listed_date"])
+    de_listed = code_values.map(listing["de_listed_date"])
+    # 没有上市信息的证券全部保留
+    keep = (listed.isna() | (dt.normalize() >= listed)) & (
+        de_listed.isna() | (dt.normalize() < de_listed)
+    )
+    return data[keep]
+
+
+def expand_to_request(data: pd.DataFrame, codes: List[str]) -> pd.DataFrame:
+    """
+    将裁剪后的结果重新展开为 时间 x 请求证券 的完整形状，缺失部分为NaN
+
+    Args:
+        data: 以(datetime, code)为索引的DataFrame
+        codes: 请求的证券代码列表
+
+    Returns:
+        展开后的DataFrame
+    """
+    if data.empty:
+        return data
+    dates = data.index.get_level_values("datetime").unique().sort_values()
+    index = pd.MultiIndex.from_product([dates, codes], names=["datetime", "code"])
+    return data.reindex(index)
@@ -0,0 +1,123 @@
+import inspect
+import re
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+
+class RoutingTable:
+    """
+    由因子配置编译得到的路由表
+
+    编译时一次性完成：精确匹配表、按模式匹配的因子族(如citics_l*/sws_l*)、
+    每个查询函数的签名信息(是否接受objects参数)和允许的额外参数；
+    因子列表到分组结果的映射也会被缓存，重复的小请求不再逐个探测配置。
+    配置变化(注册新的因子或替换配置字典)后需要重新编译，见is_compiled_from。
+    """
+
+    def __init__(
+        self,
+        factor_config: Dict[str, Callable],
+        factor_patterns: Dict[str, Callable],
+        extra_params: Dict[str, List[str]],
+        plan_cache_size: int = 1024,
+    ):
+        """
+        Args:
+            factor_config: 因子名称 -> 查询函数，"default"为未配置因子的默认函数
+            factor_patterns: 正则表达式 -> 查询函数，用于按模式匹配的因子族
+            extra_params: 查询函数名 -> 允许的额外参数列表
+            plan_cache_size: 缓存的因子分组结果数量
+        """
+        # 编译所用的配置字典，按对象判断配置是否被替换
+        self._sources = (factor_config, factor_patterns)
+        self._exact = {k: v for k, v in factor_config.items() if k != "default"}
+        self._default = factor_config.get("default")
+        self._patterns = [
+            (re.compile(pattern), func) for pattern, func in factor_patterns.items()
+        ]
+
+        funcs = set(self._exact.values()) | {func for _, func in self._patterns}
+        if self._default is not None:
+            funcs.add(self._default)
+        self._accepts_objects: Dict[Callable, bool] = {}
+        self._allowed_params: Dict[Callable, FrozenSet[str]] = {}
+        for func in funcs:
+            self._compile_func(func, extra_params)
+        self._extra_params = extra_params
+
+        self._plan = lru_cache(maxsize=plan_cache_size)(self._build_plan)
+
+    def is_compiled_from(
+        self, factor_config: Dict[str, Callable], factor_patterns: Dict[str, Callable]
+    ) -> bool:
+        """
+        路由表是否由当前的配置编译得到
+
+        配置按写时复制的方式修改(见RQDataApi.register_factor)，只比较字典对象，
+        每次查询的开销是常数；原地修改配置字典后需要调用RQDataApi.invalidate_routing。
+
+        Args:
+            factor_config: 因子名称 -> 查询函数
+            factor_patterns: 正则表达式 -> 查询函数
+
+        Returns:
+            与编译时是同一组配置字典时返回True
+        """
+        return factor_config is self._sources[0] and factor_patterns is self._sources[1]
+
+    def _compile_func(self, func: Callable, extra_params: Dict[str, List[str]]):
+        """预先计算查询函数的签名信息和允许的额外参数"""
+        self._accepts_objects[func] = "objects" in inspect.signature(func).parameters
+        self._allowed_params[func] = frozenset(extra_params.get(func.__name__, ()))
+
+    def resolve(self, factor: str) -> Optional[Callable]:
+        """
+        查找因子对应的查询函数：精确匹配 > 模式匹配 > default
+
+        Args:
+            factor: 因子名称
+
+        Returns:
+            查询函数，未配置且没有default时返回None
+        """
+        func = self._exact.get(factor)
+        if func is not None:
+            return func
+        for pattern, func in self._patterns:
+            if pattern.match(factor):
+                return func
+        return self._default
+
+    def _build_plan(
+        self, factors: Tuple[str, ...]
+    ) -> Tuple[Tuple[Callable, Tuple[str, ...]], ...]:
+        func_factor_map = {}
+        for factor in factors:
+            func = self.resolve(factor)
+            if func is not None:
+                func_factor_map.setdefault(func, []).append(factor)
+        return tuple((func, tuple(group)) for func, group in func_factor_map.items())
+
+    def plan(self, factors: List[str]) -> Dict[Callable, List[str]]:
+        """
+        将因子按查询函数分组(结果会被缓存)
+
+        Args:
+            factors: 因子名称列表
+
+        Returns:
+            查询函数 -> 因子列表 的字典
+        """
+        return {func: list(group) for func, group in self._plan(tuple(factors))}
+
+    def accepts_objects(self, func: Callable) -> bool:
+        """查询函数是否接受objects参数"""
+        if func not in self._accepts_objects:
+            self._compile_func(func, self._extra_params)
+        return self._accepts_objects[func]
+
+    def allowed_params(self, func: Callable) -> FrozenSet[str]:
+        """查询函数允许的额外参数"""
+        if func not in self._allowed_params:
+            self._compile_func(func, self._extra_params)
+        return self._allowed_params[func]
@@ -0,0 +1,65 @@
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Union
+
+import pandas as pd
+import rqdatac as rq
+
+from xqdata.storage import ParquetStore
+
+from .func_factor import rq_get_price
+
+
+def rq_stream_price(
+    factors: Union[str, List[str]],
+    codes: Union[str, List[str]],
+    start_time: Union[str, datetime, date],
+    end_time: Union[str, datetime, date],
+    root: Union[str, Path],
+    frequency: str = "min",
+    batch_size: int = 100,
+    **kwargs,
+) -> ParquetStore:
+    """
+    按交易日和证券批次流式获取高频行情(分钟/tick)，并逐块写入按日分区的Parquet数据集
+
+    每次只在内存中保留一个交易日、一个批次的数据，每个批次在当日分区中写入一个文件，
+    文件内按证券排序，读取部分证券时可按行组统计跳过无关数据；
+    同一交易日、同一批次重复写入时会原子地覆盖，因此中断后可以直接重跑。
+
+    Args:
+        factors: 行情字段，可以是单个字符串或字符串列表，支持_post/_pre复权字段
+        codes: 证券代码，可以是单个字符串或字符串列表
+        start_time: 开始日期
+        end_time: 结束日期
+        root: 数据集根目录
+        frequency: 数据频率，默认为分钟("min")，也可以是"tick"等
+        batch_size: 每次请求的证券数量
+        **kwargs: 传递给rq_get_price的其他参数
+
+    Returns:
+        写入的ParquetStore，可用其read方法按时间区间、字段和证券读取
+    """
+    if isinstance(factors, str):
+        factors = [factors]
+    if isinstance(codes, str):
+        codes = [codes]
+
+    store = ParquetStore(root, partition="day", row_group_size=4096)
+    for trading_date in pd.to_datetime(rq.get_trading_dates(start_time, end_time)):
+        for batch, i in enumerate(range(0, len(codes), batch_size)):
+            data = rq_get_price(
+                factors,
+                codes[i : i + batch_size],
+                start_time=trading_date,
+                end_time=trading_date,
+                frequency=frequency,
+                filter_range=False,
+                **kwargs,
+            )
+            if data.empty:
+                continue
+            data = data.sort_index(level=["code", "datetime"])
+            # 按交易日归档，期货夜盘数据与其所属交易日放在同一分区
+            store.write(data, key=f"batch{batch:05d}", date=trading_date)
+    return store
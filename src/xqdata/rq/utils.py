@@ -1,3 +1,9 @@
+import os
+import pickle
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
 import pandas as pd
 
 
@@ -10,3 +16,81 @@ def rename_columns(df: pd.DataFrame) -> pd.DataFrame:
     if "date" in df.columns:
         df.rename(columns={"date": "datetime"}, inplace=True)
     return df
+
+
+def get_cache_dir() -> Path:
+    """
+    获取本地缓存目录，优先使用环境变量XQDATA_CACHE_DIR，默认为~/.xqdata/cache
+    """
+    path = Path(os.getenv("XQDATA_CACHE_DIR", Path.home() / ".xqdata" / "cache"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def load_store(path: Path, version: int) -> Optional[Any]:
+    """
+    读取save_store写入的本地缓存
+
+    Args:
+        path: 持久化文件路径
+        version: 当前的数据格式版本
+
+    Returns:
+        保存的数据；文件不存在、无法读取或版本不一致(格式已变化)时返回None，
+        调用方应当作没有缓存重新获取
+    """
+    try:
+        with open(path, "rb") as f:
+            saved = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # 文件损坏或引用的类已不存在，缓存可以重建
+        return None
+    if not isinstance(saved, dict) or saved.get("version") != version:
+        return None
+    return saved["data"]
+
+
+def save_store(path: Path, version: int, data: Any):
+    """
+    原子地将数据连同格式版本写入本地缓存
+
+    Args:
+        path: 持久化文件路径
+        version: 数据格式版本，格式变化时递增，旧版本的文件读取时被丢弃
+        data: 需要保存的数据
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": version, "data": data}, f)
+    os.replace(tmp_path, path)
+
+
+# 结束日期距今不足这么多天的区间可能还有数据没有发布
+RECENT_DAYS = 7
+
+
+def covered_end(
+    start: pd.Timestamp, end: pd.Timestamp, last_available: Optional[pd.Timestamp]
+) -> pd.Timestamp:
+    """
+    增量获取[start, end]后可以视为已覆盖的结束日期
+
+    结束日期较早时整个区间的数据都已发布；结束日期是最近或将来的日期时，
+    只覆盖到实际取得数据的最后一个交易日，之后的日期在下次更新时重新获取。
+
+    Args:
+        start: 获取的开始日期
+        end: 获取的结束日期
+        last_available: 取得的数据中最后一个交易日，没有数据时为None
+
+    Returns:
+        已覆盖的结束日期，没有覆盖任何日期时为start的前一天
+    """
+    if end < pd.Timestamp.today().normalize() - pd.Timedelta(days=RECENT_DAYS):
+        return end
+    if last_available is None or pd.isna(last_available) or last_available < start:
+        return start - pd.Timedelta(days=1)
+    return min(end, pd.Timestamp(last_available).normalize())
@@ -0,0 +1,142 @@
+import warnings
+from typing import Any, Dict, List, Mapping
+
+import pandas as pd
+from pandas.api.types import pandas_dtype
+
+# 声明为可空的整数和布尔因子使用的pandas可空类型
+NULLABLE_DTYPES = {
+    "int8": "Int8",
+    "int16": "Int16",
+    "int32": "Int32",
+    "int64": "Int64",
+    "uint8": "UInt8",
+    "uint16": "UInt16",
+    "uint32": "UInt32",
+    "uint64": "UInt64",
+    "bool": "boolean",
+}
+
+
+def factor_dtype(spec: Mapping[str, Any]):
+    """
+    因子声明对应的pandas类型
+
+    Args:
+        spec: 因子声明，包含dtype(numpy类型名或"category")，可选nullable(默认True)、
+            categories(category的取值表)和fill_value(不可空因子缺失值的填充值)
+
+    Returns:
+        pandas类型：可空的整数和布尔为Int64/boolean等，category为CategoricalDtype
+    """
+    dtype = spec["dtype"]
+    if dtype == "category":
+        return pd.CategoricalDtype(spec.get("categories"))
+    if spec.get("nullable", True):
+        dtype = NULLABLE_DTYPES.get(dtype, dtype)
+    return pandas_dtype(dtype)
+
+
+def _cast(values: pd.Series, spec: Mapping[str, Any]) -> pd.Series:
+    nullable = spec.get("nullable", True)
+    if not nullable and spec.get("fill_value") is not None:
+        values = values.fillna(spec["fill_value"])
+    if not nullable and values.isna().any():
+        raise ValueError(
+            f"Factor '{values.name}' is declared non-nullable but has missing values"
+        )
+    result = values.astype(factor_dtype(spec), copy=False)
+    if not nullable and result.isna().any():
+        # category中不在取值表内的值会变成缺失
+        raise ValueError(f"Factor '{values.name}' has values outside its categories")
+    return result
+
+
+def apply_schema(
+    data: pd.DataFrame, schema: Mapping[str, Mapping[str, Any]]
+) -> pd.DataFrame:
+    """
+    按声明转换因子列的类型，未声明的列保持不变
+
+    Args:
+        data: 因子为列的DataFrame
+        schema: 因子名称 -> 因子声明
+
+    Returns:
+        转换后的DataFrame，所有列都已符合声明时原样返回
+    """
+    columns = [
+        column
+        for column in data.columns
+        if column in schema and data[column].dtype != factor_dtype(schema[column])
+    ]
+    if not columns:
+        return data
+    data = data.copy(deep=False)
+    for column in columns:
+        data[column] = _cast(data[column], schema[column])
+    return data
+
+
+def join_frames(
+    parts: List[pd.DataFrame], schema: Mapping[str, Mapping[str, Any]]
+) -> pd.DataFrame:
+    """
+    按索引外连接各组查询结果，并按声明确定列类型
+
+    各组先转换为声明的类型再对齐到合并后的索引：整数和布尔因子以可空类型表示
+    缺失值，不会像逐次outer merge那样退化为float64/object；合并后的索引只计算一次，
+    每列只对齐一次。多组结果中重复的列以先出现的为准；某组结果的索引有重复时
+    给出警告并只保留每个索引第一次出现的行。
+
+    Args:
+        parts: 以相同索引层级为索引的DataFrame列表
+        schema: 因子名称 -> 因子声明
+
+    Returns:
+        合并后的DataFrame，没有数据时返回空DataFrame
+    """
+    parts = [p for p in parts if p is not None and not p.empty]
+    if not parts:
+        return pd.DataFrame()
+    parts = [apply_schema(part, schema) for part in parts]
+    if len(parts) == 1:
+        return parts[0]
+
+    for i, part in enumerate(parts):
+        duplicated = part.index.duplicated()
+        if duplicated.any():
+            warnings.warn(
+                f"Dropped {duplicated.sum()} rows with duplicate index entries "
+                f"from the result for {list(part.columns)}"
+            )
+            parts[i] = part[~duplicated]
+    index = parts[0].index
+    for part in parts[1:]:
+        if not part.index.equals(index):
+            index = index.union(part.index)
+    columns: Dict[Any, pd.Series] = {}
+    for part in parts:
+        if not part.index.equals(index):
+            part = part.reindex(index)
+        for column in part.columns:
+            if column not in columns:
+                columns[column] = part[column]
+    # 对齐后不可空的列可能出现缺失，需要再按声明检查一次
+    return apply_schema(pd.DataFrame(columns, index=index), schema)
+
+
+def schema_dtypes(
+    factors: List[str], schema: Mapping[str, Mapping[str, Any]]
+) -> Dict[str, Any]:
+    """
+    已声明因子的返回类型，可用于预先分配下游的缓冲区
+
+    Args:
+        factors: 因子名称列表
+        schema: 因子名称 -> 因子声明
+
+    Returns:
+        因子名称 -> pandas类型，未声明的因子不包含在内
+    """
+    return {f: factor_dtype(schema[f]) for f in factors if f in schema}
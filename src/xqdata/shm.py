@@ -0,0 +1,242 @@
+import os
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 每列在共享内存中按此字节数对齐
+_ALIGNMENT = 64
+
+# 以(值数组, 缺失掩码)两块缓冲区存放的可空扩展类型
+_MASKED_ARRAYS = (
+    pd.arrays.IntegerArray,
+    pd.arrays.FloatingArray,
+    pd.arrays.BooleanArray,
+)
+
+
+def _encode(values) -> Tuple[np.ndarray, Any]:
+    """
+    将一列转换为可以直接放入共享内存的定长数组
+
+    数值、布尔和无时区的日期列原样存放；可空整数/浮点/布尔列存放填充缺失值后的值数组，
+    缺失掩码另存(见_mask)；其余列(证券代码等)按值编码为int32，取值表随元数据一起传递。
+
+    Returns:
+        (定长数组, 取值表)，原样存放时取值表为None
+    """
+    dtype = getattr(values, "dtype", None)
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        return np.ascontiguousarray(np.asarray(values)), None
+    array = getattr(values, "array", values)
+    if isinstance(array, _MASKED_ARRAYS):
+        na_value = False if dtype.numpy_dtype.kind == "b" else 0
+        return array.to_numpy(dtype=dtype.numpy_dtype, na_value=na_value), None
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return codes.astype(np.int32), list(uniques)
+
+
+def _decode(array: np.ndarray, uniques: Any, copy: bool = True) -> np.ndarray:
+    if uniques is None:
+        if copy:
+            return array.copy()
+        # 直接引用共享内存，设为只读防止修改其他进程看到的数据
+        array.setflags(write=False)
+        return array
+    # 缺失值编码为-1，取值表末尾补一个None
+    table = np.empty(len(uniques) + 1, dtype=object)
+    table[:-1] = uniques
+    table[-1] = None
+    values = table[array]
+    # 与引用共享内存的列一致，不可写
+    values.setflags(write=copy)
+    return values
+
+
+def _mask(values) -> Optional[np.ndarray]:
+    """可空整数/浮点/布尔列的缺失掩码，其余列为None"""
+    if isinstance(getattr(values, "array", values), _MASKED_ARRAYS):
+        return np.asarray(values.isna())
+    return None
+
+
+def _restore(values: np.ndarray, dtype: Optional[str], mask: Optional[np.ndarray]):
+    """按编码前的类型还原扩展类型的列：可空类型由值数组和掩码直接构造，不复制"""
+    if dtype is None:
+        return values
+    if mask is not None:
+        dtype = pd.api.types.pandas_dtype(dtype)
+        return dtype.construct_array_type()(values, mask, copy=False)
+    if values.dtype != object:
+        return values
+    return pd.array(values, dtype=dtype)
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    # 共享内存的生命周期由调用方管理，避免本进程退出时被resource_tracker自动回收
+    if os.name != "posix":
+        # 只有POSIX的共享内存登记在resource_tracker中
+        return
+    # resource_tracker登记的是带"/"前缀的名称，而name属性去掉了前缀
+    resource_tracker.unregister(f"/{shm.name.lstrip('/')}", "shared_memory")
+
+
+def pack_frame(data: pd.DataFrame, name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    将DataFrame按列写入一块新的共享内存，返回可以廉价pickle的元数据
+
+    共享内存由unpack_frame(或attach_frame的使用者)释放；调用方(通常是子进程)不再持有它。
+
+    Args:
+        data: 任意索引的DataFrame，列名需唯一
+        name: 共享内存的名称，默认自动生成
+
+    Returns:
+        描述共享内存块和各列位置的元数据
+    """
+    index = data.index
+    arrays = [index.get_level_values(i) for i in range(index.nlevels)]
+    arrays += [data[column] for column in data.columns]
+    encoded = [_encode(values) for values in arrays]
+    # 扩展类型(Int64、boolean等)记录类型名，还原时恢复
+    dtypes = [
+        None if isinstance(values.dtype, np.dtype) else str(values.dtype)
+        for values in arrays
+    ]
+    # 可空类型的缺失掩码作为额外的缓冲区放在各列之后
+    masks = [_mask(values) for values in arrays]
+    mask_positions = []
+    for mask in masks:
+        if mask is None:
+            mask_positions.append(None)
+        else:
+            mask_positions.append(len(encoded))
+            encoded.append((mask, None))
+
+    layout, offset = [], 0
+    for array, uniques in encoded:
+        layout.append((offset, array.dtype.str, len(array), uniques))
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+    try:
+        for (array, _), (start, _, _, _) in zip(encoded, layout):
+            target = np.ndarray(array.shape, array.dtype, shm.buf, start)
+            target[:] = array
+            del target
+    finally:
+        shm.close()
+    _untrack(shm)
+    return {
+        "name": shm.name,
+        "size": max(offset, 1),
+        "index_names": list(index.names),
+        "columns": list(data.columns),
+        "layout": layout,
+        "dtypes": dtypes,
+        "masks": mask_positions,
+    }
+
+
+def _build_frame(meta: Dict[str, Any], buffers: List[Any]) -> pd.DataFrame:
+    n = len(meta["index_names"]) + len(meta["columns"])
+    dtypes = meta.get("dtypes") or [None] * n
+    masks = meta.get("masks") or [None] * n
+    arrays = [
+        _restore(buffers[i], dtype, None if mask is None else buffers[mask])
+        for i, (dtype, mask) in enumerate(zip(dtypes, masks))
+    ]
+    nlevels = len(meta["index_names"])
+    if nlevels == 1:
+        index = pd.Index(arrays[0], name=meta["index_names"][0])
+    else:
+        index = pd.MultiIndex.from_arrays(arrays[:nlevels], names=meta["index_names"])
+    return pd.DataFrame(
+        dict(zip(meta["columns"], arrays[nlevels:])),
+        index=index,
+        columns=meta["columns"],
+        copy=False,
+    )
+
+
+def unpack_frame(meta: Dict[str, Any]) -> pd.DataFrame:
+    """
+    从pack_frame写入的共享内存中还原DataFrame，并释放共享内存
+
+    Args:
+        meta: pack_frame返回的元数据
+
+    Returns:
+        还原的DataFrame，数据已复制到本进程
+    """
+    shm = shared_memory.SharedMemory(name=meta["name"])
+    try:
+        arrays = []
+        for start, dtype, length, uniques in meta["layout"]:
+            view = np.ndarray((length,), np.dtype(dtype), shm.buf, start)
+            arrays.append(_decode(view, uniques))
+            del view
+    finally:
+        shm.close()
+        shm.unlink()
+    return _build_frame(meta, arrays)
+
+
+def attach_frame(
+    meta: Dict[str, Any],
+) -> Tuple[pd.DataFrame, shared_memory.SharedMemory]:
+    """
+    以不复制的方式打开pack_frame写入的共享内存
+
+    数值、布尔、日期列和可空整数/浮点/布尔列直接引用共享内存(只读)，
+    其余列和索引在本进程中还原。
+    共享内存不会被释放，返回的SharedMemory需要在DataFrame不再使用后关闭。
+
+    Args:
+        meta: pack_frame返回的元数据
+
+    Returns:
+        (DataFrame, 打开的SharedMemory)
+
+    Raises:
+        FileNotFoundError: 共享内存已被释放
+    """
+    shm = shared_memory.SharedMemory(name=meta["name"])
+    _untrack(shm)
+    nlevels = len(meta["index_names"])
+    arrays = []
+    for i, (start, dtype, length, uniques) in enumerate(meta["layout"]):
+        view = np.ndarray((length,), np.dtype(dtype), shm.buf, start)
+        # 索引层级在构造MultiIndex时本来就会复制
+        arrays.append(_decode(view, uniques, copy=i < nlevels))
+    return _build_frame(meta, arrays), shm
+
+
+def unlink_segment(name: str) -> bool:
+    """
+    释放共享内存，已经映射它的进程仍可继续使用直到关闭
+
+    Returns:
+        共享内存存在并被释放时返回True
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()
+    return True
+
+
+def unpack_frames(metas: List[Dict[str, Any]]) -> List[pd.DataFrame]:
+    """依次还原多个DataFrame，某个失败时仍会释放其余的共享内存"""
+    frames, error = [], None
+    for meta in metas:
+        try:
+            frames.append(unpack_frame(meta))
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return frames
@@ -0,0 +1,249 @@
+import fcntl
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from multiprocessing import util
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+import pandas as pd
+
+from xqdata.cache import ResultCache, _Entry, _freeze
+from xqdata.shm import attach_frame, pack_frame, unlink_segment
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _timestamp(value: Optional[str]) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value)
+
+
+class SharedResultCache:
+    """
+    进程间共享的查询结果缓存，可作为CachedDataApi的cache
+
+    结果按列写入命名的共享内存，索引文件(JSON)记录每块共享内存对应的查询以及
+    正在使用它的进程；同一台机器上的其他进程(如同一个主进程fork出的回测子进程)
+    查询被覆盖的数据时直接映射已有的共享内存，数值列不复制。
+
+    每个进程第一次使用某块共享内存时计入引用，进程退出(或close())时释放引用；
+    没有存活进程引用的共享内存被释放，已退出但没有释放引用的进程在下次访问索引时被清理。
+    总大小超过max_bytes时按最近使用时间淘汰，已映射的进程仍可继续使用被淘汰的数据。
+    索引通过文件锁(fcntl)保护，仅支持POSIX系统。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 4 << 30,
+        namespace: str = "default",
+        root: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Args:
+            max_bytes: 共享内存总大小的上限(字节)，默认4GB
+            namespace: 命名空间，只有相同命名空间的进程之间共享结果；
+                不同数据源的结果应使用不同的命名空间
+            root: 索引文件所在目录，默认为系统临时目录下的xqdata-shm-<uid>
+        """
+        root = root or Path(tempfile.gettempdir()) / f"xqdata-shm-{os.getuid()}"
+        self.root = Path(root) / namespace
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # 共享内存名称 -> (本进程中打开的结果, SharedMemory)
+        self._attached: Dict[str, Any] = {}
+        # 进程退出时释放引用；multiprocessing的子进程退出时也会执行
+        util.Finalize(None, self.close, exitpriority=10)
+
+    def _check_fork(self):
+        """fork出的子进程不继承父进程的引用，使用时重新映射并计入自己的引用"""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._attached = {}
+
+    @contextmanager
+    def _index(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """加锁读取索引，退出时写回"""
+        with open(self.root / "index.lock", "a+") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                path = self.root / "index.json"
+                try:
+                    index = json.loads(path.read_text())
+                except (FileNotFoundError, ValueError):
+                    index = {}
+                yield index
+                tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+                tmp.write_text(json.dumps(index))
+                os.replace(tmp, path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _meta_path(self, name: str) -> Path:
+        return self.root / f"{name}.meta"
+
+    def _remove(self, index: Dict[str, Dict[str, Any]], name: str):
+        """从索引中删除并释放共享内存"""
+        del index[name]
+        unlink_segment(name)
+        self._meta_path(name).unlink(missing_ok=True)
+
+    def _prune(self, index: Dict[str, Dict[str, Any]]):
+        """清理已退出进程的引用，释放没有引用的共享内存"""
+        for name, item in list(index.items()):
+            item["refs"] = [pid for pid in item["refs"] if _alive(pid)]
+            if not item["refs"]:
+                self._remove(index, name)
+
+    def _attach(self, name: str, item: Dict[str, Any]) -> _Entry:
+        meta = pickle.loads(self._meta_path(name).read_bytes())
+        data, shm = attach_frame(meta)
+        entry = _Entry(
+            item["base"],
+            frozenset(item["factors"]),
+            frozenset(item["codes"]),
+            _timestamp(item["start"]),
+            _timestamp(item["end"]),
+            data,
+        )
+        self._attached[name] = (entry, shm)
+        return entry
+
+    def get(self, base, factors, codes, start, end) -> Optional[pd.DataFrame]:
+        """
+        查找覆盖该查询的缓存结果，其他进程写入的结果也会被找到
+
+        Returns:
+            截取后的结果(不可写)，没有命中时返回None
+        """
+        self._check_fork()
+        base = repr(base)
+        with self._lock, self._index() as index:
+            self._prune(index)
+            candidates = sorted(index.items(), key=lambda kv: -kv[1]["used"])
+            for name, item in candidates:
+                if not (
+                    item["base"] == base
+                    and factors <= set(item["factors"])
+                    and codes <= set(item["codes"])
+                    and (
+                        item["start"] is None
+                        or (start is not None and start >= _timestamp(item["start"]))
+                    )
+                    and (
+                        item["end"] is None
+                        or (end is not None and end <= _timestamp(item["end"]))
+                    )
+                ):
+                    continue
+                if name in self._attached:
+                    entry = self._attached[name][0]
+                else:
+                    try:
+                        entry = self._attach(name, item)
+                    except FileNotFoundError:
+                        # 共享内存已被系统清理
+                        self._remove(index, name)
+                        continue
+                    item["refs"].append(self._pid)
+                item["used"] = time.time()
+                self.hits += 1
+                break
+            else:
+                self.misses += 1
+                return None
+        return ResultCache._subset(entry, factors, codes, start, end)
+
+    def put(self, base, factors, codes, start, end, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        将查询结果写入共享内存并登记到索引，必要时按最近使用时间淘汰旧结果
+
+        Returns:
+            不可写的结果，数值列直接引用共享内存
+        """
+        self._check_fork()
+        if data.empty or not data.columns.is_unique:
+            return _freeze(data).copy(deep=False)
+        name = f"xq{self._pid}_{uuid.uuid4().hex[:12]}"
+        meta = pack_frame(data, name=name)
+        if meta["size"] > self.max_bytes:
+            unlink_segment(name)
+            return _freeze(data).copy(deep=False)
+        self._meta_path(name).write_bytes(pickle.dumps(meta))
+
+        item = {
+            "base": repr(base),
+            "factors": sorted(factors),
+            "codes": sorted(codes),
+            "start": None if start is None else start.isoformat(),
+            "end": None if end is None else end.isoformat(),
+            "size": meta["size"],
+            "refs": [self._pid],
+            "used": time.time(),
+        }
+        with self._lock, self._index() as index:
+            self._prune(index)
+            index[name] = item
+            total = sum(i["size"] for i in index.values())
+            for old in sorted(index, key=lambda n: index[n]["used"]):
+                if total <= self.max_bytes:
+                    break
+                if old != name:
+                    total -= index[old]["size"]
+                    self._remove(index, old)
+            entry = self._attach(name, item)
+        return entry.data.copy(deep=False)
+
+    @property
+    def nbytes(self) -> int:
+        """命名空间中所有结果占用的共享内存"""
+        with self._lock, self._index() as index:
+            self._prune(index)
+            return sum(item["size"] for item in index.values())
+
+    def _release(self, index: Dict[str, Dict[str, Any]]):
+        for name, (_, shm) in self._attached.items():
+            item = index.get(name)
+            if item is not None:
+                item["refs"] = [pid for pid in item["refs"] if pid != self._pid]
+                if not item["refs"]:
+                    self._remove(index, name)
+            try:
+                shm.close()
+            except BufferError:
+                # 还有DataFrame引用这块内存，映射在进程退出时解除
+                pass
+        self._attached = {}
+
+    def close(self):
+        """释放本进程的引用，没有其他进程引用的结果被释放"""
+        self._check_fork()
+        if not self._attached:
+            return
+        with self._lock, self._index() as index:
+            self._release(index)
+
+    def clear(self):
+        """清空命名空间中的全部结果，已映射的进程仍可继续使用"""
+        self._check_fork()
+        with self._lock, self._index() as index:
+            self._release(index)
+            for name in list(index):
+                self._remove(index, name)
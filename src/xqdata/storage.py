@@ -0,0 +1,233 @@
+import json
+import os
+import shutil
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# 分区粒度 -> 日期分区键的格式
+PARTITION_FORMATS = {"day": "%Y%m%d", "month": "%Y%m", "year": "%Y"}
+
+
+class ParquetStore:
+    """
+    按日期(可选再按证券)分区的Parquet数据集
+
+    目录结构为 root/date=<日期键>[/code=<证券代码>]/<key>.parquet，
+    数据以(datetime, code[, object])为索引写入，读取时将日期区间、证券列表
+    下推为分区裁剪和行组统计过滤，并只读取需要的列。
+    """
+
+    META_FILE = "_store.json"
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        partition: str = "day",
+        by_code: bool = False,
+        row_group_size: int = 64 * 1024,
+    ):
+        """
+        Args:
+            root: 数据集根目录，已存在的数据集以目录中保存的分区配置为准
+            partition: 日期分区粒度，"day"、"month"或"year"
+            by_code: 是否在日期分区下再按证券代码分区
+            row_group_size: 每个行组的最大行数，越小则时间区间过滤越精细
+        """
+        self.root = Path(root)
+        self.row_group_size = row_group_size
+        meta_path = self.root / self.META_FILE
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+        else:
+            if partition not in PARTITION_FORMATS:
+                raise ValueError(
+                    f"Unknown partition '{partition}'. "
+                    f"Available: {list(PARTITION_FORMATS)}"
+                )
+            meta = {"partition": partition, "by_code": by_code, "index": None}
+        self.partition = meta["partition"]
+        self.by_code = meta["by_code"]
+        self.index_names = meta["index"]
+
+    def _save_meta(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "partition": self.partition,
+            "by_code": self.by_code,
+            "index": self.index_names,
+        }
+        _atomic_write_text(self.root / self.META_FILE, json.dumps(meta))
+
+    def _date_key(self, time: Union[str, datetime, date]) -> str:
+        return pd.Timestamp(time).strftime(PARTITION_FORMATS[self.partition])
+
+    def exists(self) -> bool:
+        """数据集是否已有数据"""
+        return (self.root / self.META_FILE).exists()
+
+    def write(
+        self,
+        data: pd.DataFrame,
+        key: str = "part",
+        date: Optional[Union[str, datetime, date]] = None,
+        merge: bool = False,
+    ):
+        """
+        写入数据，每个分区写入(或原子地覆盖)一个名为key的文件
+
+        Args:
+            data: 以(datetime, code[, object])为索引的DataFrame
+            key: 分区内的文件名，同一分区内相同key的文件会被覆盖
+            date: 指定全部数据写入的日期分区(例如期货夜盘按交易日归档)，
+                默认按datetime列划分
+            merge: 是否与分区内已有的同名文件合并：相同索引的行以新数据为准，
+                新数据缺失的值保留已有的值；False时直接覆盖
+        """
+        if data.empty:
+            return
+        if self.index_names is None:
+            self.index_names = list(data.index.names)
+            self._save_meta()
+        data = data.reset_index()
+
+        if date is not None:
+            date_keys = pd.Series(self._date_key(date), index=data.index)
+        else:
+            date_keys = data["datetime"].dt.strftime(PARTITION_FORMATS[self.partition])
+        group_keys = [date_keys, data["code"]] if self.by_code else [date_keys]
+
+        for keys, part in data.groupby(group_keys, sort=False):
+            keys = keys if isinstance(keys, tuple) else (keys,)
+            part_dir = self.root / f"date={keys[0]}"
+            if self.by_code:
+                part_dir = part_dir / f"code={keys[1]}"
+                part = part.drop(columns="code")
+            part_dir.mkdir(parents=True, exist_ok=True)
+            path = part_dir / f"{key}.parquet"
+            if merge and path.exists():
+                part = self._merge_part(pq.ParquetFile(path).read().to_pandas(), part)
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            tmp_path = part_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+            pq.write_table(table, tmp_path, row_group_size=self.row_group_size)
+            os.replace(tmp_path, path)
+
+    def _merge_part(self, old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        """按索引合并分区文件中已有的数据和新数据，新数据优先"""
+        names = [n for n in self.index_names if n in new.columns]
+        columns = list(dict.fromkeys([*old.columns, *new.columns]))
+        merged = new.set_index(names).combine_first(old.set_index(names))
+        return merged.sort_index().reset_index()[columns]
+
+    def read(
+        self,
+        columns: Optional[List[str]] = None,
+        codes: Optional[Union[str, List[str]]] = None,
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+        filter: Optional[ds.Expression] = None,
+    ) -> pd.DataFrame:
+        """
+        读取数据，日期区间、证券列表和列会被下推到文件扫描
+
+        Args:
+            columns: 需要读取的数据列，默认为全部列
+            codes: 证券代码，可以是单个字符串或字符串列表，默认为全部证券
+            start_time: 开始时间
+            end_time: 结束时间
+            filter: 额外的pyarrow过滤表达式
+
+        Returns:
+            以写入时的索引为索引的DataFrame，没有数据时返回空DataFrame
+        """
+        if not self.exists():
+            return pd.DataFrame()
+        if isinstance(codes, str):
+            codes = [codes]
+
+        dataset = self.dataset()
+        expr = ds.scalar(True)
+        if start_time is not None:
+            start = pd.Timestamp(start_time)
+            expr &= ds.field("date") >= self._date_key(start)
+            expr &= ds.field("datetime") >= pa.scalar(start, type=pa.timestamp("ns"))
+        if end_time is not None:
+            end = pd.Timestamp(end_time)
+            # 分区可能按交易日归档(夜盘数据属于下一交易日)，分区键放宽几天
+            expr &= ds.field("date") <= self._date_key(end + pd.Timedelta(days=4))
+            expr &= ds.field("datetime") <= pa.scalar(end, type=pa.timestamp("ns"))
+        if codes is not None:
+            expr &= ds.field("code").isin(codes)
+        if filter is not None:
+            expr &= filter
+
+        if columns is not None:
+            columns = list(dict.fromkeys(self.index_names + list(columns)))
+            columns = [c for c in columns if c in dataset.schema.names]
+        table = dataset.to_table(columns=columns, filter=expr, use_threads=True)
+        data = table.to_pandas()
+        if "date" in data.columns and "date" not in self.index_names:
+            data = data.drop(columns="date")
+        if data.empty:
+            return pd.DataFrame()
+        return data.set_index(self.index_names).sort_index()
+
+    def read_part(
+        self, date: Union[str, datetime, date], key: str = "part"
+    ) -> pd.DataFrame:
+        """
+        读取一个日期分区中名为key的文件，用于读取-合并-覆盖式的增量写入
+
+        Args:
+            date: 分区内的任一日期
+            key: 分区内的文件名
+
+        Returns:
+            以写入时的索引为索引的DataFrame，文件不存在时返回空DataFrame
+        """
+        if self.by_code:
+            raise ValueError(
+                "read_part is not supported for stores partitioned by code"
+            )
+        path = self.root / f"date={self._date_key(date)}" / f"{key}.parquet"
+        if not path.exists():
+            return pd.DataFrame()
+        return pq.read_table(path).to_pandas().set_index(self.index_names)
+
+    def dataset(self) -> ds.Dataset:
+        """返回底层的pyarrow Dataset"""
+        fields = [("date", pa.string())]
+        if self.by_code:
+            fields.append(("code", pa.string()))
+        return ds.dataset(
+            self.root,
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema(fields), flavor="hive"),
+            exclude_invalid_files=False,
+            ignore_prefixes=[".", "_"],
+        )
+
+    @property
+    def columns(self) -> List[str]:
+        """数据集中的数据列(不含索引列)"""
+        if not self.exists():
+            return []
+        names = self.dataset().schema.names
+        return [n for n in names if n not in self.index_names and n != "date"]
+
+    def clear(self):
+        """删除整个数据集"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _atomic_write_text(path: Path, text: str):
+    """先写临时文件再替换，保证读者不会看到写了一半的文件"""
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
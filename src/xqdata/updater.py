@@ -0,0 +1,170 @@
+import hashlib
+import json
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+
+from xqdata.dataapi import DataApi
+from xqdata.storage import ParquetStore, _atomic_write_text
+
+
+def _codes_key(codes: List[str]) -> str:
+    """证券集合的稳定标识，同一组证券(与顺序无关)对应同一个文件和水位线"""
+    text = "\n".join(sorted(set(codes)))
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+class IncrementalUpdater:
+    """
+    因子数据的增量更新任务
+
+    每个(因子, 证券集合, 频率)保存一个水位线(已取到数据的最后一个交易日)。
+    每次更新按交易日历只获取水位线之后的新交易日，并重新获取水位线之前
+    lookback个交易日以修正迟到或更正的数据；结果按月读取-合并-原子覆盖地写入
+    与LocalDataApi相同结构的本地数据仓库(root/factor/<频率>/<数据集>)，
+    全部写入成功后才推进水位线，因此中断后重跑是安全的。
+    一个数据集保存固定的一组因子，可以包含多个互不重叠的证券集合。
+    """
+
+    WATERMARK_FILE = "_watermarks.json"
+
+    def __init__(
+        self,
+        api: DataApi,
+        root: Union[str, Path],
+        lookback: int = 1,
+        calendar: Optional[Callable] = None,
+    ):
+        """
+        Args:
+            api: 获取数据的数据API
+            root: 本地数据仓库根目录
+            lookback: 每次重新获取的已更新交易日数量
+            calendar: 参数为(开始日期, 结束日期)、返回交易日DatetimeIndex的函数，
+                默认为api.get_tradedays
+        """
+        self.api = api
+        self.root = Path(root).expanduser()
+        self.lookback = lookback
+        self.calendar = calendar or api.get_tradedays
+        self._lock = threading.Lock()
+        path = self.root / self.WATERMARK_FILE
+        self._watermarks: Dict[str, str] = (
+            json.loads(path.read_text()) if path.exists() else {}
+        )
+
+    @staticmethod
+    def _watermark_key(factor: str, codes_key: str, frequency: str) -> str:
+        return f"{frequency}:{codes_key}:{factor}"
+
+    def watermark(
+        self, factor: str, codes: List[str], frequency: str = "D"
+    ) -> Optional[pd.Timestamp]:
+        """
+        返回因子在该证券集合上已更新到的最后一个交易日，未更新过时返回None
+        """
+        key = self._watermark_key(factor, _codes_key(codes), frequency)
+        value = self._watermarks.get(key)
+        return None if value is None else pd.Timestamp(value)
+
+    def _save_watermarks(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        _atomic_write_text(
+            self.root / self.WATERMARK_FILE,
+            json.dumps(self._watermarks, indent=1, sort_keys=True),
+        )
+
+    def update(
+        self,
+        factors: Union[str, List[str]],
+        codes: Union[str, List[str]],
+        table: str,
+        start_time: Optional[Union[str, datetime, date]] = None,
+        end_time: Optional[Union[str, datetime, date]] = None,
+        frequency: str = "D",
+    ) -> pd.DataFrame:
+        """
+        增量更新因子数据
+
+        Args:
+            factors: 因子名称，可以是单个字符串或字符串列表
+            codes: 证券代码，可以是单个字符串或字符串列表
+            table: 写入的数据集名称
+            start_time: 没有水位线时(首次更新)的开始日期
+            end_time: 更新到的日期，默认为今天
+            frequency: 数据频率，默认为日频
+
+        Returns:
+            本次获取的数据，没有新的交易日时返回空DataFrame
+        """
+        if isinstance(factors, str):
+            factors = [factors]
+        if isinstance(codes, str):
+            codes = [codes]
+        end = pd.Timestamp(end_time if end_time is not None else date.today())
+        codes_key = _codes_key(codes)
+
+        watermarks = [self.watermark(f, codes, frequency) for f in factors]
+        if any(w is None for w in watermarks):
+            if start_time is None:
+                raise ValueError(
+                    f"No watermark for {factors} yet. "
+                    "Pass start_time for the first update."
+                )
+            fetch_start = pd.Timestamp(start_time)
+        else:
+            # 所有因子中最旧的水位线之后开始，并向前回溯lookback个交易日
+            watermark = min(watermarks)
+            if watermark >= end and self.lookback == 0:
+                return pd.DataFrame()
+            window = max(self.lookback, 0) * 2 + 15
+            history = self.calendar(watermark - pd.Timedelta(days=window), watermark)
+            history = history[history <= watermark]
+            if self.lookback > 0 and len(history) >= self.lookback:
+                fetch_start = history[-self.lookback]
+            else:
+                fetch_start = watermark + pd.Timedelta(days=1)
+        sessions = self.calendar(fetch_start, end)
+        if len(sessions) == 0:
+            return pd.DataFrame()
+
+        store = ParquetStore(
+            self.root / "factor" / frequency / table, partition="month"
+        )
+        if store.exists() and set(store.columns) != set(factors):
+            raise ValueError(
+                f"Table '{table}' holds {store.columns}. "
+                "Update it with the same factors or use another table."
+            )
+
+        data = self.api.get_factor(
+            factors, codes, sessions[0], end, frequency=frequency
+        )
+        if data.empty:
+            # 数据尚未发布时不推进水位线
+            return data
+        with self._lock:
+            self._write(store, data, codes_key)
+            # 水位线推进到实际取到数据的最后一天，回溯区间返回的数据较少时不回退
+            last = data.index.get_level_values("datetime").max().normalize()
+            for factor, old in zip(factors, watermarks):
+                key = self._watermark_key(factor, codes_key, frequency)
+                value = last if old is None else max(old, last)
+                self._watermarks[key] = value.strftime("%Y-%m-%d")
+            self._save_watermarks()
+        return data
+
+    @staticmethod
+    def _write(store: ParquetStore, data: pd.DataFrame, codes_key: str):
+        """按月合并已有数据后原子地覆盖写入，同一证券集合的数据保存在同一个文件中"""
+        dates = data.index.get_level_values("datetime")
+        for month, part in data.groupby(dates.to_period("M")):
+            old = store.read_part(month.start_time, key=codes_key)
+            if not old.empty:
+                # 新数据覆盖相同(日期, 证券)的旧数据，本次没有返回的旧数据保留
+                part = pd.concat([old, part], axis=0)
+                part = part[~part.index.duplicated(keep="last")].sort_index()
+            store.write(part, key=codes_key)
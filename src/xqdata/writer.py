@@ -0,0 +1,189 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# 文件后缀 -> 输出格式，没有后缀的路径写为Parquet数据集目录
+SUFFIX_FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "ipc",
+    ".ipc": "ipc",
+    ".feather": "ipc",
+}
+FORMATS = ("parquet", "ipc", "dataset")
+# 第一块数据中有全部缺失(类型未知)的列时，最多暂存的块数
+PENDING_CHUNKS = 8
+
+
+def infer_format(path: Union[str, Path]) -> str:
+    """
+    根据路径推断输出格式
+
+    Args:
+        path: 输出路径
+
+    Returns:
+        "parquet"(单个Parquet文件)、"ipc"(Arrow IPC文件)或"dataset"(Parquet数据集目录)
+    """
+    return SUFFIX_FORMATS.get(Path(path).suffix.lower(), "dataset")
+
+
+class FrameWriter:
+    """
+    逐块写入DataFrame的输出文件
+
+    每块数据到达时立即写出并释放，内存占用只与块的大小有关。所有块写入一个临时文件
+    (或目录)，close()时原子地替换目标路径，读者不会看到写了一半的结果；
+    出错时临时文件被删除，已存在的目标不受影响。
+
+    文件的schema在写入第一块数据时确定，之后的块会被转换为相同的schema(缺少的列写为null)。
+    声明了类型的列(dtypes)总是按声明写入；其余全部缺失的列(如没有取到值的字符串因子)
+    无法确定类型，此时暂存数据块，直到后续的块给出这些列的类型再统一schema，
+    最多暂存PENDING_CHUNKS块，之后仍未确定的列写为null类型。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        format: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            path: 输出路径
+            format: "parquet"、"ipc"或"dataset"，默认根据路径后缀推断
+            columns: 数据列及其顺序，默认以第一块数据的列为准
+            dtypes: 列名 -> pandas类型，如RQDataApi.factor_dtypes的返回值
+        """
+        self.path = Path(path).expanduser()
+        self.format = format or infer_format(self.path)
+        if self.format not in FORMATS:
+            raise ValueError(
+                f"Unknown output format '{self.format}'. Available: {list(FORMATS)}"
+            )
+        self.columns = list(columns) if columns is not None else None
+        self.dtypes = dict(dtypes or {})
+        self.rows = 0
+        self._tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        self._schema: Optional[pa.Schema] = None
+        self._writer = None
+        self._parts = 0
+        # schema确定前暂存的数据块
+        self._pending: List[pa.Table] = []
+
+    def write(self, data: pd.DataFrame):
+        """
+        写入一块数据
+
+        Args:
+            data: 与get_factor格式相同的DataFrame，索引会作为列写入
+        """
+        if data.empty:
+            return
+        if self.columns is None:
+            self.columns = list(data.columns)
+        missing = [c for c in self.columns if c not in data.columns]
+        # 缺少的列以object类型的缺失值补齐，类型由其他块或声明确定
+        data = data.reindex(columns=self.columns)
+        for column in missing:
+            data[column] = pd.Series(None, index=data.index, dtype=object)
+        declared = {c: d for c, d in self.dtypes.items() if c in data.columns}
+        if declared:
+            data = data.astype(declared)
+        table = pa.Table.from_pandas(data, preserve_index=True)
+        self.rows += len(data)
+
+        if self._schema is not None:
+            self._write_table(table.cast(self._schema))
+            return
+        self._pending.append(table)
+        schema = pa.unify_schemas(
+            [t.schema for t in self._pending], promote_options="permissive"
+        )
+        if (
+            any(pa.types.is_null(field.type) for field in schema)
+            and len(self._pending) < PENDING_CHUNKS
+        ):
+            return
+        self._flush_pending(schema)
+
+    def _flush_pending(self, schema: pa.Schema):
+        self._open(schema)
+        pending, self._pending = self._pending, []
+        for table in pending:
+            self._write_table(table.cast(schema))
+
+    def _write_table(self, table: pa.Table):
+        if self.format == "dataset":
+            pq.write_table(table, self._tmp / f"part-{self._parts:05d}.parquet")
+        else:
+            self._writer.write_table(table)
+        self._parts += 1
+
+    def _open(self, schema: pa.Schema):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._schema = schema
+        if self.format == "parquet":
+            self._writer = pq.ParquetWriter(self._tmp, schema)
+        elif self.format == "ipc":
+            self._writer = ipc.new_file(self._tmp, schema)
+        else:
+            self._tmp.mkdir()
+
+    def close(self) -> Optional[Path]:
+        """
+        完成写入并原子地替换目标路径
+
+        Returns:
+            输出路径，没有写入任何数据时不创建文件并返回None
+        """
+        if self._pending:
+            self._flush_pending(
+                pa.unify_schemas(
+                    [t.schema for t in self._pending], promote_options="permissive"
+                )
+            )
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._schema is None:
+            return None
+        if self.format == "dataset" and self.path.exists():
+            # 目录不能被直接替换：先移开旧目录，替换后再删除
+            old = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.old")
+            os.replace(self.path, old)
+            os.replace(self._tmp, self.path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(self._tmp, self.path)
+        return self.path
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        self._pending = []
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            finally:
+                self._writer = None
+        if self._tmp.is_dir():
+            shutil.rmtree(self._tmp, ignore_errors=True)
+        elif self._tmp.exists():
+            self._tmp.unlink()
+
+    def __enter__(self) -> "FrameWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
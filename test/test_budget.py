@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xqdata.budget import (
+    SpilledResult,
+    check_budget,
+    estimate_bytes,
+    parse_size,
+    plan_chunks,
+    rows_per_session,
+)
+
+
+class TestBudget:
+    def test_parse_size(self):
+        assert parse_size(1024) == 1024
+        assert parse_size("512MB") == 512 << 20
+        assert parse_size("1.5GiB") == 3 << 29
+        assert parse_size("4g") == 4 << 30
+        with pytest.raises(ValueError):
+            parse_size("lots")
+
+    def test_rows_per_session(self):
+        assert rows_per_session("D") == 1
+        assert rows_per_session("min") == 240
+        # 多分钟线由1分钟线合成，峰值按1分钟线计算
+        assert rows_per_session("5m") == 240
+        assert rows_per_session("W") == 1
+        assert rows_per_session("tick") > 240
+
+    def test_estimate_and_check(self):
+        estimate = estimate_bytes(250, 5000, 10, "min")
+        assert estimate == 250 * 5000 * 240 * (32 + 80)
+        check_budget(estimate, None)
+        check_budget(estimate, 0)
+        check_budget(estimate, "1TB")
+        with pytest.raises(MemoryError, match="exceeds max_memory"):
+            check_budget(estimate, "1GB")
+
+    def test_plan_chunks(self):
+        sessions = pd.bdate_range("2024-01-01", "2024-06-30")
+        codes = [f"{i:06d}" for i in range(100)]
+        budget = 50 << 20
+        chunks = plan_chunks(sessions, codes, 5, "min", budget)
+        assert len(chunks) > 1
+        for start, end, chunk in chunks:
+            n_sessions = ((sessions >= start) & (sessions <= end)).sum()
+            assert estimate_bytes(n_sessions, len(chunk), 5, "min") <= budget
+        # 每个(交易日, 证券)恰好被覆盖一次
+        covered = sum(
+            ((sessions >= s) & (sessions <= e)).sum() * len(c) for s, e, c in chunks
+        )
+        assert covered == len(sessions) * len(codes)
+
+        daily = plan_chunks(sessions, codes, 5, "D", budget)
+        assert daily == [(sessions[0], sessions[-1], codes)]
+
+
+class TestSpilledResult:
+    def setup_method(self):
+        pytest.importorskip("pyarrow")
+
+    def test_spill_and_load(self):
+        index = pd.MultiIndex.from_product(
+            [pd.date_range("2024-01-30", "2024-02-02"), ["a", "b", "c"]],
+            names=["datetime", "code"],
+        )
+        data = pd.DataFrame(
+            {"close": np.arange(len(index), dtype=float), "volume": 1.0}, index=index
+        )
+        with SpilledResult(
+            ["close", "volume"], ["a", "b", "c"], index[0][0], index[-1][0]
+        ) as result:
+            codes = index.get_level_values("code")
+            result.append(data[codes != "c"])
+            result.append(data[codes == "c"])
+            assert result.nbytes > 0
+
+            pd.testing.assert_frame_equal(result.load(), data)
+            part = result.load("close", codes=["b"], start_time="2024-02-01")
+            assert list(part.columns) == ["close"]
+            assert len(part) == 2
+            assert [len(chunk) for chunk in result] == [6, 6]
+            path = result.path
+        assert not pd.io.common.file_exists(path)
@@ -0,0 +1,135 @@
+import pandas as pd
+import pytest
+
+from xqdata.cache import CachedDataApi
+from xqdata.mock import MockDataApi
+
+
+class CountingMockDataApi(MockDataApi):
+    """记录请求次数的Mock数据源"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        # 为True时模拟查询失败，返回空DataFrame
+        self.failing = False
+
+    def get_factor(self, *args, **kwargs):
+        self.calls += 1
+        if self.failing:
+            return pd.DataFrame()
+        return super().get_factor(*args, **kwargs)
+
+
+class MinuteDataApi(MockDataApi):
+    """按区间生成确定的分钟数据，与RQData一样结束时间按时刻截断"""
+
+    def get_factor(self, factors, codes, start_time=None, end_time=None, **kwargs):
+        start, end = pd.Timestamp(start_time), pd.Timestamp(end_time)
+        times = pd.DatetimeIndex(
+            [
+                day + pd.Timedelta(minutes=m)
+                for day in pd.bdate_range(start.normalize(), end.normalize())
+                for m in (570, 600, 900)
+            ]
+        )
+        times = times[(times >= start) & (times <= end)]
+        index = pd.MultiIndex.from_product([times, codes], names=["datetime", "code"])
+        values = [float(t.value // 10**9) for t, _ in index]
+        return pd.DataFrame({f: values for f in factors}, index=index)
+
+
+class TestCachedDataApi:
+    """测试查询结果缓存"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        self.backend = CountingMockDataApi()
+        self.api = CachedDataApi(self.backend)
+        self.codes = ["000001.XSHE", "600000.XSHG", "300750.XSHE"]
+
+    def test_serves_subsets(self):
+        full = self.api.get_factor(
+            ["close", "open"], self.codes, "2024-01-01", "2024-01-31"
+        )
+        sub = self.api.get_factor("close", ["600000.XSHG"], "2024-01-10", "2024-01-20")
+        assert self.backend.calls == 1
+        expected = full.loc[
+            (slice("2024-01-10", "2024-01-20"), "600000.XSHG"), ["close"]
+        ]
+        pd.testing.assert_frame_equal(sub, expected)
+
+        # 超出已缓存的区间时重新请求
+        self.api.get_factor("close", self.codes, "2023-12-01", "2024-01-31")
+        assert self.backend.calls == 2
+        assert self.api.cache.hits == 1
+
+    def test_read_only(self):
+        df = self.api.get_factor("close", self.codes, "2024-01-01", "2024-01-05")
+        with pytest.raises(ValueError):
+            df.iloc[0, 0] = 1.0
+        # 增加列不影响缓存
+        df["open"] = 1.0
+        again = self.api.get_factor("close", self.codes, "2024-01-01", "2024-01-05")
+        assert list(again.columns) == ["close"]
+
+    def test_lru_eviction_by_bytes(self):
+        self.api.get_factor("close", self.codes, "2024-01-01", "2024-12-31")
+        size = self.api.cache.nbytes
+        self.api.cache.max_bytes = int(size * 1.5)
+
+        self.api.get_factor("open", self.codes, "2024-01-01", "2024-12-31")
+        assert self.api.cache.nbytes <= self.api.cache.max_bytes
+        # 最早的结果已被淘汰
+        self.api.get_factor("close", self.codes, "2024-01-01", "2024-12-31")
+        assert self.backend.calls == 3
+
+    def test_long_format(self):
+        df = self.api.get_factor(
+            "close", self.codes, "2024-01-01", "2024-01-05", panel=False
+        )
+        assert list(df.columns) == ["attribute", "value"]
+        assert len(df) == 15
+
+    def test_empty_result_not_cached(self):
+        self.backend.failing = True
+        df = self.api.get_factor("close", self.codes, "2024-01-01", "2024-01-05")
+        assert df.empty
+        assert self.api.cache.nbytes == 0
+
+        # 数据源恢复后重新请求，而不是返回缓存的空结果
+        self.backend.failing = False
+        df = self.api.get_factor("close", self.codes, "2024-01-01", "2024-01-05")
+        assert len(df) == 15
+        assert self.backend.calls == 2
+
+    def test_key_includes_source_and_user(self):
+        class OtherMockDataApi(CountingMockDataApi):
+            pass
+
+        shared = self.api.cache
+        other = CachedDataApi(OtherMockDataApi(), cache=shared)
+        self.api.get_factor("close", self.codes, "2024-01-01", "2024-01-05")
+        other.get_factor("close", self.codes, "2024-01-01", "2024-01-05")
+        # 不同类型的数据源不共享结果
+        assert other.api.calls == 1
+
+        # 不同用户的结果不共享
+        alice = CachedDataApi(CountingMockDataApi(), cache=shared)
+        bob = CachedDataApi(CountingMockDataApi(), cache=shared)
+        alice.auth(username="alice", password="secret")
+        bob.auth(username="bob", password="secret")
+        alice.get_factor("close", self.codes, "2024-01-01", "2024-01-05")
+        bob.get_factor("close", self.codes, "2024-01-01", "2024-01-05")
+        assert bob.api.calls == 1
+        assert "secret" not in repr(bob._base_key())
+
+    def test_intraday_end_matches_backend(self):
+        backend = MinuteDataApi()
+        api = CachedDataApi(backend)
+        api.get_factor("close", self.codes, "2024-01-02", "2024-01-05 15:00", "min")
+        for end in ["2024-01-04", "2024-01-04 10:00"]:
+            cached = api.get_factor("close", self.codes, "2024-01-02", end, "min")
+            expected = backend.get_factor(["close"], self.codes, "2024-01-02", end)
+            pd.testing.assert_frame_equal(cached, expected)
+        assert api.cache.hits == 2
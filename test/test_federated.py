@@ -0,0 +1,196 @@
+import pandas as pd
+
+from xqdata.dataapi import Coverage
+from xqdata.federated import FederatedDataApi
+from xqdata.mock import MockDataApi
+
+
+class PartialMockDataApi(MockDataApi):
+    """只能提供部分因子的Mock数据源，并记录收到的请求"""
+
+    catch_all = False
+
+    def __init__(self, factors):
+        super().__init__()
+        self.factors = set(factors)
+        self.requests = []
+
+    def supports_factor(self, factor, frequency="D"):
+        return factor in self.factors
+
+    def get_factor(self, factors, *args, **kwargs):
+        self.requests.append(list(factors))
+        return super().get_factor(factors, *args, **kwargs)
+
+
+class EmptyMockDataApi(PartialMockDataApi):
+    """声称能提供因子但不返回数据的数据源"""
+
+    def get_factor(self, factors, *args, **kwargs):
+        self.requests.append(list(factors))
+        return pd.DataFrame()
+
+
+class TestFederatedDataApi:
+    """测试组合数据源的路由"""
+
+    def test_get_factor_routes_by_backend(self):
+        local = PartialMockDataApi(["close"])
+        remote = PartialMockDataApi(["close", "volume", "pe"])
+        api = FederatedDataApi([local, remote])
+
+        df = api.get_factor(
+            ["close", "volume", "pe"],
+            ["000001.XSHE", "600000.XSHG"],
+            "2023-01-01",
+            "2023-01-10",
+        )
+
+        assert local.requests == [["close"]]
+        assert remote.requests == [["volume", "pe"]]
+        assert list(df.columns) == ["close", "volume", "pe"]
+        assert df.index.names == ["datetime", "code"]
+        assert not df.isna().any().any()
+
+    def test_get_factor_falls_back_when_missing(self):
+        local = EmptyMockDataApi(["close"])
+        remote = PartialMockDataApi(["close"])
+        api = FederatedDataApi([local, remote])
+
+        df = api.get_factor("close", "000001.XSHE", "2023-01-01", "2023-01-10")
+
+        assert local.requests == [["close"]]
+        assert remote.requests == [["close"]]
+        assert list(df.columns) == ["close"]
+        assert len(df) == 10
+
+    def test_get_factor_long_format(self):
+        api = FederatedDataApi([PartialMockDataApi(["close", "open"])])
+        df = api.get_factor(
+            ["close", "open"], "000001.XSHE", "2023-01-01", "2023-01-05", panel=False
+        )
+        assert list(df.columns) == ["attribute", "value"]
+        assert len(df) == 10
+
+    def test_get_info_uses_first_supporting_backend(self):
+        first, second = MockDataApi(), MockDataApi()
+        second.set_mock_info("stock", {"code": "str", "name": "str"})
+        api = FederatedDataApi([first, second])
+
+        assert api.supports_info("stock")
+        assert not api.supports_info("fund")
+        df = api.get_info("stock")
+        assert list(df.columns) == ["code", "name"]
+
+
+class TruncatedMockDataApi(PartialMockDataApi):
+    """只有部分证券和截至某一日期数据的数据源，记录请求的证券和区间"""
+
+    def __init__(self, factors, codes=None, last=None):
+        super().__init__(factors)
+        self.codes = codes
+        self.last = last
+        self.queries = []
+
+    def factor_coverage(self, factor, frequency="D"):
+        codes = None if self.codes is None else frozenset(self.codes)
+        return Coverage(codes, None, self.last)
+
+    def get_factor(self, factors, codes, start_time=None, end_time=None, **kwargs):
+        self.queries.append((list(codes), pd.Timestamp(start_time), end_time))
+        data = super().get_factor(factors, codes, start_time, end_time, **kwargs)
+        if self.codes is not None:
+            data = data[data.index.get_level_values("code").isin(self.codes)]
+        if self.last is not None:
+            data = data[data.index.get_level_values("datetime") <= self.last]
+        return data
+
+
+class SuspendedMockDataApi(TruncatedMockDataApi):
+    """最后一天没有数据、其余日期的值全部缺失的数据源"""
+
+    def get_factor(self, *args, **kwargs):
+        data = super().get_factor(*args, **kwargs)
+        return data.iloc[:-2] * float("nan")
+
+
+class DualkeyMockDataApi(PartialMockDataApi):
+    """只提供双键因子的数据源"""
+
+    def __init__(self, factors):
+        super().__init__([])
+        self.dualkey_factors = set(factors)
+
+    def supports_dualkey_factor(self, factor, frequency="D"):
+        return factor in self.dualkey_factors
+
+    def get_dualkey_factor(self, factors, *args, **kwargs):
+        self.requests.append(list(factors))
+        return super().get_dualkey_factor(factors, *args, **kwargs)
+
+
+class TestFederatedBackfill:
+    """测试部分覆盖的数据源由后面的数据源补齐"""
+
+    codes = ["000001.XSHE", "600000.XSHG"]
+
+    def test_missing_codes(self):
+        local = TruncatedMockDataApi(["close"], codes=self.codes[:1])
+        remote = TruncatedMockDataApi(["close"])
+        api = FederatedDataApi([local, remote])
+
+        df = api.get_factor("close", self.codes, "2023-01-02", "2023-01-06")
+        assert remote.queries == [
+            (self.codes[1:], pd.Timestamp("2023-01-02"), pd.Timestamp("2023-01-06"))
+        ]
+        assert len(df) == 10
+        assert not df["close"].isna().any()
+
+    def test_missing_tail(self):
+        local = TruncatedMockDataApi(["close"], last=pd.Timestamp("2023-01-04"))
+        remote = TruncatedMockDataApi(["close"])
+        api = FederatedDataApi([local, remote])
+
+        df = api.get_factor("close", self.codes, "2023-01-02", "2023-01-06")
+        assert [q[1] for q in remote.queries] == [pd.Timestamp("2023-01-05")]
+        dates = df.index.get_level_values("datetime").unique()
+        assert dates.max() == pd.Timestamp("2023-01-06")
+        assert len(df) == 10
+
+    def test_missing_values_not_backfilled(self):
+        """覆盖范围之内缺失的值和行(停牌等)是数据源的结果，不交给后面的数据源"""
+        local = SuspendedMockDataApi(["close"])
+        remote = TruncatedMockDataApi(["close"])
+        api = FederatedDataApi([local, remote])
+
+        df = api.get_factor("close", self.codes, "2023-01-02", "2023-01-06")
+        assert remote.queries == []
+        assert len(df) == 8
+        assert df["close"].isna().all()
+
+    def test_catch_all_not_used_for_backfill(self):
+        local = EmptyMockDataApi(["close"])
+        mock = MockDataApi()
+        df = FederatedDataApi([local, mock]).get_factor(
+            "close", self.codes, "2023-01-02", "2023-01-06"
+        )
+        assert df.empty
+
+        # 为该因子显式指定时才用Mock补齐
+        api = FederatedDataApi([local, mock], backfill={"close": [mock]})
+        df = api.get_factor("close", self.codes, "2023-01-02", "2023-01-06")
+        assert len(df) == 10
+
+    def test_dualkey_routing(self):
+        # 第一个数据源只把weight作为普通因子提供
+        local = PartialMockDataApi(["weight"])
+        local.supports_dualkey_factor = lambda factor, frequency="D": False
+        remote = DualkeyMockDataApi(["weight"])
+        api = FederatedDataApi([local, remote])
+        assert api.supports_dualkey_factor("weight")
+
+        df = api.get_dualkey_factor(
+            "weight", "000300.XSHG", ["a", "b"], "2023-01-02", "2023-01-03"
+        )
+        assert remote.requests == [["weight"]]
+        assert df.index.names == ["datetime", "code", "object"]
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xqdata.filters import IndexedTable, filter_frame, parse_filters
+
+
+class TestFilters:
+    """测试get_info的过滤条件和带索引的查询"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        rng = np.random.default_rng(0)
+        n = 500
+        self.data = pd.DataFrame(
+            {
+                "code": [f"{i:06d}.XSHE" for i in range(n)],
+                "exchange": rng.choice(["XSHE", "XSHG", "BJSE"], n),
+                "listed_date": pd.Timestamp("1990-01-01")
+                + pd.to_timedelta(rng.integers(0, 12000, n), "D"),
+                "industry": rng.choice(list("ABCDEFG"), n),
+            }
+        )
+        self.data.loc[3, "listed_date"] = pd.NaT
+
+    def test_parse_filters(self):
+        assert parse_filters(
+            exchange="XSHE",
+            industry=["A", "B"],
+            listed_date=slice("2000-01-01", None),
+            code__ne="000001.XSHE",
+        ) == [
+            ("exchange", "eq", "XSHE"),
+            ("industry", "in", ["A", "B"]),
+            ("listed_date", "ge", "2000-01-01"),
+            ("code", "ne", "000001.XSHE"),
+        ]
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            {"exchange": "XSHE"},
+            {"exchange": ["XSHE", "BJSE"], "listed_date__lt": "2010-01-01"},
+            {"listed_date": slice("2000-01-01", "2005-12-31"), "industry": "C"},
+            {"listed_date__gt": "2020-01-01", "exchange__ne": "XSHG"},
+            {"code": "000010.XSHE"},
+            {"industry__in": {"A", "Z"}},
+        ],
+    )
+    def test_indexed_table_matches_scan(self, filters):
+        """带索引的查询与逐行过滤结果一致"""
+        table = IndexedTable(self.data)
+        expected = filter_frame(self.data, **filters)
+        pd.testing.assert_frame_equal(table.query(**filters), expected)
+        # 第二次查询命中缓存
+        pd.testing.assert_frame_equal(table.query(**filters), expected)
+
+    def test_unknown_column(self):
+        with pytest.raises(KeyError):
+            IndexedTable(self.data).query(sector="A")
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xqdata.instruments import InstrumentDictionary, from_int_index, to_int_index
+
+
+def make_frame(codes):
+    index = pd.MultiIndex.from_product(
+        [pd.date_range("2024-01-02", periods=3), codes], names=["datetime", "code"]
+    )
+    return pd.DataFrame({"close": np.arange(len(index), dtype=float)}, index=index)
+
+
+class TestInstrumentDictionary:
+    def test_ids_are_stable(self):
+        dictionary = InstrumentDictionary(["600000.XSHG", "000001.XSHE"])
+        # 同一批内按代码排序
+        assert dictionary.ids(["000001.XSHE", "600000.XSHG"]).tolist() == [0, 1]
+        # 新证券追加分配，已有id不变
+        ids = dictionary.ids(["300750.XSHE", "000001.XSHE"])
+        assert ids.dtype == np.int32
+        assert ids.tolist() == [2, 0]
+        assert len(dictionary) == 3
+        assert dictionary.codes([2, 1]).tolist() == ["300750.XSHE", "600000.XSHG"]
+
+        other = InstrumentDictionary(["000001.XSHE", "600000.XSHG"])
+        assert other.ids(["600000.XSHG"]).tolist() == [1]
+
+    def test_unknown(self):
+        dictionary = InstrumentDictionary(["a"])
+        assert dictionary.ids(["b"], intern=False).tolist() == [-1]
+        assert "b" not in dictionary
+        with pytest.raises(KeyError):
+            dictionary.codes([5])
+
+    def test_round_trip(self):
+        dictionary = InstrumentDictionary()
+        data = make_frame(["600000.XSHG", "000001.XSHE"])
+        converted = to_int_index(data, dictionary)
+
+        assert converted.index.names == ["timestamp", "code_id"]
+        assert converted.index.get_level_values("timestamp").dtype == np.int64
+        assert converted.index.get_level_values("code_id").dtype == np.int32
+        pd.testing.assert_frame_equal(from_int_index(converted, dictionary), data)
+
+    def test_integer_join(self):
+        """不同来源的结果转换后可以按整数索引直接对齐"""
+        dictionary = InstrumentDictionary()
+        left = to_int_index(make_frame(["a", "b", "c"]), dictionary)
+        right = make_frame(["c", "a"]).rename(columns={"close": "volume"})
+        right = to_int_index(right, dictionary)
+
+        joined = left.join(right, how="inner")
+        assert len(joined) == 6
+        restored = from_int_index(joined, dictionary)
+        expected = make_frame(["a", "b", "c"]).join(
+            make_frame(["c", "a"]).rename(columns={"close": "volume"}), how="inner"
+        )
+        pd.testing.assert_frame_equal(restored.sort_index(), expected.sort_index())
+
+    def test_single_level(self):
+        dictionary = InstrumentDictionary(["a", "b"])
+        info = pd.DataFrame(
+            {"name": ["B", "A"]}, index=pd.Index(["b", "a"], name="code")
+        )
+        converted = to_int_index(info, dictionary)
+        assert converted.index.name == "code_id"
+        assert converted.index.tolist() == [1, 0]
+        pd.testing.assert_frame_equal(from_int_index(converted, dictionary), info)
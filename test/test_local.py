@@ -0,0 +1,143 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from xqdata.dataapi import get_dataapi  # noqa: E402
+from xqdata.local import LocalDataApi  # noqa: E402
+
+
+class TestLocalDataApi:
+    """测试本地Parquet数据仓库"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        index = pd.MultiIndex.from_product(
+            [
+                pd.date_range("2025-01-01", periods=60, freq="D"),
+                ["000001.XSHE", "600000.XSHG", "300750.XSHE"],
+            ],
+            names=["datetime", "code"],
+        )
+        n = len(index)
+        self.prices = pd.DataFrame(
+            {"close": np.arange(n, dtype=np.float64), "volume": np.arange(n) * 10},
+            index=index,
+        )
+        self.valuation = pd.DataFrame(
+            {"pe_ratio": np.arange(n, dtype=np.float64) / 10}, index=index
+        )
+
+    def test_get_dataapi(self):
+        assert isinstance(get_dataapi("local"), LocalDataApi)
+
+    def test_get_dataapi_without_pyarrow(self, monkeypatch):
+        """测试缺少pyarrow时报错并提示安装local extra，而不是退回Mock"""
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+        monkeypatch.delitem(sys.modules, "xqdata.local")
+        monkeypatch.delitem(sys.modules, "xqdata.local.api")
+        with pytest.raises(ImportError, match=r"xqdata\[local\]"):
+            get_dataapi("local")
+
+    def test_factor_coverage(self, tmp_path):
+        """覆盖范围为数据集中已有的证券和日期，写入后重新扫描"""
+        api = LocalDataApi(tmp_path)
+        assert api.factor_coverage("close") is None
+        api.write_factor(self.prices.loc["2025-01-01":"2025-01-15"], "price")
+        coverage = api.factor_coverage("close")
+        assert coverage.codes == set(self.prices.index.get_level_values("code"))
+        assert coverage.start == pd.Timestamp("2025-01-01")
+        assert coverage.end == pd.Timestamp("2025-01-15")
+        api.write_factor(self.prices.loc["2025-01-16":"2025-01-31"], "price")
+        assert api.factor_coverage("close").end == pd.Timestamp("2025-01-31")
+
+    def test_write_factor_appends_to_partition(self, tmp_path):
+        """测试分多次写入同一月分区时保留之前的数据，相同索引以新数据为准"""
+        api = LocalDataApi(tmp_path)
+        api.write_factor(self.prices.loc["2025-01-01":"2025-01-15"], "price")
+        update = self.prices.loc["2025-01-15":"2025-01-31"] + 1
+        api.write_factor(update, "price")
+
+        df = api.get_factor(
+            ["close", "volume"], "000001.XSHE", "2025-01-01", "2025-01-31"
+        )
+        assert len(df) == 31
+        assert (
+            df.loc[("2025-01-14", "000001.XSHE"), "close"]
+            == self.prices.loc[("2025-01-14", "000001.XSHE"), "close"]
+        )
+        assert (
+            df.loc[("2025-01-15", "000001.XSHE"), "close"]
+            == update.loc[("2025-01-15", "000001.XSHE"), "close"]
+        )
+
+    def test_get_factor(self, tmp_path):
+        """测试跨数据集读取、区间和证券过滤"""
+        api = LocalDataApi(tmp_path)
+        api.write_factor(self.prices, "price")
+        api.write_factor(self.valuation, "valuation")
+
+        assert api.supports_factor("close")
+        assert not api.supports_factor("close", "min")
+        df = api.get_factor(
+            ["pe_ratio", "close"],
+            ["000001.XSHE", "300750.XSHE"],
+            "2025-01-10",
+            "2025-02-05",
+        )
+        expected = pd.concat([self.valuation, self.prices], axis=1).loc[
+            (slice("2025-01-10", "2025-02-05"), ["000001.XSHE", "300750.XSHE"]),
+            ["pe_ratio", "close"],
+        ]
+        pd.testing.assert_frame_equal(df, expected, check_freq=False)
+
+    def test_get_factor_long_format(self, tmp_path):
+        api = LocalDataApi(tmp_path)
+        api.write_factor(self.prices, "price")
+        df = api.get_factor(
+            "close", "000001.XSHE", "2025-01-01", "2025-01-05", panel=False
+        )
+        assert list(df.columns) == ["attribute", "value"]
+        assert len(df) == 5
+
+    def test_get_dualkey_factor(self, tmp_path):
+        api = LocalDataApi(tmp_path)
+        index = pd.MultiIndex.from_product(
+            [
+                pd.date_range("2025-01-01", periods=5, freq="D"),
+                ["client_001", "client_002"],
+                ["IF", "IC", "IM"],
+            ],
+            names=["datetime", "code", "object"],
+        )
+        holding = pd.DataFrame({"holding": np.arange(len(index))}, index=index)
+        api.write_factor(holding, "holding")
+        assert api.supports_dualkey_factor("holding")
+        assert not api.supports_factor("holding")
+
+        df = api.get_dualkey_factor("holding", "client_001", ["IF", "IM"])
+        assert df.index.names == ["datetime", "code", "object"]
+        assert len(df) == 10
+        assert set(df.index.get_level_values("object")) == {"IF", "IM"}
+
+    def test_get_info(self, tmp_path):
+        api = LocalDataApi(tmp_path)
+        api.write_info(
+            "stock",
+            pd.DataFrame(
+                {
+                    "code": ["000001.XSHE", "600000.XSHG", "300750.XSHE"],
+                    "exchange": ["XSHE", "XSHG", "XSHE"],
+                }
+            ),
+        )
+        assert api.supports_info("stock")
+        assert api.get_info("stock", exchange="XSHE")["code"].tolist() == [
+            "000001.XSHE",
+            "300750.XSHE",
+        ]
+        with pytest.warns(UserWarning):
+            assert api.get_info("fund").empty
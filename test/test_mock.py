@@ -2,6 +2,7 @@ import pandas as pd
 import pytest
 
 from xqdata.dataapi import get_dataapi
+from xqdata.mock import MockDataApi
 
 
 class TestMockDataApi:
@@ -25,6 +26,13 @@ class TestMockDataApi:
         assert isinstance(df, pd.DataFrame)
         assert len(df) == 0
 
+    def test_get_info_unknown_filter_column(self):
+        """测试过滤条件包含不存在的列时警告并返回空DataFrame"""
+        self.api.set_mock_info("stock", {"code": "str", "name": "str"})
+        with pytest.warns(UserWarning, match="Unknown filter column 'industry'"):
+            df = self.api.get_info("stock", industry="bank")
+        assert df.empty
+
     def test_set_mock_info_and_get_info_stock(self):
         """测试设置股票信息schema并获取数据"""
         # 设置股票信息的schema
@@ -243,6 +251,21 @@ class TestMockDataApi:
         )
         assert len(df_monthly) == 6  # 6个月
 
+    def test_get_cross_section(self):
+        """测试单日截面数据"""
+        factors = ["pe_ratio", "pb_ratio"]
+        codes = ["000001.XSHE", "000002.XSHE", "000003.XSHE"]
+
+        df = self.api.get_cross_section(factors, "2024-01-02", universe=codes)
+        assert df.index.name == "code"
+        assert df.index.tolist() == codes
+        assert set(df.columns) == set(factors)
+
+        # 没有证券列表时无法确定默认的证券范围
+        with pytest.warns(UserWarning, match="No listed stocks"):
+            df = MockDataApi().get_cross_section(factors, "2024-01-02")
+        assert df.empty
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
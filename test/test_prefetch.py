@@ -0,0 +1,81 @@
+import threading
+
+import pandas as pd
+
+from xqdata.mock import MockDataApi
+from xqdata.prefetch import PrefetchingDataApi, iter_windows, next_window
+
+
+class RecordingMockDataApi(MockDataApi):
+    """记录请求窗口的Mock数据源"""
+
+    def __init__(self):
+        super().__init__()
+        self.windows = []
+        self.threads = set()
+
+    def get_factor(self, factors, codes, start_time=None, end_time=None, **kwargs):
+        self.windows.append((pd.Timestamp(start_time), pd.Timestamp(end_time)))
+        self.threads.add(threading.get_ident())
+        return super().get_factor(factors, codes, start_time, end_time, **kwargs)
+
+
+class TestPrefetch:
+    """测试顺序窗口的后台预取"""
+
+    def test_next_window(self):
+        assert next_window(pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-31")) == (
+            pd.Timestamp("2024-02-01"),
+            pd.Timestamp("2024-02-29"),
+        )
+        assert next_window(pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-10")) == (
+            pd.Timestamp("2024-01-11"),
+            pd.Timestamp("2024-01-20"),
+        )
+
+    def test_iter_windows(self):
+        api = RecordingMockDataApi()
+        windows = list(
+            iter_windows(
+                api, "close", "000001.XSHE", "2024-01-15", "2024-04-10", ahead=2
+            )
+        )
+        assert [(s, e) for s, e, _ in windows] == [
+            (pd.Timestamp("2024-01-15"), pd.Timestamp("2024-01-31")),
+            (pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-29")),
+            (pd.Timestamp("2024-03-01"), pd.Timestamp("2024-03-31")),
+            (pd.Timestamp("2024-04-01"), pd.Timestamp("2024-04-10")),
+        ]
+        assert sum(len(data) for _, _, data in windows) == 87
+        assert threading.get_ident() not in api.threads
+
+    def test_wrapper_detects_sequential_access(self):
+        backend = RecordingMockDataApi()
+        api = PrefetchingDataApi(backend, ahead=1)
+        months = [("2024-01-01", "2024-01-31"), ("2024-02-01", "2024-02-29")]
+        months += [("2024-03-01", "2024-03-31"), ("2024-04-01", "2024-04-30")]
+        for start, end in months:
+            df = api.get_factor("close", "000001.XSHE", start, end)
+            assert df.index.get_level_values("datetime").min() == pd.Timestamp(start)
+        api.close()
+
+        # 第二次调用后检测到顺序访问，之后的窗口都由预取提供，每个窗口只请求一次
+        assert api.hits == 2
+        assert sorted(backend.windows)[:4] == [
+            (pd.Timestamp(start), pd.Timestamp(end)) for start, end in months
+        ]
+        assert len(set(backend.windows)) == len(backend.windows)
+
+    def test_jump_evicts_stale_windows(self):
+        api = PrefetchingDataApi(RecordingMockDataApi(), ahead=2)
+        api.get_factor("close", "000001.XSHE", "2024-01-01", "2024-01-31")
+        api.get_factor("close", "000001.XSHE", "2024-02-01", "2024-02-29")
+        # 同一查询跳到其他区间并改变窗口大小，之前推测的窗口被丢弃
+        api.get_factor("close", "000001.XSHE", "2024-06-01", "2024-06-10")
+        api.get_factor("close", "000001.XSHE", "2024-06-11", "2024-06-20")
+        windows = sorted(window for _, window in api._pending)
+        api.close()
+        assert windows == [
+            (pd.Timestamp("2024-06-21"), pd.Timestamp("2024-06-30")),
+            (pd.Timestamp("2024-07-01"), pd.Timestamp("2024-07-10")),
+        ]
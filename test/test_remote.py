@@ -0,0 +1,96 @@
+import sys
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from xqdata.dataapi import get_dataapi  # noqa: E402
+from xqdata.mock import MockDataApi  # noqa: E402
+from xqdata.mock.synthetic import SyntheticMarket  # noqa: E402
+from xqdata.remote import RemoteDataApi  # noqa: E402
+from xqdata.remote.server import DataServer  # noqa: E402
+
+
+class CountingApi(MockDataApi):
+    """记录数据源被查询的次数"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def get_factor(self, *args, **kwargs):
+        self.calls += 1
+        return super().get_factor(*args, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def backend():
+    api = CountingApi()
+    api.use_synthetic_market(
+        SyntheticMarket(n_codes=20, start_time="2024-01-01", end_time="2024-06-30")
+    )
+    return api
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def client(request, backend, tmp_path):
+    address = "127.0.0.1:0" if request.param == "tcp" else str(tmp_path / "xq.sock")
+    with DataServer(backend, address) as server:
+        yield RemoteDataApi(server.address, timeout=10)
+    if request.param == "unix":
+        assert not (tmp_path / "xq.sock").exists()
+
+
+class TestRemoteDataApi:
+    def test_get_factor(self, client, backend):
+        codes = backend.get_info("stock")["code"].tolist()[:5]
+        args = (["close", "volume", "is_st"], codes, "2024-02-01", "2024-03-31")
+        data = client.get_factor(*args)
+        expected = backend.get_factor(*args)
+        pd.testing.assert_frame_equal(data, expected)
+
+        long = client.get_factor(*args, panel=False)
+        assert list(long.columns) == ["attribute", "value"]
+        assert len(long) == expected.notna().sum().sum()
+
+    def test_cached_on_server(self, client, backend):
+        codes = backend.get_info("stock")["code"].tolist()
+        client.get_factor("close", codes[:10], "2024-01-01", "2024-06-30")
+        calls = backend.calls
+        # 服务端缓存覆盖的查询不再请求数据源
+        data = client.get_factor("close", codes[:3], "2024-03-01", "2024-03-31")
+        assert backend.calls == calls
+        assert not data.empty
+
+    def test_info_and_calendar(self, client, backend):
+        pd.testing.assert_frame_equal(
+            client.get_info("stock"), backend.get_info("stock")
+        )
+        days = client.get_tradedays("2024-01-01", "2024-01-31")
+        assert days.equals(backend.get_tradedays("2024-01-01", "2024-01-31"))
+        assert client.supports_info("tradedays")
+
+    def test_server_error(self, client):
+        with pytest.warns(UserWarning, match="Error calling get_cross_section"):
+            data = client.get_cross_section("close", "not-a-date")
+        assert data.empty
+
+    def test_unreachable(self, tmp_path):
+        client = RemoteDataApi(str(tmp_path / "missing.sock"))
+        with pytest.warns(UserWarning):
+            assert client.get_factor("close", ["a"], "2024-01-01", "2024-01-31").empty
+        # 与数据查询一致，服务不可用时不抛出异常
+        with pytest.warns(UserWarning):
+            assert not client.supports_factor("close")
+        with pytest.warns(UserWarning):
+            assert not client.supports_info("stock")
+
+
+def test_get_dataapi_without_pyarrow(monkeypatch):
+    """缺少pyarrow时报错并提示安装local extra，而不是退回Mock"""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    for name in [m for m in sys.modules if m.startswith("xqdata.remote")]:
+        monkeypatch.delitem(sys.modules, name)
+    with pytest.raises(ImportError, match=r"xqdata\[local\]"):
+        get_dataapi("remote")
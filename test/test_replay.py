@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from xqdata.mock import MockDataApi
+from xqdata.replay import BarReplay
+
+
+class TestBarReplay:
+    """测试逐日行情回放"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        self.api = MockDataApi()
+        self.codes = ["000001.XSHE", "600000.XSHG", "300750.XSHE"]
+
+    def test_get_tradedays_fallback(self):
+        days = self.api.get_tradedays("2024-01-01", "2024-01-07")
+        assert len(days) == 5
+        assert days[0] == pd.Timestamp("2024-01-01")
+
+    def test_cross_sections_are_views(self):
+        replay = BarReplay(
+            self.api, self.codes, "2024-01-01", "2024-01-31", factors=["pe_ratio"]
+        )
+        assert len(replay) == 23
+        assert replay.arrays["close"].flags["C_CONTIGUOUS"]
+
+        for section in replay:
+            assert np.shares_memory(section["close"], replay.arrays["close"])
+            assert section["pe_ratio"].shape == (3,)
+            assert section.tradable.dtype == bool
+
+        section = replay.at("2024-01-07")
+        assert section.date == pd.Timestamp("2024-01-05")
+
+    def test_matches_get_bars(self):
+        bars = pd.DataFrame(
+            {"close": [10.0, 11.0, 12.0], "volume": [100.0, 0.0, 200.0]},
+            index=pd.MultiIndex.from_tuples(
+                [
+                    (pd.Timestamp("2024-01-02"), "000001.XSHE"),
+                    (pd.Timestamp("2024-01-03"), "000001.XSHE"),
+                    (pd.Timestamp("2024-01-04"), "000001.XSHE"),
+                ],
+                names=["datetime", "code"],
+            ),
+        )
+
+        class FixedDataApi(MockDataApi):
+            def get_factor(self, factors, codes, *args, **kwargs):
+                return bars.reindex(columns=factors)
+
+        replay = BarReplay(FixedDataApi(), self.codes, "2024-01-01", "2024-01-05")
+        np.testing.assert_array_equal(
+            replay.arrays["close"][:, 0], [np.nan, 10.0, 11.0, 12.0, np.nan]
+        )
+        # 由首末有数据的交易日推断上市期间，无成交视为停牌
+        np.testing.assert_array_equal(
+            replay.listed[:, 0], [False, True, True, True, False]
+        )
+        np.testing.assert_array_equal(
+            replay.tradable[:, 0], [False, True, False, True, False]
+        )
+        assert not replay.listed[:, 1].any()
+
+    def test_suspension_flag(self):
+        index = pd.MultiIndex.from_product(
+            [pd.to_datetime(["2024-01-02", "2024-01-03"]), ["000001.XSHE"]],
+            names=["datetime", "code"],
+        )
+        bars = pd.DataFrame(
+            {
+                "close": [10.0, 11.0],
+                "volume": [100.0, 200.0],
+                "is_paused": pd.Series([pd.NA, True], dtype=object).to_numpy(),
+            },
+            index=index,
+        )
+
+        class FixedDataApi(MockDataApi):
+            def get_factor(self, factors, codes, *args, **kwargs):
+                return bars.reindex(columns=factors)
+
+        # 停牌标记同时作为因子请求，且是含pd.NA的object列
+        replay = BarReplay(
+            FixedDataApi(),
+            self.codes,
+            "2024-01-02",
+            "2024-01-03",
+            factors=["is_paused"],
+            suspension_factor="is_paused",
+        )
+        assert "is_paused" in replay.arrays
+        np.testing.assert_array_equal(replay.suspended[:, 0], [False, True])
+        np.testing.assert_array_equal(replay.tradable[:, 0], [True, False])
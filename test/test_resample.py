@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xqdata.resample import get_base_frequency, parse_frequency, resample_bars
+
+
+class TestResample:
+    """测试本地K线合成"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        days = pd.bdate_range("2025-01-01", "2025-03-31")
+        index = pd.MultiIndex.from_product(
+            [days, ["000001.XSHE", "300750.XSHE"]], names=["datetime", "code"]
+        )
+        close = 10 + np.arange(len(index), dtype=np.float64) / 10
+        self.daily = pd.DataFrame(
+            {
+                "open": close - 0.05,
+                "high": close + 0.1,
+                "low": close - 0.1,
+                "close": close,
+                "volume": np.full(len(index), 100, dtype=np.int64),
+                "close_post": close * 2,
+            },
+            index=index,
+        )
+
+        minutes = pd.date_range("2025-01-02 09:31", periods=120, freq="min").append(
+            pd.date_range("2025-01-02 13:01", periods=120, freq="min")
+        )
+        index = pd.MultiIndex.from_product(
+            [minutes, ["000001.XSHE"]], names=["datetime", "code"]
+        )
+        price = np.arange(240, dtype=np.float64)
+        self.minute = pd.DataFrame(
+            {
+                "open": price,
+                "high": price + 1,
+                "low": price - 1,
+                "close": price + 0.5,
+                "volume": np.ones(240, dtype=np.int64),
+            },
+            index=index,
+        )
+
+    @pytest.mark.parametrize(
+        "frequency, expected",
+        [
+            ("D", ("D", 1)),
+            ("W", ("W", 1)),
+            ("ME", ("ME", 1)),
+            ("M", ("ME", 1)),
+            ("QE", ("QE", 1)),
+            ("min", ("m", 1)),
+            ("5m", ("m", 5)),
+            ("15min", ("m", 15)),
+            ("1h", ("m", 60)),
+            ("tick", None),
+        ],
+    )
+    def test_parse_frequency(self, frequency, expected):
+        """测试频率解析"""
+        assert parse_frequency(frequency) == expected
+
+    def test_get_base_frequency(self):
+        """测试合成所需的基础频率"""
+        assert get_base_frequency("W") == "D"
+        assert get_base_frequency("QE") == "D"
+        assert get_base_frequency("15m") == "min"
+        assert get_base_frequency("D") is None
+        assert get_base_frequency("min") is None
+        assert get_base_frequency("tick") is None
+
+    def test_resample_monthly(self):
+        """测试由日线合成月线"""
+        df = resample_bars(self.daily, "ME")
+        assert df.index.names == ["datetime", "code"]
+        assert df.columns.tolist() == self.daily.columns.tolist()
+        assert df.index.get_level_values("datetime").unique().tolist() == [
+            pd.Timestamp("2025-01-31"),
+            pd.Timestamp("2025-02-28"),
+            pd.Timestamp("2025-03-31"),
+        ]
+
+        jan = self.daily.loc[pd.IndexSlice["2025-01", "000001.XSHE"], :]
+        bar = df.loc[("2025-01-31", "000001.XSHE")]
+        assert bar["open"] == jan["open"].iloc[0]
+        assert bar["high"] == jan["high"].max()
+        assert bar["low"] == jan["low"].min()
+        assert bar["close"] == jan["close"].iloc[-1]
+        assert bar["close_post"] == jan["close_post"].iloc[-1]
+        assert bar["volume"] == jan["volume"].sum()
+        assert df["volume"].dtype == np.int64
+
+    def test_resample_weekly(self):
+        """测试由日线合成周线，以每周最后一个交易日为标签"""
+        df = resample_bars(self.daily, "W")
+        labels = df.index.get_level_values("datetime").unique()
+        assert (labels.dayofweek == 4).sum() == len(labels) - 1  # 最后一周截止周一
+        assert len(df) == 2 * len(labels)
+
+    def test_resample_minutes_session_aligned(self):
+        """测试由1分钟线合成60分钟线，不跨越午休"""
+        df = resample_bars(self.minute, "60m")
+        assert df.index.get_level_values("datetime").tolist() == [
+            pd.Timestamp("2025-01-02 10:30"),
+            pd.Timestamp("2025-01-02 11:30"),
+            pd.Timestamp("2025-01-02 14:00"),
+            pd.Timestamp("2025-01-02 15:00"),
+        ]
+        assert df["volume"].tolist() == [60, 60, 60, 60]
+        assert df["open"].tolist() == [0, 60, 120, 180]
+        assert df["close"].tolist() == [59.5, 119.5, 179.5, 239.5]
+
+    def test_resample_minutes_not_across_lunch(self):
+        """测试不能整除上午交易时长的周期在午休处截断"""
+        df = resample_bars(self.minute, "90m")
+        assert df.index.get_level_values("datetime").tolist() == [
+            pd.Timestamp("2025-01-02 11:00"),
+            pd.Timestamp("2025-01-02 11:30"),
+            pd.Timestamp("2025-01-02 14:30"),
+            pd.Timestamp("2025-01-02 15:00"),
+        ]
+        assert df["volume"].tolist() == [90, 30, 90, 30]
+
+    def test_resample_minutes_missing_minutes(self):
+        """测试某个交易日缺失的分钟不会使之后的K线错位"""
+        next_day = self.minute.rename(
+            index=lambda t: (
+                t + pd.Timedelta(days=1) if isinstance(t, pd.Timestamp) else t
+            )
+        )
+        times = next_day.index.get_level_values("datetime")
+        # 第二个交易日缺失10:00-10:09的数据
+        gap = (times >= "2025-01-03 10:00") & (times < "2025-01-03 10:10")
+        df = resample_bars(pd.concat([self.minute, next_day[~gap]]), "30m")
+        first = df.loc["2025-01-02"].index.get_level_values("datetime")
+        second = df.loc["2025-01-03"].index.get_level_values("datetime")
+        assert (second - first).tolist() == [pd.Timedelta(days=1)] * 8
+        assert df.loc["2025-01-03", "volume"].tolist() == [29, 21] + [30] * 6
+
+    def test_resample_minutes_night_session(self):
+        """测试期货夜盘与日盘按交易日合并，小节休息处截断"""
+        night = pd.date_range("2025-01-02 21:01", periods=120, freq="min")
+        day = (
+            pd.date_range("2025-01-03 09:01", periods=75, freq="min")
+            .append(pd.date_range("2025-01-03 10:31", periods=60, freq="min"))
+            .append(pd.date_range("2025-01-03 13:31", periods=90, freq="min"))
+        )
+        minutes = night.append(day)
+        index = pd.MultiIndex.from_product(
+            [minutes, ["RB2505"]], names=["datetime", "code"]
+        )
+        data = pd.DataFrame(
+            {
+                "close": np.arange(len(minutes), dtype=np.float64),
+                "volume": np.ones(len(minutes), dtype=np.int64),
+                "trading_date": pd.Timestamp("2025-01-03"),
+            },
+            index=index,
+        )
+        df = resample_bars(data, "30m")
+        assert df.index.get_level_values("datetime").tolist() == [
+            pd.Timestamp(t)
+            for t in [
+                "2025-01-02 21:30",
+                "2025-01-02 22:00",
+                "2025-01-02 22:30",
+                "2025-01-02 23:00",
+                "2025-01-03 09:30",
+                "2025-01-03 10:00",
+                "2025-01-03 10:15",
+                "2025-01-03 11:00",
+                "2025-01-03 11:30",
+                "2025-01-03 14:00",
+                "2025-01-03 14:30",
+                "2025-01-03 15:00",
+            ]
+        ]
+        assert df["volume"].tolist() == [30] * 6 + [15, 30, 30, 30, 30, 30]
@@ -0,0 +1,160 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rqdatac")
+
+from xqdata.rq.api import RQDataApi  # noqa: E402
+
+
+def rq_get_price(factors, codes, start_time=None, end_time=None, frequency="D"):
+    index = pd.MultiIndex.from_product(
+        [pd.bdate_range(start_time, end_time), codes], names=["datetime", "code"]
+    )
+    values = np.arange(len(index), dtype=float)
+    return pd.DataFrame({f: values for f in factors}, index=index)
+
+
+class TestMemoryBudget:
+    """测试内存预算(不需要连接RQData)"""
+
+    def setup_method(self):
+        self.api = RQDataApi()
+        self.api.register_factor("close", rq_get_price)
+        self.api.get_tradedays = lambda start, end: pd.bdate_range(start, end)
+        self.codes = [f"{i:06d}.XSHE" for i in range(20)]
+
+    def test_within_budget(self):
+        data = self.api.get_factor(
+            "close", self.codes, "2024-01-01", "2024-03-31", max_memory="1GB"
+        )
+        assert isinstance(data, pd.DataFrame)
+
+    def test_raise(self):
+        with pytest.raises(MemoryError):
+            self.api.get_factor(
+                "close",
+                self.codes,
+                "2024-01-01",
+                "2024-03-31",
+                max_memory=1000,
+            )
+
+    def test_spill(self):
+        pytest.importorskip("pyarrow")
+        self.api.set_option("max_memory", 20_000)
+        with pytest.raises(MemoryError):
+            self.api.get_factor("close", self.codes, "2024-01-01", "2024-03-31")
+        result = self.api.get_factor_spilled(
+            "close", self.codes, "2024-01-01", "2024-03-31"
+        )
+
+        session = self.api.session(max_memory=0)
+        expected = session.get_factor("close", self.codes, "2024-01-01", "2024-03-31")
+        assert isinstance(expected, pd.DataFrame)
+        # 分块获取的数值与位置有关，只比较索引
+        loaded = result.load()
+        assert loaded.index.equals(expected.index)
+        assert result.load(codes=self.codes[:2]).shape == (len(expected) // 10, 1)
+        result.close()
+
+        with self.api.get_factor_spilled(
+            "close", self.codes[:2], "2024-01-01", "2024-01-31", panel=False
+        ) as long:
+            data = long.load()
+        assert list(data.columns) == ["attribute", "value"]
+        assert len(data) == 23 * 2
+
+
+class TestStreamingOutput:
+    """测试out=逐块写入文件(不需要连接RQData)"""
+
+    def setup_method(self):
+        pytest.importorskip("pyarrow")
+        self.api = RQDataApi()
+        self.api.register_factor("close", rq_get_price)
+        self.api.get_tradedays = lambda start, end: pd.bdate_range(start, end)
+        self.codes = [f"{i:06d}.XSHE" for i in range(20)]
+
+    def test_out(self, tmp_path):
+        import pyarrow.parquet as pq
+
+        calls = []
+        self.api.register_factor(
+            "close",
+            lambda *args, **kwargs: calls.append(1) or rq_get_price(*args, **kwargs),
+        )
+        path = self.api.get_factor(
+            "close",
+            self.codes,
+            "2024-01-01",
+            "2024-03-31",
+            max_memory=20_000,
+            out=tmp_path / "close.parquet",
+        )
+        assert path == tmp_path / "close.parquet"
+        assert len(calls) > 1
+
+        expected = self.api.get_factor("close", self.codes, "2024-01-01", "2024-03-31")
+        data = pq.read_table(path).to_pandas()
+        assert data.sort_index().index.equals(expected.index)
+        assert list(data.columns) == ["close"]
+
+    def test_failed_query_leaves_no_file(self, tmp_path):
+        def failing(*args, **kwargs):
+            raise KeyboardInterrupt
+
+        self.api.register_factor("close", failing)
+        with pytest.raises(KeyboardInterrupt):
+            self.api.get_factor(
+                "close",
+                self.codes,
+                "2024-01-01",
+                "2024-01-31",
+                out=tmp_path / "x.arrow",
+            )
+        assert list(tmp_path.iterdir()) == []
+
+    def test_failed_chunk_leaves_no_file(self, tmp_path):
+        def failing(factors, codes, *args, **kwargs):
+            if "000019.XSHE" in codes:
+                raise ValueError("boom")
+            return rq_get_price(factors, codes, *args, **kwargs)
+
+        self.api.register_factor("close", failing)
+        with pytest.raises(ValueError, match="boom"):
+            self.api.get_factor(
+                "close",
+                self.codes,
+                "2024-01-01",
+                "2024-03-31",
+                max_memory=20_000,
+                out=tmp_path / "x.parquet",
+            )
+        assert list(tmp_path.iterdir()) == []
+
+    def test_warning_does_not_abort(self, tmp_path):
+        def noisy(*args, **kwargs):
+            warnings.warn("duplicate rows dropped")
+            return rq_get_price(*args, **kwargs)
+
+        self.api.register_factor("close", noisy)
+        with pytest.warns(UserWarning, match="duplicate"):
+            path = self.api.get_factor(
+                "close",
+                self.codes,
+                "2024-01-01",
+                "2024-01-31",
+                out=tmp_path / "x.parquet",
+            )
+        assert path == tmp_path / "x.parquet"
+
+    def test_no_data(self, tmp_path):
+        with pytest.warns(UserWarning, match="Nothing written"):
+            path = self.api.get_factor(
+                "close", self.codes, "2024-01-06", "2024-01-07", out=tmp_path / "x"
+            )
+        assert path is None
+        assert not (tmp_path / "x").exists()
@@ -1,5 +1,6 @@
 import os
 
+import pandas as pd
 import pytest
 
 from xqdata.dataapi import get_dataapi
@@ -330,3 +331,100 @@ class TestRQDataFactorApi:
             assert factor in df.columns
 
         assert len(df) == 700  # (300+50) * 2只股票
+
+    def test_api_get_cross_section(self):
+        """测试API的get_cross_section方法"""
+        factors = ["pe_ratio", "close", "is_st", "citics_2019_l1"]
+        codes = ["000001.XSHE", "300750.XSHE"]
+
+        df = self.api.get_cross_section(factors, "2025-01-10", universe=codes)
+
+        assert df.index.name == "code"
+        assert df.index.tolist() == codes
+        assert df.columns.tolist() == factors
+        assert df.loc["000001.XSHE", "close"] == 11.30
+
+    def test_api_get_cross_section_universe(self):
+        """测试get_cross_section按info类型和指数解析universe"""
+        df_stock = self.api.get_cross_section("close", "2025-01-10")
+        assert len(df_stock) > 5000
+
+        df_index = self.api.get_cross_section(
+            "close", "2025-01-10", universe="000300.XSHG"
+        )
+        assert len(df_index) == 300
+
+    def test_api_get_factor_prune_listing(self):
+        """测试按上市日期裁剪查询区间"""
+        factors = ["close", "pe_ratio"]
+        codes = ["000001.XSHE", "688981.XSHG"]  # 中芯国际2020-07-16上市
+
+        df = self.api.get_factor(
+            factors=factors,
+            codes=codes,
+            start_time="2020-07-01",
+            end_time="2020-07-31",
+            prune_listing=True,
+        )
+        smic = df.xs("688981.XSHG", level="code")
+        assert smic.index.min() >= pd.Timestamp("2020-07-16")
+
+        df_expanded = self.api.get_factor(
+            factors=factors,
+            codes=codes,
+            start_time="2020-07-01",
+            end_time="2020-07-31",
+            prune_listing=True,
+            reexpand=True,
+        )
+        assert len(df_expanded) == 2 * 23  # 23交易日 * 2只股票
+
+    def test_index_weight_store(self):
+        """测试指数权重的压缩存储和as-of查询"""
+        from xqdata.rq.index_weights import get_index_weight_store
+
+        store = get_index_weight_store()
+        store.update("000016.XSHG", "2025-01-02", "2025-01-10")
+
+        weights = store.weights("000016.XSHG", "2025-01-08")
+        assert len(weights) == 50
+        assert weights.sum() == pytest.approx(1.0, abs=1e-3)
+
+        membership = store.membership("000016.XSHG", "2025-01-02", "2025-01-10")
+        assert len(membership) == 7  # 7交易日
+        assert (membership.sum(axis=1) == 50).all()
+
+    def test_flag_store(self):
+        """测试ST/停牌标记的区间存储"""
+        from xqdata.rq.intervals import get_flag_store
+
+        codes = ["000001.XSHE", "300750.XSHE"]
+        store = get_flag_store("is_paused")
+        store.update(codes, "2025-01-02", "2025-01-10")
+
+        panel = store.to_panel(codes, "2025-01-02", "2025-01-10")
+        assert panel.shape == (7, 2)  # 7交易日 * 2只股票
+        assert not store.asof(codes, "2025-01-06").any()
+        assert not store.any_between(codes, "2025-01-02", "2025-01-10").any()
+
+    def test_rq_get_price_local_adjust(self):
+        """测试本地复权与rqdata复权结果一致"""
+        from xqdata.rq.func_factor import rq_get_price
+
+        factors = ["close", "open_post", "close_post", "close_pre", "volume_post"]
+        codes = ["000001.XSHE", "300750.XSHE"]
+        kwargs = dict(
+            factors=factors,
+            codes=codes,
+            start_time="2024-06-01",
+            end_time="2024-07-31",
+            frequency="D",
+        )
+
+        local = rq_get_price(**kwargs)
+        remote = rq_get_price(**kwargs, local_adjust=False)
+
+        assert local.columns.tolist() == factors
+        pd.testing.assert_frame_equal(
+            local, remote[factors], check_exact=False, rtol=1e-6, check_dtype=False
+        )
@@ -156,3 +156,16 @@ class TestRQDataApi:
 
         # 验证返回的和stock一样
         assert df_test_stock.equals(df_stock)
+
+    def test_get_info_stock_filters(self):
+        """测试按列过滤股票信息"""
+        df_stock = self.api.get_info("stock")
+        df_filtered = self.api.get_info(
+            "stock", exchange="XSHG", listed_date__lt="2010-01-01"
+        )
+
+        expected = df_stock[
+            (df_stock["exchange"] == "XSHG")
+            & (df_stock["listed_date"] < pd.Timestamp("2010-01-01"))
+        ]
+        assert df_filtered["code"].tolist() == expected["code"].tolist()
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("rqdatac")
+
+from rqdatac.services.live import TickObject  # noqa: E402
+
+from xqdata.rq.api import RQDataApi  # noqa: E402
+from xqdata.rq.latest import LatestCache  # noqa: E402
+
+
+class FakeMarket:
+    """按代码保存快照数据，记录每次轮询"""
+
+    def __init__(self):
+        self.data = {}
+        self.polls = []
+
+    def quote(self, code, dt, last, volume):
+        self.data[code] = {
+            "datetime": dt,
+            "last": last,
+            "volume": volume,
+            "ask": [last + 0.01, last + 0.02, 0, 0, 0],
+            "bid": [last - 0.01, last - 0.02, 0, 0, 0],
+        }
+
+    def snapshot(self, codes):
+        self.polls.append(list(codes))
+        ticks = [TickObject(code, self.data.get(code)) for code in codes]
+        return ticks[0] if len(ticks) == 1 else ticks
+
+
+class StrictMarket(FakeMarket):
+    """与rqdatac一样剔除无效和重复的代码"""
+
+    def snapshot(self, codes):
+        self.polls.append(list(codes))
+        valid = [code for code in dict.fromkeys(codes) if code in self.data]
+        ticks = [TickObject(code, self.data[code]) for code in valid]
+        return ticks[0] if len(ticks) == 1 else ticks
+
+
+class TestGetLatest:
+    """测试最新快照的缓存(不需要连接RQData)"""
+
+    def setup_method(self):
+        self.market = FakeMarket()
+        self.api = RQDataApi()
+        self.api._latest = LatestCache(self.market.snapshot, capacity=2)
+
+    def test_fields(self):
+        self.market.quote("000001.XSHE", 20240102093000000, 10.0, 100)
+        self.market.quote("600000.XSHG", 20240102093003000, 7.5, 200)
+        latest = self.api.get_latest(
+            ["last", "a1", "b2", "volume"], ["600000.XSHG", "000001.XSHE", "bad"]
+        )
+
+        assert set(latest) == {"datetime", "last", "a1", "b2", "volume"}
+        assert all(isinstance(v, np.ndarray) for v in latest.values())
+        np.testing.assert_array_equal(latest["last"], [7.5, 10.0, np.nan])
+        np.testing.assert_allclose(latest["a1"][:2], [7.51, 10.01])
+        np.testing.assert_allclose(latest["b2"][:2], [7.48, 9.98])
+        assert latest["volume"].dtype == np.float64
+        assert str(latest["datetime"][0]) == "2024-01-02T09:30:03.000000000"
+        assert np.isnat(latest["datetime"][2])
+
+    def test_incremental(self):
+        self.market.quote("a", 20240102093000000, 10.0, 100)
+        self.market.quote("b", 20240102093000000, 20.0, 100)
+        self.api.get_latest("last", ["a", "b"])
+
+        # b没有新行情(时间戳未前进)，即使快照的值不同也保留缓存
+        self.market.quote("a", 20240102093003000, 10.5, 150)
+        self.market.quote("b", 20240102093000000, 99.0, 100)
+        latest = self.api.get_latest("last", ["a", "b"])
+        np.testing.assert_array_equal(latest["last"], [10.5, 20.0])
+
+        # 之前没有请求过的字段取当前快照的值
+        latest = self.api.get_latest(["volume"], ["b", "a"])
+        np.testing.assert_array_equal(latest["volume"], [100, 150])
+
+        # 新证券追加到缓存，容量自动扩展
+        self.market.quote("c", 20240102093006000, 30.0, 10)
+        latest = self.api.get_latest("last", ["c", "a", "b"])
+        np.testing.assert_array_equal(latest["last"], [30.0, 10.5, 20.0])
+
+    def test_shared_by_sessions(self):
+        self.market.quote("a", 20240102093000000, 10.0, 100)
+        session = self.api.session()
+        session.get_latest("last", "a")
+        assert self.api._latest._fields.keys() == {"last"}
+
+    def test_unknown_field(self):
+        with pytest.raises(ValueError, match="Unknown snapshot fields"):
+            self.api.get_latest("close_post", ["a"])
+        assert self.market.polls == []
+
+    def test_invalid_and_duplicate_codes(self):
+        market = StrictMarket()
+        self.api._latest = LatestCache(market.snapshot, capacity=2)
+        market.quote("a", 20240102093000000, 10.0, 100)
+        market.quote("b", 20240102093003000, 20.0, 200)
+
+        latest = self.api.get_latest("last", ["a", "bad", "b"])
+        np.testing.assert_array_equal(latest["last"], [10.0, np.nan, 20.0])
+        assert np.isnat(latest["datetime"][1])
+
+        latest = self.api.get_latest(["last", "volume"], ["b", "b"])
+        np.testing.assert_array_equal(latest["last"], [20.0, 20.0])
+        np.testing.assert_array_equal(latest["volume"], [200, 200])
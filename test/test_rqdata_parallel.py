@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rqdatac")
+
+from xqdata.rq.api import RQDataApi  # noqa: E402
+
+
+def rq_get_price(
+    factors, codes, start_time=None, end_time=None, frequency="D", **kwargs
+):
+    """替代rq_get_price的假函数，按证券和日期生成确定的数据"""
+    index = pd.MultiIndex.from_product(
+        [pd.date_range(start_time, end_time, freq="D"), codes],
+        names=["datetime", "code"],
+    )
+    values = index.get_level_values("datetime").day.to_numpy(dtype=np.float64)
+    values += [int(code[:6]) * 1000 for code in index.get_level_values("code")]
+    return pd.DataFrame({f: values for f in factors}, index=index)
+
+
+def failing_get_price(factors, codes, *args, **kwargs):
+    """某个证券查询出错时抛出异常的假函数"""
+    if "000003.XSHE" in codes:
+        raise ValueError("boom")
+    return rq_get_price(factors, codes, *args, **kwargs)
+
+
+def broken_shard(state, kwargs):
+    """模拟分片在子进程中失败"""
+    raise OSError("worker failed")
+
+
+class TestProcessPool:
+    """测试多进程查询(不需要连接RQData)"""
+
+    def test_get_factor_in_processes(self):
+        api = RQDataApi()
+        api.register_factor("close", rq_get_price)
+        codes = [f"{i:06d}.XSHE" for i in range(1, 11)]
+
+        expected = api.get_factor("close", codes, "2024-01-01", "2024-01-31")
+        result = api.get_factor("close", codes, "2024-01-01", "2024-01-31", processes=2)
+        pd.testing.assert_frame_equal(result, expected.sort_index())
+
+        long = api.get_factor(
+            "close", codes, "2024-01-01", "2024-01-05", panel=False, processes=2
+        )
+        assert list(long.columns) == ["attribute", "value"]
+        assert len(long) == 50
+
+    def test_pool_is_reused(self):
+        from xqdata.rq import parallel
+
+        api = RQDataApi()
+        api.register_factor("close", rq_get_price)
+        codes = [f"{i:06d}.XSHE" for i in range(1, 5)]
+        api.get_factor("close", codes, "2024-01-01", "2024-01-05", processes=2)
+        pool = parallel._pool
+        api.get_factor("close", codes, "2024-01-01", "2024-01-05", processes=2)
+        assert parallel._pool is pool
+        # 认证信息只保存在进程池中，不在实例上
+        assert not hasattr(api, "_auth_kwargs")
+        parallel.shutdown_pool()
+        assert parallel._pool is None
+
+    def test_failed_shard_raises(self, monkeypatch):
+        from xqdata.rq import parallel
+
+        api = RQDataApi()
+        api.register_factor("close", rq_get_price)
+        codes = [f"{i:06d}.XSHE" for i in range(1, 5)]
+        monkeypatch.setattr(parallel, "_run_shard", broken_shard)
+        with pytest.raises(RuntimeError, match="worker failed"):
+            api.get_factor("close", codes, "2024-01-01", "2024-01-05", processes=2)
+
+    def test_worker_warnings_forwarded(self):
+        api = RQDataApi()
+        api.register_factor("close", failing_get_price)
+        codes = [f"{i:06d}.XSHE" for i in range(1, 5)]
+        with pytest.warns(UserWarning, match="boom"):
+            result = api.get_factor(
+                "close", codes, "2024-01-01", "2024-01-05", processes=2
+            )
+        assert "000003.XSHE" not in result.index.get_level_values("code")
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rqdatac")
+
+import xqdata.rq.func_info as func_info  # noqa: E402
+import xqdata.rq.planner as planner  # noqa: E402
+from xqdata.rq.planner import (  # noqa: E402
+    expand_to_request,
+    plan_listing_windows,
+    trim_to_listing,
+)
+
+LISTING = pd.DataFrame(
+    {
+        "listed_date": pd.to_datetime(["1991-04-03", "2024-03-15", "2000-01-04"]),
+        "de_listed_date": pd.to_datetime(["2100-01-01", "2100-01-01", "2024-02-20"]),
+    },
+    index=pd.Index(["old", "ipo", "delisted"], name="code"),
+)
+
+
+@pytest.fixture(autouse=True)
+def listing(monkeypatch):
+    monkeypatch.setattr(
+        planner, "rq_listing_dates", lambda codes, market="cn": LISTING.reindex(codes)
+    )
+
+
+def make_frame(dates, codes):
+    index = pd.MultiIndex.from_product(
+        [pd.to_datetime(dates), codes], names=["datetime", "code"]
+    )
+    return pd.DataFrame({"close": np.arange(len(index), dtype=float)}, index=index)
+
+
+class TestListingPlanner:
+    """测试按上市/退市日期裁剪查询(不需要连接RQData)"""
+
+    def test_windows(self):
+        plan = plan_listing_windows(
+            ["old", "ipo", "delisted", "unknown"], "2024-01-01", "2024-06-30"
+        )
+        windows = {tuple(codes): (s, e) for s, e, codes in plan}
+        start, end = pd.Timestamp("2024-01-01"), pd.Timestamp("2024-06-30")
+        # 没有上市信息的证券与全程上市的证券合并为一次原区间的查询
+        assert windows[("old", "unknown")] == (start, end)
+        # 区间向外对齐到月
+        assert windows[("ipo",)] == (pd.Timestamp("2024-03-01"), end)
+        assert windows[("delisted",)] == (start, pd.Timestamp("2024-02-29"))
+
+    def test_drops_codes_outside_range(self):
+        plan = plan_listing_windows(["ipo", "delisted"], "2023-01-01", "2023-12-31")
+        assert plan == [
+            (pd.Timestamp("2023-01-01"), pd.Timestamp("2023-12-31"), ["delisted"])
+        ]
+        plan = plan_listing_windows(["ipo", "delisted"], "2024-03-01", None)
+        assert [codes for _, _, codes in plan] == [["ipo"]]
+        assert plan[0][1] is None
+
+    def test_trim_and_expand(self):
+        data = make_frame(
+            ["2024-02-19", "2024-02-21", "2024-03-15"], ["ipo", "delisted", "unknown"]
+        )
+        trimmed = trim_to_listing(data)
+        kept = set(trimmed.index)
+        assert (pd.Timestamp("2024-02-19"), "ipo") not in kept
+        assert (pd.Timestamp("2024-03-15"), "ipo") in kept
+        assert (pd.Timestamp("2024-02-19"), "delisted") in kept
+        assert (pd.Timestamp("2024-02-21"), "delisted") not in kept
+        assert len(trimmed.xs("unknown", level="code")) == 3
+
+        expanded = expand_to_request(trimmed, ["ipo", "delisted", "unknown", "old"])
+        assert expanded.shape == (12, 1)
+        assert expanded.xs("old", level="code")["close"].isna().all()
+        assert expanded.loc[(pd.Timestamp("2024-03-15"), "ipo"), "close"] == 6
+
+    def test_delisting_day(self, monkeypatch):
+        table = LISTING.reset_index()
+        monkeypatch.setattr(func_info, "_instrument_table", lambda type, market: table)
+        data = make_frame(["2024-02-19", "2024-02-20"], ["delisted"])
+        # 退市日当天不再处于上市状态，两处的约定一致
+        for day in ["2024-02-19", "2024-02-20"]:
+            listed = "delisted" in func_info.rq_listed_codes("stock", day)
+            kept = (pd.Timestamp(day), "delisted") in set(trim_to_listing(data).index)
+            assert listed == kept == (day == "2024-02-19")
+        assert plan_listing_windows(["delisted"], "2024-02-20", "2024-03-31") == []
+
+    def test_empty(self):
+        empty = make_frame([], ["ipo"])
+        assert trim_to_listing(empty).empty
+        assert expand_to_request(empty, ["ipo"]).empty
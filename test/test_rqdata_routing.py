@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rqdatac")
+
+from xqdata.rq.api import RQDataApi  # noqa: E402
+from xqdata.rq.func_factor import (  # noqa: E402
+    rq_get_factor,
+    rq_get_instrument_industry,
+    rq_get_price,
+    rq_index_weights_ex,
+)
+from xqdata.rq.routing import RoutingTable  # noqa: E402
+
+
+def fake_func(factors, codes, start_time=None, end_time=None, frequency="D"):
+    pass
+
+
+class TestRoutingTable:
+    """测试因子路由表(不需要连接RQData)"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        self.api = RQDataApi()
+
+    def test_plan_groups_by_func(self):
+        """测试按查询函数分组，未配置的因子使用default"""
+        plan = self.api.routing.plan(["close", "pe_ratio", "open_post", "ebit_lyr"])
+        assert plan == {
+            rq_get_price: ["close", "open_post"],
+            rq_get_factor: ["pe_ratio", "ebit_lyr"],
+        }
+
+    @pytest.mark.parametrize(
+        "factor",
+        ["citics_l1", "citics_2019_l2_name", "sws_l3", "hsi_l1_name"],
+    )
+    def test_pattern_family(self, factor):
+        """测试按模式匹配的行业因子族"""
+        assert self.api.routing.resolve(factor) is rq_get_instrument_industry
+
+    def test_func_metadata(self):
+        """测试预先计算的函数签名和额外参数"""
+        routing = self.api.routing
+        assert routing.accepts_objects(rq_index_weights_ex)
+        assert not routing.accepts_objects(rq_get_price)
+        assert "skip_suspended" in routing.allowed_params(rq_get_price)
+        assert routing.allowed_params(rq_get_factor) == frozenset()
+
+    def test_register_invalidates(self):
+        """测试注册因子后路由表重新编译"""
+        routing = self.api.routing
+        assert self.api.routing is routing
+
+        self.api.register_factor("my_factor", fake_func)
+        assert self.api.routing is not routing
+        assert self.api.routing.resolve("my_factor") is fake_func
+
+        self.api.register_factor(r"^my_family_\d+$", fake_func, pattern=True)
+        assert self.api.routing.plan(["my_family_1", "close"]) == {
+            fake_func: ["my_family_1"],
+            rq_get_price: ["close"],
+        }
+
+    def test_direct_mutation_recompiles(self):
+        """测试替换或原地修改配置字典后路由表重新编译"""
+        routing = self.api.routing
+        self.api.factor_config = {**self.api.factor_config, "my_factor": fake_func}
+        assert self.api.routing is not routing
+        assert self.api.routing.resolve("my_factor") is fake_func
+        assert self.api.supports_factor("my_factor")
+
+        # 原地修改需要手动使路由表失效
+        del self.api.factor_config["my_factor"]
+        self.api.invalidate_routing()
+        assert self.api.routing.resolve("my_factor") is rq_get_factor
+
+        self.api.factor_patterns[r"^my_family_\d+$"] = fake_func
+        self.api.invalidate_routing()
+        assert self.api.routing.resolve("my_family_1") is fake_func
+        # 配置不变时不重新编译
+        routing = self.api.routing
+        assert self.api.routing is routing
+
+    def test_exact_takes_precedence(self):
+        """测试精确配置优先于模式匹配"""
+        routing = RoutingTable(
+            {"default": rq_get_factor, "sws_l1": fake_func},
+            {r"^sws_l\d$": rq_get_instrument_industry},
+            {},
+        )
+        assert routing.resolve("sws_l1") is fake_func
+        assert routing.resolve("sws_l2") is rq_get_instrument_industry
+        assert routing.resolve("unknown") is rq_get_factor
+
+
+def fake_volume(factors, codes, start_time=None, end_time=None, frequency="D"):
+    index = pd.MultiIndex.from_product(
+        [pd.to_datetime(["2024-01-02", "2024-01-03"]), codes],
+        names=["datetime", "code"],
+    )
+    return pd.DataFrame({f: 100.0 for f in factors}, index=index)
+
+
+def fake_flag(factors, codes, start_time=None, end_time=None, frequency="D"):
+    index = pd.MultiIndex.from_product(
+        [pd.to_datetime(["2024-01-03", "2024-01-04"]), codes[:1]],
+        names=["datetime", "code"],
+    )
+    return pd.DataFrame({f: True for f in factors}, index=index)
+
+
+class TestFactorSchema:
+    """测试get_factor按因子声明确定列类型(不需要连接RQData)"""
+
+    def setup_method(self):
+        self.api = RQDataApi()
+        self.api.register_factor("volume", fake_volume)
+        self.api.register_factor("is_st", fake_flag)
+        self.api.set_option("apply_schema", True)
+
+    def test_not_applied_by_default(self):
+        api = RQDataApi()
+        api.register_factor("volume", fake_volume)
+        api.register_factor("is_st", fake_flag)
+        data = api.get_factor(["volume", "is_st"], ["a", "b"])
+        assert data["volume"].dtype == np.dtype("float64")
+        assert data["is_st"].dtype == np.dtype("object")
+
+    def test_declared_dtypes(self):
+        data = self.api.get_factor(["volume", "is_st"], ["a", "b"])
+        assert data["volume"].dtype == pd.Int64Dtype()
+        assert data["is_st"].dtype == pd.BooleanDtype()
+        assert self.api.factor_dtypes(["volume", "is_st"]) == data.dtypes.to_dict()
+
+    def test_set_factor_schema(self):
+        self.api.set_factor_schema("volume", "float32")
+        self.api.set_factor_schema("is_st", None)
+        data = self.api.get_factor(["volume", "is_st"], ["a", "b"])
+        assert data["volume"].dtype == np.dtype("float32")
+        assert data["is_st"].dtype == np.dtype("object")
+
+        session = self.api.session()
+        with pytest.raises(RuntimeError):
+            session.set_factor_schema("volume", "int64")
+
+    def test_violation_warns(self):
+        self.api.set_factor_schema("is_st", "bool", nullable=False)
+        with pytest.warns(UserWarning, match="Factor schema not applied"):
+            data = self.api.get_factor(["volume", "is_st"], ["a", "b"])
+        assert len(data) == 5
+
+    def test_int_index(self, monkeypatch):
+        from xqdata.instruments import InstrumentDictionary, from_int_index
+        from xqdata.rq import api as api_module
+
+        dictionary = InstrumentDictionary(["b", "a"])
+        monkeypatch.setattr(api_module, "rq_instrument_dictionary", lambda: dictionary)
+        data = self.api.get_factor(["volume", "is_st"], ["a", "b"])
+        converted = self.api.get_factor(["volume", "is_st"], ["a", "b"], int_index=True)
+        assert converted.index.names == ["timestamp", "code_id"]
+        assert set(converted.index.get_level_values("code_id")) == {0, 1}
+        pd.testing.assert_frame_equal(from_int_index(converted, dictionary), data)
@@ -0,0 +1,97 @@
+import threading
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("rqdatac")
+
+from xqdata.rq.api import RQDataApi  # noqa: E402
+
+
+def rq_get_price(
+    factors, codes, start_time=None, end_time=None, frequency="D", **kwargs
+):
+    """替代rq_get_price的假函数，把收到的skip_suspended作为因子值返回"""
+    index = pd.MultiIndex.from_product(
+        [pd.to_datetime([start_time]), codes], names=["datetime", "code"]
+    )
+    return pd.DataFrame({f: kwargs.get("skip_suspended") for f in factors}, index=index)
+
+
+class TestSession:
+    """测试设置不可变的会话(不需要连接RQData)"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        self.api = RQDataApi()
+        self.api.register_factor("close", rq_get_price)
+        self.api.set_extra_param("rq_get_price", "market", "cn")
+
+    def test_session_settings(self):
+        session = self.api.session(
+            extra_params={"rq_get_price": {"skip_suspended": True}},
+            prune_listing=True,
+        )
+        assert session._get_extra_kwargs(rq_get_price) == {
+            "market": "cn",
+            "skip_suspended": True,
+        }
+        assert session._get_option("prune_listing") is True
+        # 会话不影响原实例
+        assert self.api._get_extra_kwargs(rq_get_price) == {"market": "cn"}
+        assert self.api._get_option("prune_listing") is False
+
+    def test_session_is_snapshot(self):
+        session = self.api.session()
+        self.api.set_extra_param("rq_get_price", "market", "hk")
+        self.api.set_option("reexpand", True)
+        assert session._get_extra_kwargs(rq_get_price) == {"market": "cn"}
+        assert session._get_option("reexpand") is False
+
+    def test_info_cache_shared_after_refresh(self):
+        calls = []
+
+        def fake_info():
+            calls.append(1)
+            return pd.DataFrame({"code": ["a"]})
+
+        self.api.register_info_type("fake", fake_info, {})
+        session = self.api.session()
+        session.get_info("fake")
+        # 会话刷新后，原实例和其他会话使用同一份新的缓存
+        session.refresh_info()
+        self.api.get_info("fake")
+        session.get_info("fake")
+        self.api.session().get_info("fake")
+        assert len(calls) == 2
+
+    def test_session_is_immutable(self):
+        session = self.api.session()
+        with pytest.raises(RuntimeError):
+            session.set_extra_param("rq_get_price", "skip_suspended", True)
+        with pytest.raises(RuntimeError):
+            session.set_option("prune_listing", True)
+        with pytest.raises(RuntimeError):
+            session.register_factor("open", rq_get_price)
+        with pytest.raises(ValueError):
+            self.api.session(unknown=True)
+
+    def test_concurrent_sessions(self):
+        """多个线程使用各自设置的会话并发查询，互不干扰"""
+        errors = []
+
+        def run(flag):
+            session = self.api.session(
+                extra_params={"rq_get_price": {"skip_suspended": flag}}
+            )
+            for _ in range(50):
+                data = session.get_factor("close", "000001.XSHE", "2024-01-02")
+                if bool(data["close"].iloc[0]) is not flag:
+                    errors.append(flag)
+
+        threads = [threading.Thread(target=run, args=(i % 2 == 0,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
@@ -0,0 +1,216 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rqdatac")
+
+from xqdata.rq.adjust import (  # noqa: E402
+    ExFactorStore,
+    adjust_prices,
+    split_adjusted_factors,
+)
+from xqdata.rq.index_weights import IndexWeightStore  # noqa: E402
+from xqdata.rq.intervals import IntervalFlagStore  # noqa: E402
+
+TODAY = pd.Timestamp.today().normalize()
+# 最近的交易日(以工作日近似)
+LAST_SESSION = pd.bdate_range(end=TODAY, periods=1)[0]
+
+
+class FakeWeights:
+    """按已发布日期返回逐日权重，记录每次请求的区间"""
+
+    def __init__(self, published, rebalance):
+        self.published = published
+        self.rebalance = rebalance
+        self.calls = []
+
+    def __call__(self, code, start, end):
+        self.calls.append((code, start, end))
+        sessions = pd.bdate_range(start, min(end, self.published))
+        rows = []
+        for session in sessions:
+            weights = {"a": 0.5, "b": 0.5}
+            if session >= self.rebalance:
+                weights = {"a": 0.3, "c": 0.7}
+            rows += [(session, k, v) for k, v in weights.items()]
+        return pd.DataFrame(rows, columns=["date", "order_book_id", "weight"])
+
+
+class TestIndexWeightStore:
+    """测试指数权重的增量更新(不需要连接RQData)"""
+
+    def test_recent_end_is_capped(self, tmp_path):
+        published = TODAY - pd.offsets.BDay(3)
+        fetch = FakeWeights(published, rebalance=TODAY + pd.Timedelta(days=30))
+        store = IndexWeightStore(tmp_path / "weights.pkl", fetch_func=fetch)
+        start = TODAY - pd.Timedelta(days=60)
+        store.update("idx", start, TODAY)
+        assert store._data["idx"]["end"] == published
+
+        # 数据发布后再次更新，获取之前未发布的日期和新的调仓
+        fetch.published = TODAY
+        fetch.rebalance = TODAY - pd.offsets.BDay(1)
+        store.update("idx", start, TODAY)
+        assert fetch.calls[-1][1] == published + pd.Timedelta(days=1)
+        assert store._data["idx"]["end"] == LAST_SESSION
+        assert set(store.weights("idx", TODAY).index) == {"a", "c"}
+
+        # 重新加载后已覆盖的区间不再获取
+        reloaded = IndexWeightStore(tmp_path / "weights.pkl", fetch_func=fetch)
+        reloaded.update("idx", start, TODAY)
+        assert len(fetch.calls) == 2
+
+    def test_old_range_is_fully_covered(self, tmp_path):
+        fetch = FakeWeights(TODAY, rebalance=pd.Timestamp("2020-06-01"))
+        store = IndexWeightStore(tmp_path / "weights.pkl", fetch_func=fetch)
+        store.update("idx", "2020-01-01", "2020-12-31")
+        assert store._data["idx"]["end"] == pd.Timestamp("2020-12-31")
+        store.update("idx", "2020-03-01", "2020-12-31")
+        assert len(fetch.calls) == 1
+
+    def test_nothing_published(self, tmp_path):
+        fetch = FakeWeights(TODAY - pd.Timedelta(days=30), rebalance=TODAY)
+        store = IndexWeightStore(tmp_path / "weights.pkl", fetch_func=fetch)
+        start = TODAY - pd.Timedelta(days=3)
+        store.update("idx", start, TODAY)
+        assert store.weights("idx", TODAY).empty
+        store.update("idx", start, TODAY)
+        # 没有覆盖任何日期，再次更新时重新获取整个区间
+        assert fetch.calls[-1][1:] == (start, TODAY)
+
+
+class FakeFlags:
+    """按已发布日期返回逐日的布尔面板，flagged中的证券从since起处于标记状态"""
+
+    def __init__(self, published, since, flagged=("a",)):
+        self.published = published
+        self.since = since
+        self.flagged = flagged
+        self.calls = []
+
+    def __call__(self, codes, start, end):
+        self.calls.append((tuple(codes), start, end))
+        sessions = pd.bdate_range(start, min(end, self.published), name="date")
+        return pd.DataFrame(
+            {code: (sessions >= self.since) & (code in self.flagged) for code in codes},
+            index=sessions,
+        )
+
+
+class TestIntervalFlagStore:
+    """测试标记区间的增量更新(不需要连接RQData)"""
+
+    def test_recent_end_is_capped(self, tmp_path):
+        published = TODAY - pd.offsets.BDay(3)
+        fetch = FakeFlags(published, since=TODAY + pd.Timedelta(days=30))
+        store = IntervalFlagStore("is_st", fetch, tmp_path / "is_st.pkl")
+        start = TODAY - pd.Timedelta(days=60)
+        store.update(["a", "b"], start, TODAY)
+        assert store._coverage["a"] == (start, published)
+
+        # 数据发布后再次更新，获取之前未发布的日期
+        fetch.published = TODAY
+        fetch.since = TODAY - pd.offsets.BDay(1)
+        store.update(["a", "b"], start, TODAY)
+        assert fetch.calls[-1] == (
+            ("a", "b"),
+            published + pd.Timedelta(days=1),
+            TODAY,
+        )
+        assert store._coverage["b"] == (start, LAST_SESSION)
+        flags = store.asof(["a", "b"], LAST_SESSION)
+        assert flags.tolist() == [True, False]
+
+        reloaded = IntervalFlagStore("is_st", fetch, tmp_path / "is_st.pkl")
+        reloaded.update(["a", "b"], start, TODAY)
+        assert len(fetch.calls) == 2
+
+    def test_old_range_is_fully_covered(self, tmp_path):
+        fetch = FakeFlags(TODAY, since=pd.Timestamp("2020-06-01"))
+        store = IntervalFlagStore("is_st", fetch, tmp_path / "is_st.pkl")
+        store.update("a", "2020-01-01", "2020-12-31")
+        assert store._coverage["a"][1] == pd.Timestamp("2020-12-31")
+        assert store.any_between("a", "2020-01-01", "2020-12-31").all()
+        store.update("a", "2020-03-01", "2020-12-31")
+        assert len(fetch.calls) == 1
+
+
+EX_FACTORS = pd.DataFrame(
+    {
+        "order_book_id": ["A", "A"],
+        "ex_factor": [1.2, 1.25],
+        "ex_cum_factor": [1.2, 1.5],
+    },
+    index=pd.DatetimeIndex(["2024-06-03", "2025-06-02"], name="ex_date"),
+)
+
+
+class FakeExFactors:
+    """返回与rq.get_ex_factor格式相同的除权因子，记录每次请求"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, codes, start_date, end_date):
+        self.calls.append((tuple(codes), start_date))
+        return EX_FACTORS[EX_FACTORS["order_book_id"].isin(codes)]
+
+
+class TestExFactorStore:
+    """测试除权因子缓存和本地复权(不需要连接RQData)"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        index = pd.MultiIndex.from_product(
+            [pd.to_datetime(["2024-05-31", "2024-06-03", "2025-06-02"]), ["A", "B"]],
+            names=["datetime", "code"],
+        )
+        self.data = pd.DataFrame(
+            {"close": np.full(len(index), 10.0), "volume": np.full(len(index), 100.0)},
+            index=index,
+        )
+
+    def test_cum_factors(self, tmp_path):
+        fetch = FakeExFactors()
+        store = ExFactorStore(tmp_path / "ex.pkl", fetch_func=fetch)
+        store.update(["A", "B"])
+        factors = store.cum_factors(
+            self.data.index.get_level_values("code"),
+            self.data.index.get_level_values("datetime"),
+        )
+        np.testing.assert_allclose(factors, [1.0, 1.0, 1.2, 1.0, 1.5, 1.0])
+        np.testing.assert_allclose(store.latest_factors(pd.Index(["B", "A"])), [1, 1.5])
+
+        # 当天已刷新过的证券不会重复请求，重新加载后同样如此
+        store.update(["A"])
+        ExFactorStore(tmp_path / "ex.pkl", fetch_func=fetch).update(["A", "B"])
+        assert len(fetch.calls) == 1
+
+    def test_adjust_prices(self, tmp_path):
+        store = ExFactorStore(tmp_path / "ex.pkl", fetch_func=FakeExFactors())
+        store.update(["A", "B"])
+        base, adjusted = split_adjusted_factors(
+            ["close_post", "close_pre", "volume_post"]
+        )
+        assert base == ["close", "volume"]
+        result = adjust_prices(self.data, adjusted, store)
+        assert result.columns.tolist() == ["close_post", "close_pre", "volume_post"]
+        a = result.xs("A", level="code")
+        np.testing.assert_allclose(a["close_post"], [10, 12, 15])
+        np.testing.assert_allclose(a["close_pre"], [10 / 1.5, 12 / 1.5, 10])
+        # 成交量等非价格字段不复权
+        assert (result["volume_post"] == 100).all()
+        assert (result.xs("B", level="code")["close_pre"] == 10).all()
+
+    def test_stale_format_is_discarded(self, tmp_path):
+        # 没有版本号的旧格式缓存被丢弃，重新获取
+        with open(tmp_path / "ex.pkl", "wb") as f:
+            pickle.dump((pd.DataFrame(), {"A": TODAY}), f)
+        fetch = FakeExFactors()
+        store = ExFactorStore(tmp_path / "ex.pkl", fetch_func=fetch)
+        store.update(["A"])
+        assert fetch.calls == [(("A",), None)]
+        assert len(store._table) == 2
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rqdatac")
+
+import xqdata.rq.api as api_module  # noqa: E402
+import xqdata.rq.func_info as func_info  # noqa: E402
+from xqdata.rq.api import RQDataApi  # noqa: E402
+
+
+class FakeInstruments:
+    """rq.all_instruments的替身，记录调用次数"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = [
+            ("000001.XSHE", "1991-04-03", "0000-00-00"),
+            ("000002.XSHE", "1991-01-29", "0000-00-00"),
+            ("000003.XSHE", "1991-01-14", "2002-06-14"),
+        ]
+
+    def __call__(self, type=None, date=None, market="cn"):
+        self.calls += 1
+        return pd.DataFrame(
+            self.rows, columns=["order_book_id", "listed_date", "de_listed_date"]
+        )
+
+
+def fake_price(factors, codes, start_time=None, end_time=None, frequency="D"):
+    index = pd.MultiIndex.from_product(
+        [pd.bdate_range(start_time, end_time), codes], names=["datetime", "code"]
+    )
+    values = np.arange(len(index), dtype=float)
+    return pd.DataFrame({f: values for f in factors}, index=index)
+
+
+class TestUniverse:
+    """测试截面查询的证券池解析(不需要连接RQData)"""
+
+    def setup_method(self):
+        self.instruments = FakeInstruments()
+        self.patch = pytest.MonkeyPatch()
+        self.patch.setattr(func_info.rq, "all_instruments", self.instruments)
+        func_info.clear_instrument_cache()
+        self.api = RQDataApi()
+        self.api.register_factor("close", fake_price)
+
+    def teardown_method(self):
+        self.patch.undo()
+        func_info.clear_instrument_cache()
+
+    def test_info_type(self):
+        date = pd.Timestamp("2024-01-02")
+        assert self.api._resolve_universe(None, date) == ["000001.XSHE", "000002.XSHE"]
+        old = self.api._resolve_universe("stock", pd.Timestamp("2000-01-04"))
+        assert old == ["000001.XSHE", "000002.XSHE", "000003.XSHE"]
+        # 全市场快照只请求一次
+        assert self.instruments.calls == 1
+
+    def test_refresh_info(self):
+        date = pd.Timestamp("2024-01-02")
+        self.api._resolve_universe("stock", date)
+        self.instruments.rows.append(("001234.XSHE", "2023-12-01", "0000-00-00"))
+        assert "001234.XSHE" not in self.api._resolve_universe("stock", date)
+
+        self.api.refresh_info()
+        assert "001234.XSHE" in self.api._resolve_universe("stock", date)
+        assert self.instruments.calls == 2
+
+    def test_info_table_refreshed_daily(self):
+        calls = []
+
+        def fake_info(market="cn"):
+            calls.append(market)
+            return pd.DataFrame({"code": ["a", "b"], "sector": ["x", "y"]})
+
+        self.api.register_info_type("fake", fake_info, {"market": "cn"})
+        assert self.api.get_info("fake", sector="x")["code"].tolist() == ["a"]
+        self.api.get_info("fake")
+        assert len(calls) == 1
+
+        # 前一天请求的表在当天第一次查询时重新请求
+        for key, (table, day) in list(self.api._info_tables.items()):
+            self.api._info_tables[key] = (table, day - pd.Timedelta(days=1))
+        self.api.get_info("fake")
+        assert len(calls) == 2
+
+        # 未知的过滤列与Mock一致：警告并返回空DataFrame
+        with pytest.warns(UserWarning, match="Unknown filter column"):
+            assert self.api.get_info("fake", industry="x").empty
+
+    def test_index_and_codes(self, monkeypatch):
+        monkeypatch.setattr(
+            api_module.rq,
+            "index_components",
+            lambda code, date=None: ["000001.XSHE"] if code == "000300.XSHG" else [],
+        )
+        date = pd.Timestamp("2024-01-02")
+        assert self.api._resolve_universe("000300.XSHG", date) == ["000001.XSHE"]
+        assert self.api._resolve_universe("600000.XSHG", date) == ["600000.XSHG"]
+        assert self.api._resolve_universe(["a", "b"], date) == ["a", "b"]
+
+    def test_get_cross_section(self):
+        # 未注册的因子走默认查询函数，未连接RQData时警告并留空
+        with pytest.warns(UserWarning, match="missing"):
+            data = self.api.get_cross_section(["close", "missing"], "2024-01-03")
+        assert data.index.tolist() == ["000001.XSHE", "000002.XSHE"]
+        assert data.index.name == "code"
+        assert list(data.columns) == ["close", "missing"]
+        # 只保留截面当日的数据
+        np.testing.assert_array_equal(data["close"], [0.0, 1.0])
+        assert data["missing"].isna().all()
+
+
+class TestTradedays:
+    """测试交易日历只请求和缓存一次完整日历(不需要连接RQData)"""
+
+    def test_full_calendar_cached_once(self, monkeypatch):
+        calls = []
+
+        def get_trading_dates(start_date, end_date, market="cn"):
+            calls.append((start_date, end_date))
+            return list(pd.bdate_range("2024-01-01", "2024-12-31").date)
+
+        monkeypatch.setattr(func_info.rq, "get_trading_dates", get_trading_dates)
+        api = RQDataApi()
+        jan = api.get_tradedays("2024-01-01", "2024-01-31")
+        feb = api.session().get_tradedays("2024-02-01", "2024-02-29")
+        assert len(jan) == 23 and len(feb) == 21
+        assert feb[0] == pd.Timestamp("2024-02-01")
+        assert len(calls) == 1
+        assert len(api._info_tables) == 1
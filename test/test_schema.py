@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xqdata.schema import apply_schema, join_frames, schema_dtypes
+
+SCHEMA = {
+    "volume": {"dtype": "int64"},
+    "is_st": {"dtype": "bool"},
+    "exchange": {"dtype": "category", "categories": ["XSHG", "XSHE"]},
+    "count": {"dtype": "int32", "nullable": False, "fill_value": 0},
+    "strict": {"dtype": "int64", "nullable": False},
+}
+
+
+def make_index(dates, codes):
+    return pd.MultiIndex.from_product(
+        [pd.to_datetime(dates), codes], names=["datetime", "code"]
+    )
+
+
+class TestSchema:
+    def test_join_keeps_declared_dtypes(self):
+        """外连接引入缺失值后整数和布尔列仍保持声明的类型"""
+        prices = pd.DataFrame(
+            {"volume": [100.0, 200.0, 300.0, 400.0], "close": [1.0, 2.0, 3.0, 4.0]},
+            index=make_index(["2024-01-02", "2024-01-03"], ["a", "b"]),
+        )
+        flags = pd.DataFrame(
+            {"is_st": [True, False]},
+            index=make_index(["2024-01-03", "2024-01-04"], ["a"]),
+        )
+        data = join_frames([prices, flags], SCHEMA)
+
+        assert data.dtypes.to_dict() == {
+            "volume": pd.Int64Dtype(),
+            "close": np.dtype("float64"),
+            "is_st": pd.BooleanDtype(),
+        }
+        assert data.index.is_monotonic_increasing
+        assert len(data) == 5
+        assert data.loc[("2024-01-04", "a"), "volume"] is pd.NA
+        assert data.loc[("2024-01-03", "a"), "is_st"]
+
+        # 与逐次outer merge的结果相同(除类型外)
+        merged = prices.merge(flags, left_index=True, right_index=True, how="outer")
+        pd.testing.assert_frame_equal(
+            data.astype(object).where(data.notna(), np.nan),
+            merged.astype(object).where(merged.notna(), np.nan),
+            check_dtype=False,
+        )
+
+    def test_join_duplicate_index(self):
+        """某组结果的索引重复时给出警告并保留第一次出现的行"""
+        prices = pd.DataFrame(
+            {"volume": [100, 200, 300]},
+            index=make_index(["2024-01-02"], ["a", "a", "b"]),
+        )
+        flags = pd.DataFrame(
+            {"is_st": [True, False]}, index=make_index(["2024-01-02"], ["a", "b"])
+        )
+        with pytest.warns(UserWarning, match="duplicate index"):
+            data = join_frames([prices, flags], SCHEMA)
+        assert len(data) == 2
+        assert data.loc[("2024-01-02", "a"), "volume"] == 100
+        assert not data.loc[("2024-01-02", "b"), "is_st"]
+
+    def test_schema_is_stable_across_calls(self):
+        """有无缺失值时返回的类型相同"""
+        index = make_index(["2024-01-02"], ["a", "b"])
+        full = apply_schema(pd.DataFrame({"volume": [1, 2]}, index=index), SCHEMA)
+        partial = apply_schema(
+            pd.DataFrame({"volume": [1.0, np.nan]}, index=index), SCHEMA
+        )
+        assert full["volume"].dtype == partial["volume"].dtype == pd.Int64Dtype()
+
+    def test_category(self):
+        data = apply_schema(pd.DataFrame({"exchange": ["XSHE", "XSHG"]}), SCHEMA)
+        assert list(data["exchange"].cat.categories) == ["XSHG", "XSHE"]
+        assert data["exchange"].cat.codes.tolist() == [1, 0]
+
+    def test_non_nullable(self):
+        data = apply_schema(pd.DataFrame({"count": [1.0, np.nan]}), SCHEMA)
+        assert data["count"].dtype == np.dtype("int32")
+        assert data["count"].tolist() == [1, 0]
+
+        with pytest.raises(ValueError, match="non-nullable"):
+            apply_schema(pd.DataFrame({"strict": [1.0, np.nan]}), SCHEMA)
+
+    def test_undeclared_columns_untouched(self):
+        data = pd.DataFrame({"pe_ratio": [1.5, np.nan]})
+        assert apply_schema(data, SCHEMA) is data
+
+    def test_schema_dtypes(self):
+        dtypes = schema_dtypes(["volume", "is_st", "pe_ratio"], SCHEMA)
+        assert dtypes == {"volume": pd.Int64Dtype(), "is_st": pd.BooleanDtype()}
+        # 可以按声明预先分配缓冲区
+        buffer = pd.DataFrame(
+            {f: pd.array([None] * 3, dtype=d) for f, d in dtypes.items()}
+        )
+        assert buffer.dtypes.to_dict() == dtypes
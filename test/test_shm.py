@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from xqdata.shm import attach_frame, pack_frame, unlink_segment, unpack_frame
+
+
+class TestSharedMemoryFrame:
+    """测试通过共享内存传递DataFrame"""
+
+    def test_roundtrip(self):
+        index = pd.MultiIndex.from_product(
+            [
+                pd.date_range("2024-01-01", periods=100, freq="D"),
+                ["000001.XSHE", "600000.XSHG", "300750.XSHE"],
+            ],
+            names=["datetime", "code"],
+        )
+        n = len(index)
+        data = pd.DataFrame(
+            {
+                "close": np.random.default_rng(0).random(n),
+                "volume": np.arange(n, dtype=np.int64),
+                "is_st": np.arange(n) % 7 == 0,
+                "industry": np.where(np.arange(n) % 2 == 0, "银行", None),
+            },
+            index=index,
+        )
+        meta = pack_frame(data)
+        pd.testing.assert_frame_equal(unpack_frame(meta), data)
+
+    def test_empty_columns(self):
+        data = pd.DataFrame(index=pd.Index([], name="code"))
+        result = unpack_frame(pack_frame(data))
+        assert result.empty
+        assert result.index.name == "code"
+
+    def test_masked_columns(self):
+        """可空类型以值和掩码两块缓冲区存放，打开时不经过object数组"""
+        index = pd.Index(
+            pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"]),
+            name="datetime",
+        )
+        data = pd.DataFrame(
+            {
+                "volume": pd.array([1, None, 3, 4], dtype="Int64"),
+                "is_st": pd.array([True, None, False, True], dtype="boolean"),
+                "ratio": pd.array([0.5, 1.5, None, 2.0], dtype="Float64"),
+            },
+            index=index,
+        )
+        pd.testing.assert_frame_equal(unpack_frame(pack_frame(data)), data)
+
+        meta = pack_frame(data)
+        # 索引、3列的值和3列的掩码，都不按值编码
+        assert len(meta["layout"]) == 7
+        assert all(uniques is None for *_, uniques in meta["layout"])
+        attached, shm = attach_frame(meta)
+        pd.testing.assert_frame_equal(attached, data)
+        del attached
+        shm.close()
+        unlink_segment(meta["name"])
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+if sys.platform == "win32":
+    pytest.skip("shared result cache requires POSIX", allow_module_level=True)
+
+from xqdata.cache import CachedDataApi  # noqa: E402
+from xqdata.mock import MockDataApi  # noqa: E402
+from xqdata.mock.synthetic import SyntheticMarket  # noqa: E402
+from xqdata.shm import unlink_segment  # noqa: E402
+from xqdata.shm_cache import SharedResultCache  # noqa: E402
+
+fork = multiprocessing.get_context("fork")
+
+
+class CountingApi(MockDataApi):
+    """记录数据源被查询的次数"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.use_synthetic_market(
+            SyntheticMarket(n_codes=10, start_time="2024-01-01", end_time="2024-03-31")
+        )
+        self.codes = self.market.instruments["code"].tolist()
+
+    def get_factor(self, *args, **kwargs):
+        self.calls += 1
+        return super().get_factor(*args, **kwargs)
+
+
+def make_api(root, **kwargs):
+    return CachedDataApi(CountingApi(), cache=SharedResultCache(root=root, **kwargs))
+
+
+def child_query(root, queue):
+    """子进程：用自己的缓存对象查询，返回结果和数据源被查询的次数"""
+    api = make_api(root)
+    full = api.get_factor(["close", "is_st"], api.api.codes, "2024-01-01", "2024-03-31")
+    data = api.get_factor(
+        ["close", "is_st"], api.api.codes[:3], "2024-02-01", "2024-02-29"
+    )
+    queue.put((data.copy(), api.api.calls, full["close"].to_numpy().flags.writeable))
+
+
+def child_crash(root):
+    """子进程：写入结果后不释放引用直接退出"""
+    api = make_api(root)
+    api.get_factor("volume", api.api.codes, "2024-01-01", "2024-03-31")
+    os._exit(0)
+
+
+class TestSharedResultCache:
+    def test_sibling_attaches(self, tmp_path):
+        api = make_api(tmp_path)
+        expected = api.get_factor(
+            ["close", "is_st"], api.api.codes, "2024-01-01", "2024-03-31"
+        )
+        assert api.api.calls == 1
+        # 数值列直接引用共享内存，不可写
+        assert not expected["close"].to_numpy().flags.writeable
+
+        queue = fork.Queue()
+        process = fork.Process(target=child_query, args=(tmp_path, queue))
+        process.start()
+        data, calls, writeable = queue.get(timeout=30)
+        process.join()
+
+        assert calls == 0
+        assert not writeable
+        codes = api.api.codes[:3]
+        subset = expected.loc[
+            (slice("2024-02-01", "2024-02-29"), codes), ["close", "is_st"]
+        ]
+        pd.testing.assert_frame_equal(data, subset.sort_index(), check_freq=False)
+        # 子进程退出时释放了自己的引用
+        cache = api.cache
+        assert cache.hits == 0 and cache.misses == 1
+        with cache._index() as index:
+            assert [item["refs"] for item in index.values()] == [[os.getpid()]]
+
+        names = list(cache._attached)
+        cache.close()
+        assert cache.nbytes == 0
+        assert not unlink_segment(names[0])
+
+    def test_auth_keeps_shared_results(self, tmp_path):
+        api = make_api(tmp_path)
+        api.get_factor("close", api.api.codes, "2024-01-01", "2024-01-31")
+        other = make_api(tmp_path)
+        other.auth()
+        other.get_factor("close", api.api.codes, "2024-01-01", "2024-01-31")
+        # 另一个进程(缓存对象)认证不清空共享的结果
+        assert other.api.calls == 0
+        api.cache.close()
+        other.cache.close()
+
+    def test_dead_process_is_pruned(self, tmp_path):
+        process = fork.Process(target=child_crash, args=(tmp_path,))
+        process.start()
+        process.join()
+
+        cache = SharedResultCache(root=tmp_path)
+        with cache._index() as index:
+            names = list(index)
+        assert len(names) == 1
+        # 下一次访问索引时清理已退出进程的引用并释放共享内存
+        assert cache.nbytes == 0
+        assert not unlink_segment(names[0])
+        assert list(tmp_path.glob("default/*.meta")) == []
+
+    def test_eviction(self, tmp_path):
+        api = make_api(tmp_path, max_bytes=8_000)
+        codes = api.api.codes
+        first = api.get_factor("close", codes[:5], "2024-01-01", "2024-03-31")
+        api.get_factor("close", codes[5:], "2024-01-01", "2024-03-31")
+        with api.cache._index() as index:
+            assert len(index) == 1
+        # 被淘汰的结果在本进程中仍然可用
+        assert np.isfinite(first["close"].to_numpy()).all()
+        api.cache.clear()
+        assert api.cache.nbytes == 0
+
+    def test_extension_dtypes(self, tmp_path):
+        cache = SharedResultCache(root=tmp_path)
+        index = pd.MultiIndex.from_product(
+            [pd.date_range("2024-01-02", periods=2), ["a", "b"]],
+            names=["datetime", "code"],
+        )
+        data = pd.DataFrame(
+            {"volume": pd.array([1, None, 3, 4], dtype="Int64"), "x": [1.0] * 4},
+            index=index,
+        )
+        query = ("q", frozenset(["volume", "x"]), frozenset(["a", "b"]), None, None)
+        cache.put(*query, data)
+        other = SharedResultCache(root=tmp_path)
+        pd.testing.assert_frame_equal(other.get(*query), data)
+        other.close()
+        cache.close()
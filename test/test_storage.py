@@ -0,0 +1,114 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from xqdata.storage import ParquetStore  # noqa: E402
+
+
+class TestParquetStore:
+    """测试按日期/证券分区的Parquet数据集"""
+
+    def setup_method(self):
+        """每个测试方法执行前的准备"""
+        index = pd.MultiIndex.from_product(
+            [
+                pd.date_range("2025-01-02 09:31", periods=240, freq="min").append(
+                    pd.date_range("2025-01-03 09:31", periods=240, freq="min")
+                ),
+                ["000001.XSHE", "300750.XSHE"],
+            ],
+            names=["datetime", "code"],
+        )
+        self.data = pd.DataFrame(
+            {
+                "open": np.arange(len(index), dtype=np.float64),
+                "close": np.arange(len(index), dtype=np.float64) + 0.5,
+                "volume": np.arange(len(index), dtype=np.int64),
+            },
+            index=index,
+        )
+
+    def test_write_and_read(self, tmp_path):
+        """测试写入后完整读取"""
+        store = ParquetStore(tmp_path / "bars", partition="day", by_code=True)
+        store.write(self.data)
+
+        df = store.read()
+        assert df.index.names == ["datetime", "code"]
+        assert df.columns.tolist() == ["open", "close", "volume"]
+        pd.testing.assert_frame_equal(df, self.data.sort_index(), check_like=True)
+
+    def test_read_pushdown(self, tmp_path):
+        """测试按时间区间、字段和证券读取"""
+        store = ParquetStore(tmp_path / "bars", partition="day", by_code=True)
+        store.write(self.data)
+
+        df = store.read(
+            columns=["close"],
+            codes="300750.XSHE",
+            start_time="2025-01-03 10:00",
+            end_time="2025-01-03 10:09",
+        )
+        assert df.columns.tolist() == ["close"]
+        assert len(df) == 10
+        assert (df.index.get_level_values("code") == "300750.XSHE").all()
+
+    def test_overwrite_same_key(self, tmp_path):
+        """测试同一分区相同key的写入会覆盖"""
+        store = ParquetStore(tmp_path / "bars", partition="month")
+        store.write(self.data)
+        store.write(self.data * 2)
+
+        df = store.read()
+        assert len(df) == len(self.data)
+        assert df["close"].max() == pytest.approx(self.data["close"].max() * 2)
+
+    def test_reopen_uses_saved_layout(self, tmp_path):
+        """测试重新打开数据集时使用已保存的分区配置"""
+        ParquetStore(tmp_path / "bars", partition="year", by_code=True).write(self.data)
+        store = ParquetStore(tmp_path / "bars")
+        assert store.partition == "year"
+        assert store.by_code is True
+        assert store.columns == ["open", "close", "volume"]
+
+    def test_stream_price_batches_per_day(self, tmp_path, monkeypatch):
+        """测试流式写入每个交易日每个证券批次只写一个文件"""
+        stream = pytest.importorskip("xqdata.rq.stream")
+        data = self.data
+
+        def fake_get_price(factors, codes, start_time, end_time, **kwargs):
+            day = data.loc[
+                pd.Timestamp(start_time) : pd.Timestamp(end_time) + pd.Timedelta(days=1)
+            ]
+            return day[day.index.get_level_values("code").isin(codes)][factors]
+
+        monkeypatch.setattr(
+            stream.rq,
+            "get_trading_dates",
+            lambda start, end: [date(2025, 1, 2), date(2025, 1, 3)],
+        )
+        monkeypatch.setattr(stream, "rq_get_price", fake_get_price)
+        codes = ["000001.XSHE", "300750.XSHE"]
+        store = stream.rq_stream_price(
+            ["close"],
+            codes,
+            "2025-01-02",
+            "2025-01-03",
+            tmp_path / "bars",
+            batch_size=1,
+        )
+        files = sorted(
+            p.relative_to(store.root).as_posix() for p in store.root.rglob("*.parquet")
+        )
+        assert files == [
+            f"date={day}/batch{i:05d}.parquet"
+            for day in ["20250102", "20250103"]
+            for i in range(2)
+        ]
+        df = store.read(codes="300750.XSHE")
+        assert len(df) == 480
+        pd.testing.assert_frame_equal(store.read(), data[["close"]].sort_index())
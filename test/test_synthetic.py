@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xqdata.mock import MockDataApi
+from xqdata.mock.synthetic import SYNTHETIC_FACTORS, SyntheticMarket
+from xqdata.replay import BarReplay
+
+
+@pytest.fixture(scope="module")
+def market():
+    return SyntheticMarket(n_codes=60, start_time="2015-01-01", end_time="2020-12-31")
+
+
+class TestSyntheticMarket:
+    def test_calendar_skips_weekends_and_holidays(self, market):
+        days = market.calendar
+        assert (days.dayofweek < 5).all()
+        assert not ((days.month == 10) & (days.day <= 7)).any()
+        assert not ((days.month == 1) & (days.day == 1)).any()
+
+    def test_same_seed_same_data(self, market):
+        other = SyntheticMarket(
+            n_codes=60, start_time="2015-01-01", end_time="2020-12-31"
+        )
+        codes = market.instruments["code"][:5].tolist()
+        pd.testing.assert_frame_equal(
+            market.get_factor(codes=codes), other.get_factor(codes=codes)
+        )
+        changed = SyntheticMarket(
+            n_codes=60, start_time="2015-01-01", end_time="2020-12-31", seed=1
+        )
+        assert not market.get_factor("close", codes[:1]).equals(
+            changed.get_factor("close", codes[:1])
+        )
+
+    def test_chunks_and_windows_do_not_change_data(self, market):
+        whole = market.get_factor(["close", "volume"])
+        chunks = list(market.iter_chunks(["close", "volume"], chunk_size=7))
+        assert all(c.index.get_level_values("code").nunique() <= 7 for c in chunks)
+        pd.testing.assert_frame_equal(pd.concat(chunks).sort_index(), whole)
+
+        window = market.get_factor(
+            ["close", "volume"], start_time="2019-03-01", end_time="2019-06-30"
+        )
+        dates = whole.index.get_level_values("datetime")
+        expected = whole[(dates >= "2019-03-01") & (dates <= "2019-06-30")]
+        pd.testing.assert_frame_equal(window, expected)
+
+    def test_bars_are_consistent(self, market):
+        data = market.get_factor()
+        assert list(data.columns) == SYNTHETIC_FACTORS
+        assert (data["high"] >= data[["open", "close"]].max(axis=1)).all()
+        assert (data["low"] <= data[["open", "close"]].min(axis=1)).all()
+        assert (data["low"] > 0).all()
+        assert (data["high"] <= data["limit_up"] + 0.01).all()
+        assert (data["low"] >= data["limit_down"] - 0.01).all()
+
+        paused = data[data["is_paused"]]
+        assert len(paused) > 0
+        assert (paused["volume"] == 0).all()
+        assert (paused["close"] == paused["prev_close"]).all()
+        assert (data.loc[~data["is_paused"], "volume"] > 0).all()
+        # ST期间涨跌幅限制为5%
+        st = data[data["is_st"]]
+        if len(st):
+            ratio = st["limit_up"] / st["prev_close"]
+            assert np.allclose(ratio, 1.05, atol=0.01)
+
+    def test_rows_only_within_listing(self, market):
+        data = market.get_factor("close")
+        info = market.instruments.set_index("code")
+        dates = data.index.get_level_values("datetime")
+        codes = data.index.get_level_values("code")
+        listed = info["listed_date"].reindex(codes).to_numpy()
+        de_listed = info["de_listed_date"].reindex(codes).to_numpy()
+        assert (dates >= listed).all()
+        assert (dates < de_listed).all()
+        assert (info["de_listed_date"] < "2100-01-01").any()
+        assert info["industry"].nunique() > 1
+
+    def test_unknown_factor(self, market):
+        with pytest.raises(ValueError, match="Unknown synthetic factors"):
+            market.get_factor("pe_ratio")
+
+
+class TestMockSyntheticMode:
+    def setup_method(self):
+        self.api = MockDataApi()
+        self.market = self.api.use_synthetic_market(
+            n_codes=20, start_time="2020-01-01", end_time="2020-12-31"
+        )
+        self.codes = self.market.instruments["code"].tolist()
+
+    def test_info_and_calendar(self):
+        stock = self.api.get_info(
+            "stock", industry=self.market.instruments["industry"][0]
+        )
+        assert len(stock) >= 1
+        assert self.api.get_tradedays("2020-09-25", "2020-10-12").equals(
+            self.market.calendar[
+                (self.market.calendar >= "2020-09-25")
+                & (self.market.calendar <= "2020-10-12")
+            ]
+        )
+
+    def test_get_factor_mixes_random_factors(self):
+        data = self.api.get_factor(
+            ["close", "pe_ratio"], self.codes[:3], "2020-06-01", "2020-06-30"
+        )
+        assert list(data.columns) == ["close", "pe_ratio"]
+        expected = self.market.get_factor(
+            "close", self.codes[:3], "2020-06-01", "2020-06-30"
+        )
+        pd.testing.assert_series_equal(data["close"], expected["close"])
+
+        long = self.api.get_factor(
+            "close", self.codes[:3], "2020-06-01", "2020-06-30", panel=False
+        )
+        assert list(long.columns) == ["attribute", "value"]
+
+    def test_cross_section_default_universe(self):
+        data = self.api.get_cross_section(["close", "pe_ratio"], "2020-06-01")
+        listing = self.market.instruments.set_index("code")
+        date = pd.Timestamp("2020-06-01")
+        listed = listing.index[
+            (listing["listed_date"] <= date) & (listing["de_listed_date"] > date)
+        ]
+        assert sorted(data.index) == sorted(listed)
+        assert list(data.columns) == ["close", "pe_ratio"]
+
+    def test_bar_replay(self):
+        listing = self.market.instruments.set_index("code")
+        replay = BarReplay(
+            self.api,
+            self.codes,
+            "2020-01-01",
+            "2020-12-31",
+            suspension_factor="is_paused",
+            listing=listing,
+        )
+        assert len(replay) == len(self.market.calendar)
+        assert (replay.tradable.sum(axis=1) > 0).all()
@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from xqdata.local import LocalDataApi  # noqa: E402
+from xqdata.mock import MockDataApi  # noqa: E402
+from xqdata.updater import IncrementalUpdater  # noqa: E402
+
+
+class RecordingDataApi(MockDataApi):
+    """按(日期, 证券)生成确定数据的数据源，并记录请求区间"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.version = 0
+        # 数据源已发布数据的最后一天，None表示不限制
+        self.published = None
+
+    def get_factor(self, factors, codes, start_time=None, end_time=None, **kwargs):
+        self.requests.append((pd.Timestamp(start_time), pd.Timestamp(end_time)))
+        if self.published is not None:
+            end_time = min(pd.Timestamp(end_time), self.published)
+        index = pd.MultiIndex.from_product(
+            [pd.bdate_range(start_time, end_time), codes], names=["datetime", "code"]
+        )
+        values = index.get_level_values("datetime").day + self.version * 100
+        return pd.DataFrame({f: values.astype(float) for f in factors}, index=index)
+
+
+class TestIncrementalUpdater:
+    """测试按水位线增量更新"""
+
+    def test_update(self, tmp_path):
+        api = RecordingDataApi()
+        updater = IncrementalUpdater(api, tmp_path, lookback=2, calendar=pd.bdate_range)
+        codes = ["000001.XSHE", "600000.XSHG"]
+
+        with pytest.raises(ValueError):
+            updater.update("close", codes, "price", end_time="2024-01-31")
+
+        updater.update("close", codes, "price", "2024-01-01", "2024-01-31")
+        assert updater.watermark("close", codes) == pd.Timestamp("2024-01-31")
+
+        # 第二次只获取回溯的2个交易日和新的交易日，并修正回溯区间的数据
+        api.version = 1
+        updater.update("close", list(reversed(codes)), "price", end_time="2024-02-02")
+        assert api.requests[-1] == (
+            pd.Timestamp("2024-01-30"),
+            pd.Timestamp("2024-02-02"),
+        )
+        assert updater.watermark("close", codes) == pd.Timestamp("2024-02-02")
+
+        local = LocalDataApi(tmp_path)
+        df = local.get_factor("close", codes, "2024-01-01", "2024-02-02")
+        assert len(df) == 25 * 2
+        assert df.loc[("2024-01-29", "000001.XSHE"), "close"] == 29
+        assert df.loc[("2024-01-30", "000001.XSHE"), "close"] == 130
+        assert df.loc[("2024-02-02", "600000.XSHG"), "close"] == 102
+
+        # 水位线持久化
+        reopened = IncrementalUpdater(api, tmp_path, calendar=pd.bdate_range)
+        assert reopened.watermark("close", codes) == pd.Timestamp("2024-02-02")
+
+    def test_table_factors_fixed(self, tmp_path):
+        updater = IncrementalUpdater(
+            RecordingDataApi(), tmp_path, calendar=pd.bdate_range
+        )
+        updater.update("close", "000001.XSHE", "price", "2024-01-01", "2024-01-05")
+        with pytest.raises(ValueError):
+            updater.update("open", "000001.XSHE", "price", "2024-01-01", "2024-01-05")
+
+    def test_short_refetch_keeps_data(self, tmp_path):
+        api = RecordingDataApi()
+        updater = IncrementalUpdater(api, tmp_path, lookback=3, calendar=pd.bdate_range)
+        codes = ["000001.XSHE"]
+        updater.update("close", codes, "price", "2024-01-01", "2024-01-31")
+
+        # 回溯区间只返回了部分数据：水位线不回退，未返回的旧数据保留
+        api.version = 1
+        api.published = pd.Timestamp("2024-01-29")
+        updater.update("close", codes, "price", end_time="2024-02-02")
+        assert updater.watermark("close", codes) == pd.Timestamp("2024-01-31")
+
+        df = LocalDataApi(tmp_path).get_factor(
+            "close", codes, "2024-01-01", "2024-01-31"
+        )
+        assert len(df) == 23
+        assert df.loc[("2024-01-29", "000001.XSHE"), "close"] == 129
+        assert df.loc[("2024-01-31", "000001.XSHE"), "close"] == 31
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds  # noqa: E402
+import pyarrow.parquet  # noqa: E402, F401
+
+from xqdata.writer import FrameWriter, infer_format  # noqa: E402
+
+
+def make_frame(codes, columns=("close", "volume")):
+    index = pd.MultiIndex.from_product(
+        [pd.date_range("2024-01-02", periods=3), codes], names=["datetime", "code"]
+    )
+    values = np.arange(len(index), dtype=float)
+    return pd.DataFrame({c: values for c in columns}, index=index)
+
+
+def read(path, format):
+    if format == "ipc":
+        table = pa.ipc.open_file(path).read_all()
+    else:
+        table = ds.dataset(path, format="parquet").to_table()
+    # pandas元数据中保存了索引，读回时恢复为MultiIndex
+    return table.to_pandas().sort_index()
+
+
+def pq_type(path, column):
+    return pa.parquet.read_schema(path).field(column).type
+
+
+class TestFrameWriter:
+    def test_infer_format(self):
+        assert infer_format("a/b.parquet") == "parquet"
+        assert infer_format("b.feather") == "ipc"
+        assert infer_format("a/b") == "dataset"
+
+    @pytest.mark.parametrize("name", ["out.parquet", "out.arrow", "out"])
+    def test_round_trip(self, tmp_path, name):
+        target = tmp_path / name
+        chunks = [make_frame(["a", "b"]), make_frame(["c"])]
+        with FrameWriter(target) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+        assert writer.rows == 9
+        # 临时文件已被替换
+        assert [p.name for p in tmp_path.iterdir()] == [name]
+
+        expected = pd.concat(chunks).sort_index()
+        pd.testing.assert_frame_equal(read(target, writer.format), expected)
+
+    def test_missing_columns(self, tmp_path):
+        target = tmp_path / "out.parquet"
+        writer = FrameWriter(target, columns=["close", "volume"])
+        writer.write(make_frame(["a"]))
+        writer.write(make_frame(["b"], columns=["close"]))
+        writer.close()
+
+        data = read(target, "parquet")
+        assert data["volume"].isna().sum() == 3
+        assert data["close"].notna().all()
+
+    @pytest.mark.parametrize("name", ["out.parquet", "out.arrow", "out"])
+    def test_all_missing_first_chunk(self, tmp_path, name):
+        """第一块中全部缺失的列由后续的块确定类型"""
+        target = tmp_path / name
+        first = make_frame(["a"], columns=["close"])
+        first["exchange"] = None
+        second = make_frame(["b"], columns=["close"])
+        second["exchange"] = "XSHE"
+        with FrameWriter(target, columns=["close", "exchange"]) as writer:
+            writer.write(first)
+            writer.write(second)
+
+        data = read(target, writer.format)
+        assert data["exchange"].isna().sum() == 3
+        assert (data.loc[(slice(None), "b"), "exchange"] == "XSHE").all()
+
+    def test_declared_dtypes(self, tmp_path):
+        target = tmp_path / "out.parquet"
+        first = make_frame(["a"], columns=["volume"])
+        first["volume"] = np.nan
+        with FrameWriter(target, dtypes={"volume": "Int64"}) as writer:
+            writer.write(first)
+            writer.write(make_frame(["b"], columns=["volume"]))
+        assert pq_type(target, "volume") == pa.int64()
+
+    def test_abort_keeps_target(self, tmp_path):
+        target = tmp_path / "out.parquet"
+        FrameWriter(target).close()
+        assert not target.exists()
+
+        with FrameWriter(target) as writer:
+            writer.write(make_frame(["a"]))
+        with pytest.raises(RuntimeError):
+            with FrameWriter(target) as writer:
+                writer.write(make_frame(["b", "c"]))
+                raise RuntimeError("query failed")
+        # 失败的写入不影响已有文件，也不留下临时文件
+        assert len(read(target, "parquet")) == 3
+        assert [p.name for p in tmp_path.iterdir()] == ["out.parquet"]
+
+    def test_replace_dataset(self, tmp_path):
+        target = tmp_path / "out"
+        for codes in (["a", "b"], ["c"]):
+            with FrameWriter(target) as writer:
+                writer.write(make_frame(codes))
+        assert read(target, "dataset").index.get_level_values(
+            "code"
+        ).unique().tolist() == ["c"]